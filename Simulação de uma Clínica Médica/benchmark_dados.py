@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import funcoes
+from funcoes import (
+    adicionar_paciente_dados, carregar_dados, criar_paciente, ler_ficheiro_json, marcar_dados_como_importados,
+    procurar_paciente_dados, remover_paciente_dados, salvar_dados, usar_armazenamento, validar_estrutura_pacientes,
+    verificar_dados_importados
+)
+from gerar_dados import carregar_distribuicoes, categorias_binario, escrever_pacientes_json, gerar_blocos, gerar_medicos
+
+
+# ============================================================================
+# BENCHMARK DA CAMADA DE DADOS (funções CRUD de funcoes.py)
+# ============================================================================
+# Exemplo:
+#     python benchmark_dados.py --tamanhos 1000 100000 1000000 --armazenamento json sqlite -o bench_dados.json
+#
+# Gera, numa pasta de trabalho, pacientes.json/medicos.json sintéticos (gerar_dados) de
+# cada tamanho e aponta os caminhos de funcoes para lá (no SQLite, os dados são gravados
+# numa clinica.db na mesma pasta); os ficheiros da clínica não são tocados. Cada operação é medida com a cache quente (ficheiro acabado de ler, já no
+# repositório de funcoes e na cache de páginas) e fria (repositório esvaziado e
+# posix_fadvise DONTNEED antes de cada repetição, depois de um fsync). Em sistemas sem
+# posix_fadvise, ou em tmpfs, a medida fria só esvazia o repositório.
+
+SEMENTE_BENCHMARK = 12345
+ID_PACIENTE_BENCHMARK = "bench-1"
+PODE_LARGAR_CACHE = hasattr(os, "posix_fadvise")
+
+
+def usar_pasta(pasta, armazenamento):
+    """Redireciona carregar_dados/salvar_dados e a flag de importação para `pasta`"""
+    funcoes.CAMINHO_MEDICOS = os.path.join(pasta, "medicos.json")
+    funcoes.CAMINHO_PACIENTES = os.path.join(pasta, "pacientes.json")
+    funcoes.CAMINHO_FLAG_IMPORTACAO = os.path.join(pasta, ".dados_importados")
+    funcoes.CAMINHO_BASE_DADOS = os.path.join(pasta, "clinica.db")
+    usar_armazenamento(armazenamento)
+
+
+def ficheiros_dados():
+    """Ficheiros onde o armazenamento em uso guarda os dados (os que a medida fria tira da cache)"""
+    if funcoes.ARMAZENAMENTO == "sqlite":
+        candidatos = [funcoes.CAMINHO_BASE_DADOS, funcoes.CAMINHO_BASE_DADOS + "-wal"]
+    else:
+        candidatos = [funcoes.CAMINHO_PACIENTES, funcoes.CAMINHO_MEDICOS]
+    return [caminho for caminho in candidatos if os.path.exists(caminho)]
+
+
+def largar_cache(caminho):
+    """Tira o ficheiro da cache de páginas do sistema (as páginas sujas são escritas antes)"""
+    if not PODE_LARGAR_CACHE:
+        return
+    with open(caminho, "rb") as f:
+        os.fsync(f.fileno())
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def preparar_dataset(pasta, total, distribuicoes, armazenamento):
+    """Escreve o dataset de `total` pacientes e grava-o com salvar_dados (o formato que as operações mantêm)"""
+    os.makedirs(pasta, exist_ok=True)
+    usar_pasta(pasta, armazenamento)
+    categorias = categorias_binario(distribuicoes)
+    escrever_pacientes_json(funcoes.CAMINHO_PACIENTES, gerar_blocos(total, SEMENTE_BENCHMARK, distribuicoes), categorias)
+    num_medicos = min(1000, max(15, total // 50))
+    salvar_dados("medicos.json", gerar_medicos(num_medicos, SEMENTE_BENCHMARK, distribuicoes))
+    dados = ler_ficheiro_json(funcoes.CAMINHO_PACIENTES)
+    salvar_dados("pacientes.json", dados)
+    marcar_dados_como_importados()
+    pacientes = dados["pacientes"]
+    # Chaves de pesquisa: o último id (percorre o ficheiro todo) e um apelido frequente
+    return {"ultimo_id": pacientes[-1]["id"], "apelido": pacientes[-1]["nome"].split()[-1]}
+
+
+# ============================================================================
+# OPERAÇÕES
+# ============================================================================
+def operacoes(chaves):
+    """(nome, função) de cada operação; adicionar e remover usam o mesmo paciente e deixam o ficheiro como estava"""
+    novo_paciente = criar_paciente(ID_PACIENTE_BENCHMARK, "Paciente Benchmark", 40, "feminino", "Gripe", "normal",
+                                   False, False, "moderada", False)
+
+    def validar():
+        # Como em importar_dados: ler o ficheiro e validar o esquema
+        return validar_estrutura_pacientes(carregar_dados("pacientes.json"))
+
+    return [
+        ("carregar_dados", lambda: carregar_dados("pacientes.json")),
+        ("validar_estrutura_pacientes", validar),
+        ("procurar_paciente_dados (id)", lambda: procurar_paciente_dados(chaves["ultimo_id"])),
+        ("procurar_paciente_dados (nome)", lambda: procurar_paciente_dados(chaves["apelido"])),
+        ("adicionar_paciente_dados", lambda: adicionar_paciente_dados(novo_paciente)),
+        ("remover_paciente_dados", lambda: remover_paciente_dados(ID_PACIENTE_BENCHMARK)),
+        ("verificar_dados_importados", verificar_dados_importados)
+    ]
+
+
+def medir_operacoes(total, chaves, repeticoes, modos):
+    """Latências (ms) de cada operação em cada modo de cache; repete o par adicionar/remover para não mudar os dados"""
+    latencias = {}
+    for _ in range(repeticoes):
+        for modo in modos:
+            for nome, funcao in operacoes(chaves):
+                if modo == "fria":
+                    funcoes.repositorio.invalidar()
+                    for caminho in ficheiros_dados():
+                        largar_cache(caminho)
+                else:
+                    carregar_dados("pacientes.json")
+                inicio = time.perf_counter()
+                funcao()
+                duracao = time.perf_counter() - inicio
+                latencias.setdefault((nome, modo), []).append(duracao * 1000)
+
+    resultados = []
+    for (nome, modo), valores in latencias.items():
+        resultados.append({
+            "operacao": nome,
+            "armazenamento": funcoes.ARMAZENAMENTO,
+            "cache": modo,
+            "pacientes": total,
+            "repeticoes": len(valores),
+            "mediana_ms": statistics.median(valores),
+            "minimo_ms": min(valores),
+            "maximo_ms": max(valores)
+        })
+    return resultados
+
+
+# ============================================================================
+# RELATÓRIO
+# ============================================================================
+def mostrar_tabela(resultados, tamanhos):
+    """Uma linha por operação, armazenamento e modo de cache, uma coluna (mediana em ms) por tamanho"""
+    por_chave = {(r["operacao"], r["armazenamento"], r["cache"], r["pacientes"]): r for r in resultados}
+    linhas = []
+    for r in resultados:
+        if (r["operacao"], r["armazenamento"], r["cache"]) not in linhas:
+            linhas.append((r["operacao"], r["armazenamento"], r["cache"]))
+
+    cabecalho = f"{'Operação':<32} {'Dados':<7} {'Cache':<6}" + "".join(f"{f'{t} pac. (ms)':>18}" for t in tamanhos)
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for operacao, armazenamento, modo in linhas:
+        celulas = ""
+        for tamanho in tamanhos:
+            r = por_chave.get((operacao, armazenamento, modo, tamanho))
+            celulas = celulas + (f"{r['mediana_ms']:>18.2f}" if r else f"{'-':>18}")
+        print(f"{operacao:<32} {armazenamento:<7} {modo:<6}{celulas}")
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Benchmark das funções CRUD de funcoes.py (latências em JSON).")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="números de pacientes dos datasets (padrão: 1000 100000 1000000)")
+    parser.add_argument("--armazenamento", nargs="+", choices=["json", "sqlite"], default=["json"],
+                        help="armazenamentos de funcoes a medir (padrão: json)")
+    parser.add_argument("-r", "--repeticoes", type=int, default=3, help="repetições por operação (padrão: 3)")
+    parser.add_argument("--cache", choices=["quente", "fria", "ambas"], default="ambas",
+                        help="estado da cache de páginas a medir (padrão: ambas)")
+    parser.add_argument("--pasta", default=None, help="pasta de trabalho (padrão: temporária, apagada no fim)")
+    parser.add_argument("-o", "--saida", default="benchmark_dados.json", help="ficheiro JSON de resultados")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    modos = ["quente", "fria"] if args.cache == "ambas" else [args.cache]
+
+    distribuicoes = carregar_distribuicoes()
+    pasta_base = args.pasta or tempfile.mkdtemp(prefix="benchmark_dados_")
+    resultados = []
+    ficheiros = {}
+    inicio = time.time()
+    try:
+        for armazenamento in args.armazenamento:
+            ficheiros[armazenamento] = {}
+            for tamanho in args.tamanhos:
+                pasta = os.path.join(pasta_base, armazenamento, str(tamanho))
+                inicio_preparacao = time.time()
+                chaves = preparar_dataset(pasta, tamanho, distribuicoes, armazenamento)
+                tamanho_mb = sum(os.path.getsize(caminho) for caminho in ficheiros_dados()) / 2 ** 20
+                ficheiros[armazenamento][tamanho] = tamanho_mb
+                print(f"{tamanho} pacientes ({armazenamento}): {tamanho_mb:.1f} MB preparados em "
+                      f"{time.time() - inicio_preparacao:.1f} s")
+                resultados.extend(medir_operacoes(tamanho, chaves, args.repeticoes, modos))
+    finally:
+        if args.pasta is None:
+            shutil.rmtree(pasta_base, ignore_errors=True)
+
+    print()
+    mostrar_tabela(resultados, args.tamanhos)
+
+    relatorio = {
+        "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "duracao_total_s": time.time() - inicio,
+        "parametros": {"tamanhos": args.tamanhos, "armazenamento": args.armazenamento,
+                       "repeticoes": args.repeticoes, "cache": modos},
+        "tamanho_ficheiro_mb": ficheiros,
+        "resultados": resultados
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"\n{len(resultados)} medidas em {relatorio['duracao_total_s']:.1f} s -> {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
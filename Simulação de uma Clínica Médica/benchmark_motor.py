@@ -0,0 +1,341 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from funcoes import FilaPrioridade, adicionar_a_fila, carregar_pacientes_simula, ordenar_fila_por_prioridade
+from gerar_dados import carregar_distribuicoes, gerar_blocos, gerar_medicos, registos_para_pacientes, categorias_binario
+from motor_simulacao import PRIORIDADES, Paciente, Simulacao, TabelaPacientes
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem getrusage, o relatório fica sem a memória máxima do processo
+    resource = None
+
+
+# ============================================================================
+# BENCHMARK DO MOTOR (micro-benchmarks e escala)
+# ============================================================================
+# Exemplo:
+#     python benchmark_motor.py --saida bench_atual.json
+#     python benchmark_motor.py --rapido --comparar bench_atual.json
+#
+# Mede a simulação completa numa grelha de médicos x lambda (eventos/s e memória de
+# pico), as operações do motor numa grelha de tamanhos de fila x médicos e o
+# carregamento de pacientes. Os médicos e os pacientes das filas grandes vêm de
+# gerar_dados, com semente fixa, para que versões diferentes meçam o mesmo trabalho.
+# Com --comparar mostra a razão entre cada medida e a do ficheiro anterior.
+
+SEMENTE_BENCHMARK = 12345
+
+
+def melhor_tempo(funcao, repeticoes):
+    """Menor tempo (s) de `repeticoes` chamadas a funcao(); funcao prepara o próprio estado"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor
+
+
+def medir_chamadas(preparar, funcao, repeticoes):
+    """Como melhor_tempo, mas o estado de cada repetição vem de preparar() e não é cronometrado"""
+    melhor = None
+    for _ in range(repeticoes):
+        argumento = preparar()
+        inicio = time.perf_counter()
+        funcao(argumento)
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor
+
+
+def memoria_maxima_processo():
+    """Memória residente máxima do processo (MB), ou None onde não há getrusage"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return maxrss / 2 ** 20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def memoria_pico(funcao):
+    """Pico de memória (MB) alocada em Python durante funcao(), medido com tracemalloc"""
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 2 ** 20
+
+
+MAPA_PRIORIDADES = {"emergência": "URGENTE", "alta": "ALTA", "normal": "NORMAL", "baixa": "BAIXA"}
+
+
+def criar_tabela(total, distribuicoes):
+    """TabelaPacientes com `total` pacientes de gerar_dados, já com prioridade e especialidade do motor"""
+    categorias = categorias_binario(distribuicoes)
+    especialidades = {d.lower(): e for d, e in distribuicoes["mapeamento_doencas"].items()}
+    pacientes = []
+    for registos in gerar_blocos(total, SEMENTE_BENCHMARK, distribuicoes):
+        pacientes.extend(registos_para_pacientes(registos, categorias))
+    for p in pacientes:
+        p["prioridade"] = MAPA_PRIORIDADES.get(p["prioridade"].lower(), "NORMAL")
+        p["especialidade_necessaria"] = especialidades.get(p["doenca"].lower(), "Clínica Geral")
+    return TabelaPacientes(pacientes)
+
+
+# ============================================================================
+# CASOS
+# ============================================================================
+def caso_motor(num_medicos, lambda_chegada, tempo_simulacao, medicos, repeticoes, com_memoria=True):
+    config = {
+        "num_medicos": num_medicos,
+        "lambda_chegada": lambda_chegada,
+        "tempo_simulacao": tempo_simulacao,
+        "semente": SEMENTE_BENCHMARK
+    }
+
+    def preparar():
+        simulacao = Simulacao()
+        simulacao.inicializar(config, medicos=medicos)
+        return simulacao
+
+    simulacao = preparar()
+    simulacao.executar_completa()
+    eventos = simulacao.estado["eventos_processados"]
+    segundos = medir_chamadas(preparar, lambda s: s.executar_completa(), repeticoes)
+    resultado = {
+        "caso": "motor",
+        "parametros": {"num_medicos": num_medicos, "lambda_chegada": lambda_chegada, "tempo_simulacao": tempo_simulacao},
+        "eventos": eventos,
+        "atendidos": simulacao.estado["resultados_simulacoes"][-1]["resultados_finais"]["atendidos"],
+        "segundos": segundos,
+        "eventos_por_segundo": eventos / segundos if segundos > 0 else 0.0
+    }
+    if com_memoria:
+        # Execução à parte: o tracemalloc torna o motor bem mais lento
+        resultado["memoria_pico_mb"] = memoria_pico(lambda: preparar().executar_completa())
+    return resultado
+
+
+def preparar_fila(tamanho, num_medicos, tabela, medicos):
+    """Simulação com as primeiras `tamanho` linhas da tabela na fila e os médicos todos livres"""
+    simulacao = Simulacao(SEMENTE_BENCHMARK)
+    simulacao.inicializar({"num_medicos": num_medicos, "lambda_chegada": 1, "tempo_simulacao": 60,
+                           "pacientes_sinteticos": True}, tabela=tabela, medicos=medicos)
+    estado = simulacao.estado
+    estado["eventos"] = []
+    estado["tempo_atual"] = 1000.0
+    rng = np.random.default_rng(SEMENTE_BENCHMARK)
+    chegadas = (1000.0 - rng.random(tamanho) * 60).tolist()
+    duracoes = rng.exponential(15, tamanho).tolist()
+    fila = FilaPrioridade(PRIORIDADES)
+    for linha in range(tamanho):
+        fila.inserir(Paciente(tabela, linha, tempo_chegada=chegadas[linha], duracao_consulta=duracoes[linha]))
+    estado["fila_espera"] = fila
+    return simulacao, rng.random(tamanho).tolist()
+
+
+def casos_fila(tamanho, num_medicos, tabela, medicos, repeticoes):
+    parametros = {"tamanho_fila": tamanho, "num_medicos": num_medicos}
+
+    def preparar():
+        return preparar_fila(tamanho, num_medicos, tabela, medicos)[0]
+
+    chamadas_consulta = min(tamanho, 1000)
+
+    def finalizar(simulacao):
+        medico = simulacao.estado["medicos"][0]
+        for _ in range(chamadas_consulta):
+            simulacao.finalizar_consulta(medico, simulacao.estado["tempo_atual"])
+
+    chamadas_estatisticas = 200
+
+    def estatisticas(simulacao):
+        for _ in range(chamadas_estatisticas):
+            simulacao.obter_estatisticas()
+
+    def preparar_desistencias():
+        simulacao, sorteios = preparar_fila(tamanho, num_medicos, tabela, medicos)
+        estado = simulacao.estado
+        # Todos os prazos já vencidos: uma chamada sorteia a fila inteira
+        estado["prazos_desistencia"] = [
+            (estado["tempo_atual"] - 1, i, paciente.id, sorteios[i])
+            for i, paciente in enumerate(estado["fila_espera"].em_ordem())
+        ]
+        return simulacao
+
+    resultados = []
+    for caso, preparacao, funcao, chamadas in (
+        ("finalizar_consulta", preparar, finalizar, chamadas_consulta),
+        ("obter_estatisticas", preparar, estatisticas, chamadas_estatisticas),
+        ("processar_desistencias", preparar_desistencias, lambda s: s.processar_desistencias(), tamanho)
+    ):
+        segundos = medir_chamadas(preparacao, funcao, repeticoes)
+        resultados.append({"caso": caso, "parametros": parametros, "chamadas": chamadas, "segundos": segundos,
+                           "microssegundos_por_chamada": segundos / chamadas * 1e6})
+    return resultados
+
+
+def casos_ordenar(tamanho, tabela, medicos, repeticoes):
+    """ordenar_fila_por_prioridade na fila do motor (heap) e na fila antiga em lista"""
+    parametros = {"tamanho_fila": tamanho}
+    simulacao, _ = preparar_fila(tamanho, 1, tabela, medicos)
+    fila = simulacao.estado["fila_espera"]
+
+    def ordenar_heap():
+        fila.ordenada = None
+        ordenar_fila_por_prioridade(fila, PRIORIDADES)
+        fila.em_ordem()
+
+    resultados = [{"caso": "ordenar_fila_heap", "parametros": parametros,
+                   "segundos": melhor_tempo(ordenar_heap, repeticoes)}]
+    # A versão em lista é quadrática: só para filas pequenas
+    if tamanho <= 10000:
+        pacientes = list(fila.em_ordem())
+
+        def ordenar_lista():
+            lista = []
+            for paciente in pacientes:
+                lista = adicionar_a_fila(lista, paciente)
+            ordenar_fila_por_prioridade(lista, PRIORIDADES)
+
+        resultados.append({"caso": "ordenar_fila_lista", "parametros": parametros,
+                           "segundos": melhor_tempo(ordenar_lista, repeticoes)})
+    return resultados
+
+
+def caso_carregar_pacientes(repeticoes, com_memoria=True):
+    pessoas = carregar_pacientes_simula()
+    segundos = melhor_tempo(carregar_pacientes_simula, repeticoes)
+    resultados = [
+        {"caso": "carregar_pacientes_simula", "parametros": {"pacientes": len(pessoas)}, "segundos": segundos,
+         "pacientes_por_segundo": len(pessoas) / segundos if segundos > 0 else 0.0},
+        {"caso": "tabela_pacientes", "parametros": {"pacientes": len(pessoas)},
+         "segundos": melhor_tempo(lambda: TabelaPacientes(pessoas), repeticoes)}
+    ]
+    if com_memoria:
+        resultados[0]["memoria_pico_mb"] = memoria_pico(carregar_pacientes_simula)
+    return resultados
+
+
+# ============================================================================
+# RELATÓRIO E COMPARAÇÃO
+# ============================================================================
+METRICA_PRINCIPAL = {
+    "motor": ("eventos_por_segundo", True),
+    "finalizar_consulta": ("microssegundos_por_chamada", False),
+    "obter_estatisticas": ("microssegundos_por_chamada", False),
+    "processar_desistencias": ("microssegundos_por_chamada", False),
+    "ordenar_fila_heap": ("segundos", False),
+    "ordenar_fila_lista": ("segundos", False),
+    "carregar_pacientes_simula": ("segundos", False),
+    "tabela_pacientes": ("segundos", False)
+}
+
+
+def chave_resultado(resultado):
+    return resultado["caso"], tuple(sorted(resultado["parametros"].items()))
+
+
+def descrever(resultado):
+    parametros = " ".join(f"{k}={v}" for k, v in resultado["parametros"].items())
+    metrica, _ = METRICA_PRINCIPAL[resultado["caso"]]
+    texto = f"{resultado['caso']:<26} {parametros:<55} {metrica}={resultado[metrica]:.6g}"
+    if "memoria_pico_mb" in resultado:
+        texto = texto + f" pico={resultado['memoria_pico_mb']:.1f} MB"
+    return texto
+
+
+def comparar(resultados, caminho_anterior):
+    with open(caminho_anterior, "r", encoding="utf-8") as f:
+        anteriores = {chave_resultado(r): r for r in json.load(f)["resultados"]}
+    print(f"\nComparação com {caminho_anterior} (>1 = melhor agora):")
+    for resultado in resultados:
+        anterior = anteriores.get(chave_resultado(resultado))
+        if anterior is None:
+            continue
+        metrica, maior_melhor = METRICA_PRINCIPAL[resultado["caso"]]
+        if not anterior[metrica] or not resultado[metrica]:
+            continue
+        razao = resultado[metrica] / anterior[metrica] if maior_melhor else anterior[metrica] / resultado[metrica]
+        aviso = "  <-- regressão" if razao < 0.8 else ""
+        print(f"{descrever(resultado)}  x{razao:.2f}{aviso}")
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Benchmark do motor de simulação (resultados em JSON).")
+    parser.add_argument("--medicos", type=int, nargs="+", default=[2, 10, 100, 1000], help="números de médicos")
+    parser.add_argument("--lambdas", type=float, nargs="+", default=[30, 60, 120], help="taxas de chegada (pacientes/h)")
+    parser.add_argument("--filas", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="tamanhos de fila")
+    parser.add_argument("--tempo", type=float, default=480, help="minutos simulados nos casos do motor (padrão: 480)")
+    parser.add_argument("-r", "--repeticoes", type=int, default=3, help="repetições por medida; conta a melhor (padrão: 3)")
+    parser.add_argument("--sem-memoria", action="store_true", help="não medir o pico de memória (tracemalloc)")
+    parser.add_argument("--rapido", action="store_true", help="grelha reduzida (2 e 10 médicos, lambda 60, filas até 1000)")
+    parser.add_argument("-o", "--saida", default="benchmark_motor.json", help="ficheiro JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior para comparar")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.rapido:
+        args.medicos = [2, 10]
+        args.lambdas = [60]
+        args.filas = [100, 1000]
+
+    distribuicoes = carregar_distribuicoes()
+    medicos = gerar_medicos(max(args.medicos), SEMENTE_BENCHMARK, distribuicoes)["medicos"]
+    tabela = criar_tabela(max(args.filas), distribuicoes)
+
+    resultados = []
+    inicio = time.time()
+    for num_medicos in args.medicos:
+        for lambda_chegada in args.lambdas:
+            resultados.append(caso_motor(num_medicos, lambda_chegada, args.tempo, medicos, args.repeticoes,
+                                         not args.sem_memoria))
+            print(descrever(resultados[-1]))
+    for tamanho in args.filas:
+        for num_medicos in args.medicos:
+            for resultado in casos_fila(tamanho, num_medicos, tabela, medicos, args.repeticoes):
+                resultados.append(resultado)
+                print(descrever(resultado))
+        for resultado in casos_ordenar(tamanho, tabela, medicos, args.repeticoes):
+            resultados.append(resultado)
+            print(descrever(resultado))
+    for resultado in caso_carregar_pacientes(args.repeticoes, not args.sem_memoria):
+        resultados.append(resultado)
+        print(descrever(resultado))
+
+    relatorio = {
+        "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "duracao_total_s": time.time() - inicio,
+        "memoria_maxima_processo_mb": memoria_maxima_processo(),
+        "parametros": {"medicos": args.medicos, "lambdas": args.lambdas, "filas": args.filas, "tempo": args.tempo,
+                       "repeticoes": args.repeticoes},
+        "resultados": resultados
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"{len(resultados)} medidas em {relatorio['duracao_total_s']:.1f} s -> {args.saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
 import json
 import os
+import heapq
+import sqlite3
+import threading
+from contextlib import contextmanager
 import numpy as np
-import matplotlib.pyplot as plt
 from typing import List, Dict, Any, Optional
 import datetime
 import re
@@ -31,6 +34,817 @@ CAMINHO_MEDICOS = os.path.join(DIRETORIO_BASE, 'medicos.json')
 CAMINHO_PACIENTES = os.path.join(DIRETORIO_BASE, 'pacientes.json')
 CAMINHO_ADMIN = os.path.join(DIRETORIO_BASE, 'usersadmin.json')
 CAMINHO_FLAG_IMPORTACAO = os.path.join(DIRETORIO_BASE, '.dados_importados')
+CAMINHO_BASE_DADOS = os.path.join(DIRETORIO_BASE, 'clinica.db')
+
+# 'json' (medicos.json/pacientes.json) ou 'sqlite' (CAMINHO_BASE_DADOS); ver usar_armazenamento
+ARMAZENAMENTO = os.environ.get('CLINICA_ARMAZENAMENTO', 'json')
+
+
+
+# ============================================================================
+# REPOSITÓRIO DE DADOS (cache em memória dos ficheiros JSON)
+# ============================================================================
+
+
+# Tamanho (bytes) a partir do qual o diário é compactado num novo snapshot
+LIMITE_DIARIO = 1024 * 1024
+
+
+def caminhos_diario(caminho):
+    """(diário, segmento em compactação) do ficheiro de dados `caminho`, na mesma pasta"""
+    base = os.path.splitext(caminho)[0]
+    return base + '.diario.jsonl', base + '.diario.compactar.jsonl'
+
+
+def ler_diario(caminho):
+    """Operações de um diário, sem uma última linha incompleta (escrita interrompida ou ainda a decorrer
+    noutro processo); a leitura não altera o ficheiro, quem o repara é reparar_diario"""
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        linhas = f.readlines()
+    if linhas and not linhas[-1].endswith('\n'):
+        linhas.pop()
+    return [json.loads(linha) for linha in linhas if linha.strip()]
+
+
+def reparar_diario(caminho):
+    """Corta uma última linha incompleta do diário (escrita interrompida), para a próxima não se juntar a ela"""
+    try:
+        with open(caminho, 'rb+') as f:
+            tamanho = f.seek(0, os.SEEK_END)
+            if tamanho == 0:
+                return
+            f.seek(tamanho - 1)
+            if f.read(1) == b'\n':
+                return
+            f.seek(0)
+            f.truncate(f.read().rfind(b'\n') + 1)
+    except FileNotFoundError:
+        pass
+
+
+def ler_segmento(caminho, snapshot):
+    """Operações do segmento em compactação, ou [] se já estiverem no snapshot lido (`snapshot` é o seu os.stat).
+
+    Aplicar um diário duas vezes não dá o mesmo resultado (um insert repetido duplica o
+    registo), por isso compactar_segmento acaba o segmento com uma marca do snapshot que
+    escreveu antes de o pôr no lugar do antigo.
+    """
+    operacoes = ler_diario(caminho)
+    marcas = [(o["inode"], o["tamanho"]) for o in operacoes if o["op"] == "compactado"]
+    if (snapshot.st_ino, snapshot.st_size) in marcas:
+        return []
+    return [o for o in operacoes if o["op"] != "compactado"]
+
+
+class IndiceLista:
+    """Índice de uma lista de registos, mantido pelas operações do diário sem percorrer a lista.
+
+    primeiro é {str(id): primeiro registo com esse id} (o índice de indice_ids) e repetidos
+    tem os outros registos de cada id repetido, pela ordem da lista. As posições só são
+    calculadas na primeira remoção: cada registo guarda a posição com que entrou no índice
+    e as remoções feitas desde então ficam numa árvore de Fenwick, que dá a posição atual
+    em O(log n). Remover um registo custa assim O(log n) mais o `del` da lista (um memmove
+    em C), em vez de reconstruir a lista.
+    """
+
+    def __init__(self, registos):
+        self.registos = registos
+        self.primeiro = {}
+        for registo in registos:
+            self.primeiro.setdefault(str(registo.get('id')), registo)
+        self.repetidos = None
+        self.posicoes = None
+
+    def preparar_repetidos(self):
+        if self.repetidos is not None:
+            return
+        self.repetidos = {}
+        if len(self.primeiro) != len(self.registos):
+            for registo in self.registos:
+                chave = str(registo.get('id'))
+                if self.primeiro.get(chave) is not registo:
+                    self.repetidos.setdefault(chave, []).append(registo)
+
+    def preparar_posicoes(self):
+        if self.posicoes is None:
+            self.posicoes = {id(registo): posicao for posicao, registo in enumerate(self.registos)}
+            self.arvore = [0] * (len(self.registos) + 1)
+
+    def com_id(self, chave):
+        """Todos os registos com o id `chave` (str), pela ordem da lista"""
+        if chave not in self.primeiro:
+            return []
+        self.preparar_repetidos()
+        return [self.primeiro[chave]] + self.repetidos.get(chave, [])
+
+    def removidos_antes(self, posicao):
+        """Quantos registos com posição de entrada menor que `posicao` já foram removidos"""
+        total = 0
+        while posicao > 0:
+            total = total + self.arvore[posicao]
+            posicao = posicao - (posicao & -posicao)
+        return total
+
+    def acrescentar(self, registo):
+        chave = str(registo.get('id'))
+        if chave not in self.primeiro:
+            self.primeiro[chave] = registo
+        elif self.repetidos is not None:
+            self.repetidos.setdefault(chave, []).append(registo)
+        if self.posicoes is not None:
+            posicao = len(self.arvore) - 1
+            no = posicao + 1
+            # O nó cobre as posições [no - lowbit, no - 1]; a nova ainda não foi removida
+            self.arvore.append(self.removidos_antes(posicao) - self.removidos_antes(no - (no & -no)))
+            self.posicoes[id(registo)] = posicao
+        self.registos.append(registo)
+
+    def remover(self, registo):
+        self.preparar_posicoes()
+        posicao = self.posicoes.pop(id(registo), None)
+        atual = -1 if posicao is None else posicao - self.removidos_antes(posicao)
+        if not 0 <= atual < len(self.registos) or self.registos[atual] is not registo:
+            # A lista foi alterada por fora do índice: procura-se o registo (e o índice é refeito)
+            self.registos.remove(registo)
+            self.__init__(self.registos)
+            return
+        del self.registos[atual]
+        no = posicao + 1
+        while no < len(self.arvore):
+            self.arvore[no] = self.arvore[no] + 1
+            no = no + (no & -no)
+
+    def aplicar(self, operacao):
+        """Uma operação do diário (ver aplicar_operacoes)"""
+        if operacao["op"] == "delete":
+            chave = str(operacao["id"])
+            for registo in self.com_id(chave):
+                self.remover(registo)
+            self.primeiro.pop(chave, None)
+            if self.repetidos is not None:
+                self.repetidos.pop(chave, None)
+            return
+
+        registo = operacao["registo"]
+        existente = self.primeiro.get(str(registo.get('id')))
+        if operacao["op"] == "insert" or existente is None:
+            self.acrescentar(registo)
+        elif existente is not registo:
+            existente.clear()
+            existente.update(registo)
+
+
+def aplicar_operacoes(dados, operacoes, indices=None):
+    """Aplica operações do diário a `dados` e devolve os índices {lista: IndiceLista} usados.
+
+    Uma operação é {"op": "insert" | "upsert", "lista": ..., "registo": {...}} ou
+    {"op": "delete", "lista": ..., "id": ...}. O insert (adicionar) acrescenta o registo
+    ao fim da lista mesmo que o id já exista. O upsert (atualizar) substitui no mesmo lugar
+    o conteúdo do primeiro registo com o id, ou acrescenta-o se não houver nenhum; o delete
+    remove todos os registos com o id. Um diário só pode ser aplicado uma vez (ver
+    ler_segmento).
+    """
+    indices = {} if indices is None else indices
+    for operacao in operacoes:
+        lista = operacao["lista"]
+        indice = indices.get(lista)
+        if indice is None:
+            indice = IndiceLista(dados.setdefault(lista, []))
+            indices[lista] = indice
+        indice.aplicar(operacao)
+    return indices
+
+
+def indice_entrada(entrada, lista):
+    """IndiceLista de `lista` nos derivados de uma entrada do repositório, o único derivado que acompanha as operações"""
+    indice = entrada["derivados"].get("ids")
+    if indice is None or indice.registos is not entrada["dados"][lista]:
+        indice = IndiceLista(entrada["dados"][lista])
+    entrada["derivados"] = {"ids": indice}
+    return indice
+
+
+class RepositorioDados:
+    """Cache em memória de medicos.json e pacientes.json, revalidada por mtime e tamanho.
+
+    Cada ficheiro é lido uma vez; enquanto o mtime e o tamanho não mudarem, as leituras
+    devolvem o mesmo objeto, e um ficheiro alterado fora do programa volta a ser lido.
+    As escritas passam pela cache, que fica com o objeto gravado. O objeto devolvido é
+    partilhado: quem o alterar deve gravá-lo logo com salvar_dados ou registar.
+
+    salvar grava o snapshot inteiro; registar acrescenta uma operação (upsert/delete de
+    um registo) ao diário ao lado do snapshot (ver caminhos_diario), que é aplicado ao
+    carregar. Passado LIMITE_DIARIO, o diário é compactado num novo snapshot por uma
+    thread, sem parar quem está a editar.
+    """
+
+    def __init__(self):
+        self.entradas = {}
+        self.compactacoes = {}
+        self.trava = threading.RLock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.depois_de_fork)
+
+    def depois_de_fork(self):
+        # Os processos filhos (ProcessPoolExecutor) não herdam a thread de compactação nem a trava
+        self.compactacoes = {}
+        self.trava = threading.RLock()
+
+    @staticmethod
+    def assinatura(caminho):
+        """(mtime, tamanho) do snapshot, do segmento em compactação e do diário; erro se o snapshot não existir"""
+        diario, segmento = caminhos_diario(caminho)
+        partes = []
+        for ficheiro in (caminho, segmento, diario):
+            try:
+                estado = os.stat(ficheiro)
+                partes.append((estado.st_mtime_ns, estado.st_size))
+            except FileNotFoundError:
+                if ficheiro == caminho:
+                    raise
+                partes.append(None)
+        return tuple(partes)
+
+    def carregar(self, caminho):
+        """Dados do ficheiro com o diário aplicado (da cache se nada mudou), ou None se o ficheiro não existir"""
+        with self.trava:
+            try:
+                assinatura = self.assinatura(caminho)
+            except FileNotFoundError:
+                self.entradas.pop(caminho, None)
+                return None
+
+            entrada = self.entradas.get(caminho)
+            if entrada is not None and entrada["assinatura"] == assinatura:
+                return entrada["dados"]
+
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+                snapshot = os.fstat(f.fileno())
+            diario, segmento = caminhos_diario(caminho)
+            operacoes = ler_segmento(segmento, snapshot) + ler_diario(diario)
+            if operacoes and isinstance(dados, dict):
+                aplicar_operacoes(dados, operacoes)
+            self.entradas[caminho] = {"assinatura": assinatura, "dados": dados, "derivados": {}}
+            return dados
+
+    def salvar(self, caminho, dados):
+        """Grava o snapshot inteiro e descarta o diário, que fica incluído nele"""
+        self.esperar_compactacao(caminho)
+        with self.trava:
+            escrever_json_atomico(caminho, dados)
+            for ficheiro in caminhos_diario(caminho):
+                if os.path.exists(ficheiro):
+                    os.remove(ficheiro)
+            self.entradas[caminho] = {"assinatura": self.assinatura(caminho), "dados": dados, "derivados": {}}
+
+    def salvar_varios(self, conjuntos):
+        """salvar de cada {caminho: dados}, um ficheiro de cada vez"""
+        for caminho, dados in conjuntos.items():
+            self.salvar(caminho, dados)
+
+    @staticmethod
+    def existe(caminho):
+        return os.path.exists(caminho)
+
+    @staticmethod
+    def ids_com_nome(caminho, chave_norm):
+        """Sem índice persistente de nomes: quem chama usa o índice em memória (indice_nomes)"""
+        return None
+
+    def registar(self, caminho, lista, operacao):
+        """Aplica uma operação aos dados em cache e acrescenta-a ao diário (custo do registo, não do ficheiro)"""
+        operacao = dict(operacao, lista=lista)
+        dados = self.carregar(caminho)
+        if not isinstance(dados, dict) or not isinstance(dados.get(lista), list):
+            # Sem snapshot válido não há onde aplicar o diário: grava-se tudo
+            dados = dados if isinstance(dados, dict) else {}
+            if not isinstance(dados.get(lista), list):
+                dados[lista] = []
+            aplicar_operacoes(dados, [operacao])
+            self.salvar(caminho, dados)
+            return
+
+        with self.trava:
+            # O índice de ids acompanha a operação; os outros derivados refazem-se quando forem pedidos
+            entrada = self.entradas[caminho]
+            indice = indice_entrada(entrada, lista)
+
+            diario = caminhos_diario(caminho)[0]
+            reparar_diario(diario)
+            with open(diario, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(operacao, ensure_ascii=False) + '\n')
+
+            indice.aplicar(operacao)
+            entrada["assinatura"] = self.assinatura(caminho)
+
+            if os.path.getsize(diario) > LIMITE_DIARIO:
+                self.compactar(caminho)
+
+    def compactar(self, caminho):
+        """Passa o diário a segmento e junta-o ao snapshot numa thread; as novas operações vão para um diário novo"""
+        with self.trava:
+            compactacao = self.compactacoes.get(caminho)
+            if compactacao is not None and compactacao.is_alive():
+                return
+            diario, segmento = caminhos_diario(caminho)
+            # Um segmento que sobrou de uma compactação interrompida é compactado primeiro
+            previa = self.assinatura(caminho)
+            if not os.path.exists(segmento):
+                if not os.path.exists(diario):
+                    return
+                os.replace(diario, segmento)
+            antes = self.assinatura(caminho)
+            entrada = self.entradas.get(caminho)
+            if entrada is not None and entrada["assinatura"] == previa:
+                entrada["assinatura"] = antes
+            # Daemon: sair da aplicação (fechar a janela) não espera pela compactação. Uma
+            # compactação cortada a meio deixa o segmento, que se aplica na leitura seguinte
+            # (ou se salta, se a marca mostrar que o snapshot novo já ficou no lugar)
+            compactacao = threading.Thread(target=self.compactar_segmento, args=(caminho, antes), daemon=True)
+            self.compactacoes[caminho] = compactacao
+            compactacao.start()
+
+    def compactar_segmento(self, caminho, antes):
+        """Corpo da thread de compactar: snapshot + segmento lidos do disco, sem tocar nos dados em memória"""
+        segmento = caminhos_diario(caminho)[1]
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+            snapshot = os.fstat(f.fileno())
+        operacoes = ler_segmento(segmento, snapshot)
+        if not operacoes:
+            # Sobrou de uma compactação interrompida depois de o snapshot novo estar no lugar
+            with self.trava:
+                if self.assinatura(caminho)[:2] == antes[:2]:
+                    os.remove(segmento)
+            return
+        aplicar_operacoes(dados, operacoes)
+        temporario = caminho + '.compactar.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+            novo = os.fstat(f.fileno())
+
+        with self.trava:
+            agora = self.assinatura(caminho)
+            if agora[:2] != antes[:2]:
+                # Snapshot ou segmento mudaram por fora entretanto: fica tudo como está
+                os.remove(temporario)
+                return
+            # A marca diz a quem ler o segmento antes de ele ser apagado (ou depois de uma
+            # interrupção aqui) que o snapshot com este inode e tamanho já o inclui
+            reparar_diario(segmento)
+            with open(segmento, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"op": "compactado", "inode": novo.st_ino, "tamanho": novo.st_size}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, caminho)
+            os.remove(segmento)
+            # Os dados em memória já tinham o segmento aplicado: só a assinatura muda
+            entrada = self.entradas.get(caminho)
+            if entrada is not None and entrada["assinatura"][:2] == antes[:2]:
+                entrada["assinatura"] = self.assinatura(caminho)
+
+    def esperar_compactacao(self, caminho=None):
+        compactacoes = [self.compactacoes.get(caminho)] if caminho is not None else list(self.compactacoes.values())
+        for compactacao in compactacoes:
+            if compactacao is not None:
+                compactacao.join()
+
+    def derivado(self, caminho, nome, construir):
+        """Estrutura calculada dos dados em cache (índices), guardada até o ficheiro mudar ou ser gravado"""
+        entrada = self.entradas.get(caminho)
+        if entrada is None:
+            return construir()
+        if nome not in entrada["derivados"]:
+            entrada["derivados"][nome] = construir()
+        return entrada["derivados"][nome]
+
+    def invalidar(self, caminho=None):
+        if caminho is None:
+            self.entradas.clear()
+        else:
+            self.entradas.pop(caminho, None)
+
+
+def escrever_json_atomico(caminho, dados):
+    """Escreve num ficheiro temporário e substitui o original, para nunca deixar um JSON a meio"""
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=4)
+    os.replace(temporario, caminho)
+
+
+# ============================================================================
+# REPOSITÓRIO SQLITE (alternativa aos ficheiros JSON)
+# ============================================================================
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS conjuntos (
+    nome TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS medicos (
+    ordem INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    nome TEXT,
+    nome_normalizado TEXT,
+    ocupado INTEGER,
+    especialidade TEXT,
+    total_tempo_ocupado REAL,
+    inicio_ultima_consulta REAL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS mapeamento_doencas (
+    doenca TEXT PRIMARY KEY,
+    especialidade TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pacientes (
+    ordem INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    nome TEXT,
+    nome_normalizado TEXT,
+    idade INTEGER,
+    sexo TEXT,
+    doenca TEXT,
+    prioridade TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS atributos (
+    paciente INTEGER PRIMARY KEY REFERENCES pacientes(ordem) ON DELETE CASCADE,
+    fumador INTEGER,
+    consome_alcool INTEGER,
+    atividade_fisica TEXT,
+    cronico INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS medicos_id ON medicos(id);
+CREATE INDEX IF NOT EXISTS medicos_nome ON medicos(nome_normalizado);
+CREATE INDEX IF NOT EXISTS pacientes_id ON pacientes(id);
+CREATE INDEX IF NOT EXISTS pacientes_nome ON pacientes(nome_normalizado);
+CREATE INDEX IF NOT EXISTS pacientes_doenca ON pacientes(doenca);
+CREATE INDEX IF NOT EXISTS pacientes_prioridade ON pacientes(prioridade);
+"""
+
+# Campos com coluna própria e o tipo guardado nela, pela ordem das colunas. Um campo
+# de outro tipo (None incluído) ou sem coluna vai para o JSON da coluna `extra`, para
+# que o registo volte exatamente como foi gravado.
+CAMPOS_MEDICO = {
+    "id": str, "nome": str, "ocupado": bool, "especialidade": str,
+    "total_tempo_ocupado": float, "inicio_ultima_consulta": float
+}
+CAMPOS_PACIENTE = {"id": str, "nome": str, "idade": int, "sexo": str, "doenca": str, "prioridade": str}
+CAMPOS_ATRIBUTOS = {"fumador": bool, "consome_alcool": bool, "atividade_fisica": str, "cronico": bool}
+
+
+def separar_campos(registo, campos):
+    """(valores das colunas de `campos`, JSON dos restantes campos ou None)"""
+    valores = dict.fromkeys(campos)
+    extra = {}
+    for campo, valor in registo.items():
+        if campos.get(campo) is type(valor):
+            valores[campo] = valor
+        else:
+            extra[campo] = valor
+    return list(valores.values()), json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def juntar_campos(campos, valores, extra):
+    """Inverso de separar_campos"""
+    registo = {campo: tipo(valor) for (campo, tipo), valor in zip(campos.items(), valores) if valor is not None}
+    if extra is not None:
+        registo.update(json.loads(extra))
+    return registo
+
+
+def linha_registo(nome, registo):
+    """(linha da tabela `nome` sem a ordem, linha de atributos ou None) de um médico ou paciente"""
+    atributos = registo.get('atributos') if nome == 'pacientes' else None
+    if isinstance(atributos, dict):
+        registo = {campo: valor for campo, valor in registo.items() if campo != 'atributos'}
+    valores, extra = separar_campos(registo, CAMPOS_MEDICO if nome == 'medicos' else CAMPOS_PACIENTE)
+    # A coluna id é sempre o texto do id (a chave dos índices); um id de outro tipo fica também no extra
+    valores[0] = str(registo.get('id'))
+    linha = [valores[0], valores[1], normalizar_nome(valores[1])] + valores[2:] + [extra]
+    if not isinstance(atributos, dict):
+        return linha, None
+    return linha, separar_campos(atributos, CAMPOS_ATRIBUTOS)
+
+
+class RepositorioSQLite:
+    """Os dados de RepositorioDados guardados numa base SQLite (modo WAL) em vez dos ficheiros JSON.
+
+    Cada ficheiro (medicos.json, pacientes.json) é um conjunto da tabela `conjuntos`, com
+    os registos nas tabelas medicos/mapeamento_doencas ou pacientes/atributos. carregar
+    devolve o dicionário no formato do ficheiro JSON e guarda-o em memória até a versão
+    do conjunto mudar (cada escrita, deste ou de outro processo, sobe-a). salvar substitui
+    o conjunto numa transação; registar escreve só o registo alterado.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.conexao = None
+        self.herdadas = []
+        self.entradas = {}
+        self.trava = threading.RLock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.depois_de_fork)
+
+    def depois_de_fork(self):
+        # A ligação do pai não pode ser usada nem fechada no filho (fechá-la podia apagar o WAL):
+        # fica guardada e o filho abre a sua
+        if self.conexao is not None:
+            self.herdadas.append(self.conexao)
+        self.conexao = None
+        self.trava = threading.RLock()
+
+    def ligar(self):
+        if self.conexao is None:
+            conexao = sqlite3.connect(self.caminho, isolation_level=None, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute('PRAGMA foreign_keys=ON')
+            conexao.executescript(ESQUEMA_SQLITE)
+            self.conexao = conexao
+        return self.conexao
+
+    @contextmanager
+    def transacao(self, modo='IMMEDIATE'):
+        conexao = self.ligar()
+        conexao.execute(f'BEGIN {modo}')
+        try:
+            yield conexao
+        except BaseException:
+            conexao.execute('ROLLBACK')
+            raise
+        conexao.execute('COMMIT')
+
+    @staticmethod
+    def conjunto(caminho):
+        nome = os.path.splitext(os.path.basename(caminho))[0]
+        if nome not in ('medicos', 'pacientes'):
+            raise ValueError(f"Sem tabelas para {caminho}")
+        return nome
+
+    @staticmethod
+    def versao(conexao, nome):
+        linha = conexao.execute('SELECT versao FROM conjuntos WHERE nome = ?', (nome,)).fetchone()
+        return None if linha is None else linha[0]
+
+    def assinatura(self, caminho):
+        """(base de dados, versão do conjunto); FileNotFoundError se o conjunto ainda não foi gravado"""
+        with self.trava:
+            versao = self.versao(self.ligar(), self.conjunto(caminho))
+        if versao is None:
+            raise FileNotFoundError(caminho)
+        return self.caminho, versao
+
+    def existe(self, caminho):
+        with self.trava:
+            return self.versao(self.ligar(), self.conjunto(caminho)) is not None
+
+    def carregar(self, caminho):
+        """Dados do conjunto no formato do ficheiro JSON (da cache se a versão não mudou), ou None se não existir"""
+        nome = self.conjunto(caminho)
+        with self.trava, self.transacao('DEFERRED') as conexao:
+            versao = self.versao(conexao, nome)
+            if versao is None:
+                self.entradas.pop(caminho, None)
+                return None
+
+            entrada = self.entradas.get(caminho)
+            if entrada is not None and entrada["versao"] == versao:
+                return entrada["dados"]
+
+            dados = self.ler_conjunto(conexao, nome)
+            self.entradas[caminho] = {"versao": versao, "dados": dados, "derivados": {}}
+            return dados
+
+    @staticmethod
+    def ler_conjunto(conexao, nome):
+        dados = {}
+        if nome == 'medicos':
+            dados['medicos'] = [
+                juntar_campos(CAMPOS_MEDICO, (linha[1], linha[2]) + linha[4:8], linha[8])
+                for linha in conexao.execute('SELECT * FROM medicos ORDER BY ordem')
+            ]
+            mapeamento = conexao.execute('SELECT doenca, especialidade FROM mapeamento_doencas ORDER BY rowid').fetchall()
+            if mapeamento:
+                dados['mapeamento_doencas'] = dict(mapeamento)
+        else:
+            pacientes = []
+            for linha in conexao.execute(
+                'SELECT * FROM pacientes LEFT JOIN atributos ON atributos.paciente = pacientes.ordem '
+                'ORDER BY pacientes.ordem'
+            ):
+                paciente = juntar_campos(CAMPOS_PACIENTE, (linha[1], linha[2]) + linha[4:8], linha[8])
+                if linha[9] is not None:
+                    paciente['atributos'] = juntar_campos(CAMPOS_ATRIBUTOS, linha[10:14], linha[14])
+                pacientes.append(paciente)
+            dados['pacientes'] = pacientes
+
+        extra = conexao.execute('SELECT extra FROM conjuntos WHERE nome = ?', (nome,)).fetchone()[0]
+        if extra is not None:
+            dados.update(json.loads(extra))
+        return dados
+
+    @staticmethod
+    def escrever_conjunto(conexao, nome, dados):
+        """Substitui as linhas do conjunto pelas de `dados` (dentro de uma transação)"""
+        if not isinstance(dados, dict):
+            raise ValueError(f"Os dados de {nome} têm de ser um objeto JSON")
+        extra = dict(dados)
+        registos = extra.pop(nome, None)
+        if not isinstance(registos, list) or not all(isinstance(registo, dict) for registo in registos):
+            if registos is not None:
+                extra[nome] = registos
+            registos = []
+
+        if nome == 'medicos':
+            conexao.execute('DELETE FROM medicos')
+            conexao.execute('DELETE FROM mapeamento_doencas')
+            mapeamento = extra.get('mapeamento_doencas')
+            if isinstance(mapeamento, dict) and mapeamento and all(isinstance(v, str) for v in mapeamento.values()):
+                del extra['mapeamento_doencas']
+                conexao.executemany('INSERT INTO mapeamento_doencas VALUES (?, ?)', mapeamento.items())
+            conexao.executemany(
+                'INSERT INTO medicos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ([ordem] + linha_registo(nome, registo)[0] for ordem, registo in enumerate(registos, 1))
+            )
+        else:
+            conexao.execute('DELETE FROM atributos')
+            conexao.execute('DELETE FROM pacientes')
+            linhas = []
+            atributos = []
+            for ordem, registo in enumerate(registos, 1):
+                linha, linha_atributos = linha_registo(nome, registo)
+                linhas.append([ordem] + linha)
+                if linha_atributos is not None:
+                    atributos.append([ordem] + linha_atributos[0] + [linha_atributos[1]])
+            conexao.executemany('INSERT INTO pacientes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', linhas)
+            conexao.executemany('INSERT INTO atributos VALUES (?, ?, ?, ?, ?, ?)', atributos)
+
+        conexao.execute(
+            'INSERT INTO conjuntos VALUES (?, 1, ?) '
+            'ON CONFLICT(nome) DO UPDATE SET versao = versao + 1, extra = excluded.extra',
+            (nome, json.dumps(extra, ensure_ascii=False) if extra else None)
+        )
+
+    def salvar(self, caminho, dados):
+        """Substitui o conjunto inteiro numa transação"""
+        self.salvar_varios({caminho: dados})
+
+    def salvar_varios(self, conjuntos):
+        """salvar de cada {caminho: dados}, todos na mesma transação (ou nenhum, se algum falhar)"""
+        with self.trava:
+            with self.transacao() as conexao:
+                versoes = {}
+                for caminho, dados in conjuntos.items():
+                    nome = self.conjunto(caminho)
+                    self.escrever_conjunto(conexao, nome, dados)
+                    versoes[caminho] = self.versao(conexao, nome)
+            for caminho, dados in conjuntos.items():
+                self.entradas[caminho] = {"versao": versoes[caminho], "dados": dados, "derivados": {}}
+
+    def registar(self, caminho, lista, operacao):
+        """Aplica uma operação (ver aplicar_operacoes) às linhas do registo e aos dados em cache"""
+        operacao = dict(operacao, lista=lista)
+        nome = self.conjunto(caminho)
+        with self.trava:
+            dados = self.carregar(caminho)
+            if lista != nome or not isinstance(dados, dict) or not isinstance(dados.get(lista), list):
+                # A lista não tem tabela (ou o conjunto não existe): grava-se o conjunto todo
+                dados = dados if isinstance(dados, dict) else {}
+                if not isinstance(dados.get(lista), list):
+                    dados[lista] = []
+                aplicar_operacoes(dados, [operacao])
+                self.salvar(caminho, dados)
+                return
+
+            with self.transacao() as conexao:
+                versao = self.versao(conexao, nome)
+                self.escrever_operacao(conexao, nome, operacao)
+                conexao.execute('UPDATE conjuntos SET versao = versao + 1 WHERE nome = ?', (nome,))
+
+            # Se outro processo escreveu entretanto a cache já não serve; senão o índice de ids acompanha a operação
+            entrada = self.entradas.get(caminho)
+            if entrada is None or entrada["versao"] != versao:
+                self.entradas.pop(caminho, None)
+                return
+            indice_entrada(entrada, lista).aplicar(operacao)
+            entrada["versao"] = versao + 1
+
+    @staticmethod
+    def escrever_operacao(conexao, nome, operacao):
+        """Mesma semântica de aplicar_operacoes: o insert acrescenta uma linha, o upsert altera a primeira
+        linha com o id (ou acrescenta-a) e o delete remove todas"""
+        if operacao["op"] == "delete":
+            chave = str(operacao["id"])
+            if nome == 'pacientes':
+                conexao.execute('DELETE FROM atributos WHERE paciente IN (SELECT ordem FROM pacientes WHERE id = ?)',
+                                (chave,))
+            conexao.execute(f'DELETE FROM {nome} WHERE id = ?', (chave,))
+            return
+
+        linha, atributos = linha_registo(nome, operacao["registo"])
+        existente = None
+        if operacao["op"] == "upsert":
+            existente = conexao.execute(f'SELECT ordem FROM {nome} WHERE id = ? ORDER BY ordem LIMIT 1',
+                                        (linha[0],)).fetchone()
+        ordem = None if existente is None else existente[0]
+        if nome == 'pacientes' and ordem is not None:
+            conexao.execute('DELETE FROM atributos WHERE paciente = ?', (ordem,))
+        colunas = ', '.join('?' * (len(linha) + 1))
+        ordem = conexao.execute(f'INSERT OR REPLACE INTO {nome} VALUES ({colunas})', [ordem] + linha).lastrowid
+        if atributos is not None:
+            conexao.execute('INSERT INTO atributos VALUES (?, ?, ?, ?, ?, ?)', [ordem] + atributos[0] + [atributos[1]])
+
+    def ids_com_nome(self, caminho, chave_norm):
+        """[(id, ocorrência)] dos registos cujo nome normalizado contém `chave_norm`, pela ordem da lista;
+        a ocorrência conta os registos anteriores com o mesmo id (ids repetidos continuam distintos)"""
+        nome = self.conjunto(caminho)
+        with self.trava:
+            linhas = self.ligar().execute(
+                f'SELECT id, (SELECT COUNT(*) FROM {nome} AS antes WHERE antes.id = r.id AND antes.ordem < r.ordem) '
+                f'FROM {nome} AS r WHERE instr(nome_normalizado, ?) > 0 ORDER BY ordem', (chave_norm,)
+            )
+            return [tuple(linha) for linha in linhas]
+
+    def derivado(self, caminho, nome, construir):
+        """Estrutura calculada dos dados em cache (índices), guardada até o conjunto mudar ou ser gravado"""
+        entrada = self.entradas.get(caminho)
+        if entrada is None:
+            return construir()
+        if nome not in entrada["derivados"]:
+            entrada["derivados"][nome] = construir()
+        return entrada["derivados"][nome]
+
+    def invalidar(self, caminho=None):
+        if caminho is None:
+            self.entradas.clear()
+        else:
+            self.entradas.pop(caminho, None)
+
+
+def criar_repositorio(armazenamento):
+    if armazenamento == 'json':
+        return RepositorioDados()
+    if armazenamento == 'sqlite':
+        return RepositorioSQLite(CAMINHO_BASE_DADOS)
+    raise ValueError(f"Armazenamento desconhecido: {armazenamento} (use 'json' ou 'sqlite')")
+
+
+def usar_armazenamento(armazenamento):
+    """Passa as funções de dados e os carregamentos da simulação para 'json' ou 'sqlite' (em CAMINHO_BASE_DADOS)"""
+    global repositorio, ARMAZENAMENTO
+    repositorio = criar_repositorio(armazenamento)
+    ARMAZENAMENTO = armazenamento
+
+
+repositorio = criar_repositorio(ARMAZENAMENTO)
+
+
+def indice_lista(arquivo, registos):
+    """IndiceLista de `registos`, guardado no repositório até o ficheiro mudar"""
+    return repositorio.derivado(caminho_dados(arquivo), 'ids', lambda: IndiceLista(registos))
+
+
+def indice_ids(arquivo, registos):
+    """{id: registo} de `registos` (primeira ocorrência de cada id), guardado no repositório até o ficheiro mudar"""
+    return indice_lista(arquivo, registos).primeiro
+
+
+def indice_nomes(arquivo, registos, normalizar, nome):
+    """[(nome normalizado, registo)] de `registos`, guardado no repositório até o ficheiro mudar"""
+    return repositorio.derivado(
+        caminho_dados(arquivo), nome, lambda: [(normalizar(registo.get('nome', '')), registo) for registo in registos]
+    )
+
+
+def pacientes_com_nome(arquivo, pacientes, chave_norm):
+    """Pacientes cujo nome normalizado contém `chave_norm`, pela ordem da lista (índice do SQLite ou em memória)"""
+    ids = repositorio.ids_com_nome(caminho_dados(arquivo), chave_norm)
+    if ids is None:
+        nomes = indice_nomes(arquivo, pacientes, normalizar_nome, 'nomes')
+        return [paciente for nome_norm, paciente in nomes if chave_norm in nome_norm]
+    indice = indice_lista(arquivo, pacientes)
+    return [indice.com_id(i)[ocorrencia] for i, ocorrencia in ids if ocorrencia < len(indice.com_id(i))]
+
+
+def normalizar_nome(s):
+    if not isinstance(s, str):
+        return ''
+
+    s = s.lower()
+    s = unicodedata.normalize('NFKD', s)
+    s = ''.join(c for c in s if not unicodedata.combining(c))
+    s = re.sub(r'[^a-z\s]', '', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    return s
 
 
 
@@ -40,30 +854,39 @@ CAMINHO_FLAG_IMPORTACAO = os.path.join(DIRETORIO_BASE, '.dados_importados')
 
 
 
-def carregar_dados(arquivo):
+def caminho_dados(arquivo):
     
     if 'medicos' in arquivo:
-        caminho = CAMINHO_MEDICOS
-    else:
-        caminho = CAMINHO_PACIENTES
-    
-    if os.path.exists(caminho):
-        with open(caminho, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    else:
+        return CAMINHO_MEDICOS
+    return CAMINHO_PACIENTES
+
+
+def carregar_dados(arquivo):
+    """Dados partilhados com a cache do repositório: só para leitura. Quem altera um registo
+    trabalha numa cópia e grava-a com adicionar_*/atualizar_*/remover_*_dados (ou salvar_dados)"""
+    dados = repositorio.carregar(caminho_dados(arquivo))
+    if dados is None:
         return {"medicos": []} if "medicos" in arquivo else {"pacientes": []}
+    return dados
 
 
 def salvar_dados(arquivo, dados):
     
-    if 'medicos' in arquivo:
-        caminho = CAMINHO_MEDICOS
-    else:
-        caminho = CAMINHO_PACIENTES
-    
-    
-    with open(caminho, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=4)
+    repositorio.salvar(caminho_dados(arquivo), dados)
+
+
+def ler_ficheiro_json(caminho):
+    """Conteúdo de um ficheiro JSON escolhido pelo utilizador, ou None se não o conseguir ler"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def gravar_dados_importados(dados_medicos, dados_pacientes):
+    """Grava médicos e pacientes de uma vez (no SQLite, numa só transação)"""
+    repositorio.salvar_varios({CAMINHO_MEDICOS: dados_medicos, CAMINHO_PACIENTES: dados_pacientes})
     
 
 def criar_medico(id_medico, nome, especialidade, disponivel):
@@ -117,25 +940,28 @@ def atualizar_paciente(paciente, nome, idade, sexo, doenca, prioridade, fumador,
     paciente['atributos']['cronico'] = cronico
     return paciente
 
+def registar_dados(arquivo, lista, operacao):
+    
+    repositorio.registar(caminho_dados(arquivo), lista, operacao)
+
+
 def adicionar_medico_dados(novo_medico, arquivo='medicos.json'):
    
-    dados = carregar_dados(arquivo)
-    if not isinstance(dados, dict):
-        dados = {'medicos': []}
-    if 'medicos' not in dados or not isinstance(dados['medicos'], list):
-        dados['medicos'] = []
-    dados['medicos'].append(novo_medico)
-    salvar_dados(arquivo, dados)
+    registar_dados(arquivo, 'medicos', {'op': 'insert', 'registo': novo_medico})
 
 def adicionar_paciente_dados(novo_paciente, arquivo='pacientes.json'):
   
-    dados = carregar_dados(arquivo)
-    if not isinstance(dados, dict):
-        dados = {'pacientes': []}
-    if 'pacientes' not in dados or not isinstance(dados['pacientes'], list):
-        dados['pacientes'] = []
-    dados['pacientes'].append(novo_paciente)
-    salvar_dados(arquivo, dados)
+    registar_dados(arquivo, 'pacientes', {'op': 'insert', 'registo': novo_paciente})
+
+
+def atualizar_medico_dados(medico, arquivo='medicos.json'):
+    
+    registar_dados(arquivo, 'medicos', {'op': 'upsert', 'registo': medico})
+
+
+def atualizar_paciente_dados(paciente, arquivo='pacientes.json'):
+    
+    registar_dados(arquivo, 'pacientes', {'op': 'upsert', 'registo': paciente})
 
 
 
@@ -144,16 +970,15 @@ def procurar_medico_dados(chave):
     medicos = dados.get('medicos', [])
 
     chave = chave.lower()
-    encontrados = []
 
-    for medico in medicos:
-        if str(medico.get('id')) == chave:
-            return medico, dados
+    por_id = indice_ids('medicos.json', medicos)
+    if chave in por_id:
+        return por_id[chave], dados
 
-        nome = medico.get('nome', '').lower().replace('dr.', '').replace('dra.', '')
-
-        if chave in nome:
-            encontrados.append(medico)
+    nomes = indice_nomes(
+        'medicos.json', medicos, lambda s: s.lower().replace('dr.', '').replace('dra.', ''), 'nomes_procurar_medico'
+    )
+    encontrados = [medico for nome, medico in nomes if chave in nome]
 
     if len(encontrados) == 1:
         return encontrados[0], dados
@@ -175,31 +1000,17 @@ def procurar_paciente_dados(chave, arquivo='pacientes.json'):
     if not isinstance(pacientes, list):
         pacientes = []
 
-    def normalizar(s):
-        if not isinstance(s, str):
-            return ''
-
-        s = s.lower()
-        s = unicodedata.normalize('NFKD', s)
-        s = ''.join(c for c in s if not unicodedata.combining(c))
-        s = re.sub(r'[^a-z\s]', '', s)
-        s = re.sub(r'\s+', ' ', s).strip()
-        return s
-
     chave_str = str(chave).strip()
-    chave_norm = normalizar(chave)
+    chave_norm = normalizar_nome(chave)
 
-    encontrados = []
+    # Ids e nomes normalizados ficam indexados no repositório até o ficheiro mudar
+    por_id = indice_ids(arquivo, pacientes)
+    if chave_str in por_id:
+        return por_id[chave_str], dados
 
-    for paciente in pacientes:
-        
-        if str(paciente.get('id')) == chave_str:
-            return paciente, dados
-
-        
-        nome_norm = normalizar(paciente.get('nome', ''))
-        if chave_norm and chave_norm in nome_norm:
-            encontrados.append(paciente)
+    encontrados = []
+    if chave_norm:
+        encontrados = pacientes_com_nome(arquivo, pacientes, chave_norm)
 
     if len(encontrados) == 1:
         return encontrados[0], dados
@@ -234,19 +1045,16 @@ def remover_medico_dados(chave, arquivo='medicos.json'):
     chave_str = str(chave).strip()
     chave_norm = normalizar(chave)
 
-    encontrados = []
-
-    for medico in medicos:
-        
-        if str(medico.get('id')) == chave_str:
-            dados['medicos'] = [m for m in medicos if m.get('id') != medico.get('id')]
-            salvar_dados(arquivo, dados)
-            return True
+    por_id = indice_ids(arquivo, medicos)
+    if chave_str in por_id:
+        medico = por_id[chave_str]
+        registar_dados(arquivo, 'medicos', {'op': 'delete', 'id': medico.get('id')})
+        return True
 
-        
-        nome_norm = normalizar(medico.get('nome', ''))
-        if chave_norm and chave_norm in nome_norm:
-            encontrados.append(medico)
+    encontrados = []
+    if chave_norm:
+        nomes = indice_nomes(arquivo, medicos, normalizar, 'nomes_remover_medico')
+        encontrados = [medico for nome_norm, medico in nomes if chave_norm in nome_norm]
 
    
     if len(encontrados) > 1:
@@ -255,8 +1063,7 @@ def remover_medico_dados(chave, arquivo='medicos.json'):
     
     if len(encontrados) == 1:
         medico = encontrados[0]
-        dados['medicos'] = [m for m in medicos if m.get('id') != medico.get('id')]
-        salvar_dados(arquivo, dados)
+        registar_dados(arquivo, 'medicos', {'op': 'delete', 'id': medico.get('id')})
         return True
 
     return False
@@ -269,33 +1076,18 @@ def remover_paciente_dados(chave, arquivo='pacientes.json'):
     if not isinstance(pacientes, list):
         pacientes = []
 
-    def normalizar(s):
-        if not isinstance(s, str):
-            return ''
-
-        s = s.lower()
-        s = unicodedata.normalize('NFKD', s)
-        s = ''.join(c for c in s if not unicodedata.combining(c))
-        s = re.sub(r'[^a-z\s]', '', s)
-        s = re.sub(r'\s+', ' ', s).strip()
-        return s
-
     chave_str = str(chave).strip()
-    chave_norm = normalizar(chave)
+    chave_norm = normalizar_nome(chave)
 
-    encontrados = []
-
-    for paciente in pacientes:
-        
-        if str(paciente.get('id')) == chave_str:
-            dados['pacientes'] = [p for p in pacientes if p.get('id') != paciente.get('id')]
-            salvar_dados(arquivo, dados)
-            return True
+    por_id = indice_ids(arquivo, pacientes)
+    if chave_str in por_id:
+        paciente = por_id[chave_str]
+        registar_dados(arquivo, 'pacientes', {'op': 'delete', 'id': paciente.get('id')})
+        return True
 
-        
-        nome_norm = normalizar(paciente.get('nome', ''))
-        if chave_norm and chave_norm in nome_norm:
-            encontrados.append(paciente)
+    encontrados = []
+    if chave_norm:
+        encontrados = pacientes_com_nome(arquivo, pacientes, chave_norm)
 
    
     if len(encontrados) > 1:
@@ -304,8 +1096,7 @@ def remover_paciente_dados(chave, arquivo='pacientes.json'):
     
     if len(encontrados) == 1:
         paciente = encontrados[0]
-        dados['pacientes'] = [p for p in pacientes if p.get('id') != paciente.get('id')]
-        salvar_dados(arquivo, dados)
+        registar_dados(arquivo, 'pacientes', {'op': 'delete', 'id': paciente.get('id')})
         return True
 
     return False
@@ -405,7 +1196,7 @@ def verificar_dados_importados():
         return False, False
     
     
-    if not os.path.exists(CAMINHO_MEDICOS) or not os.path.exists(CAMINHO_PACIENTES):
+    if not repositorio.existe(CAMINHO_MEDICOS) or not repositorio.existe(CAMINHO_PACIENTES):
         return False, False
     
     
@@ -433,12 +1224,185 @@ def verificar_dados_importados():
 # FUNÇÕES SIMULAÇÃO
 # ============================================================================
 
+PRIORIDADES_FILA = {"URGENTE": 1, "ALTA": 2, "NORMAL": 3, "BAIXA": 4}
+
+REMOVIDO = None
+
+
+def limpar_topo_heap(heap):
+    while heap and heap[0][3] is REMOVIDO:
+        heapq.heappop(heap)
+
+
+class FilaPrioridade:
+    """Fila de espera em heap, ordenada por (prioridade, tempo_chegada, ordem de entrada).
+
+    Cada entrada também fica num sub-heap por (especialidade_necessaria, prioridade),
+    partilhando a mesma lista, pelo que uma remoção marca a entrada em todos os heaps.
+    """
+
+    def __init__(self, prioridades=None):
+        self.prioridades = prioridades if prioridades is not None else PRIORIDADES_FILA
+        self.heap = []
+        self.entradas = {}
+        self.contador = 0
+        self.ordenada = None
+        self.por_especialidade = {}
+        self.contagem_prioridade = {}
+        self.contagem_especialidade = {}
+        self.soma_tempos_chegada = 0.0
+
+    def inserir(self, paciente):
+        if paciente["id"] in self.entradas:
+            self.remover(paciente["id"])
+        self.contador = self.contador + 1
+        nivel = self.prioridades.get(paciente.get("prioridade", "NORMAL"), 3)
+        entrada = [
+            nivel,
+            paciente.get("tempo_chegada", 0),
+            self.contador,
+            paciente
+        ]
+        self.entradas[paciente["id"]] = entrada
+        heapq.heappush(self.heap, entrada)
+        especialidade = paciente.get("especialidade_necessaria", "Clínica Geral")
+        sub_filas = self.por_especialidade.setdefault(especialidade, {})
+        heapq.heappush(sub_filas.setdefault(nivel, []), entrada)
+        self.contagem_prioridade[nivel] = self.contagem_prioridade.get(nivel, 0) + 1
+        self.contagem_especialidade[especialidade] = self.contagem_especialidade.get(especialidade, 0) + 1
+        self.soma_tempos_chegada = self.soma_tempos_chegada + entrada[1]
+        self.ordenada = None
+
+    def limpar_topo(self):
+        limpar_topo_heap(self.heap)
+
+    def retirar_indices(self, entrada):
+        nivel = entrada[0]
+        self.contagem_prioridade[nivel] = self.contagem_prioridade[nivel] - 1
+        especialidade = entrada[3].get("especialidade_necessaria", "Clínica Geral")
+        self.contagem_especialidade[especialidade] = self.contagem_especialidade[especialidade] - 1
+        if not self.entradas:
+            self.soma_tempos_chegada = 0.0
+        else:
+            self.soma_tempos_chegada = self.soma_tempos_chegada - entrada[1]
+
+    def espreitar(self):
+        self.limpar_topo()
+        if not self.heap:
+            return None
+        return self.heap[0][3]
+
+    def remover_primeiro(self):
+        self.limpar_topo()
+        if not self.heap:
+            return None
+        entrada = heapq.heappop(self.heap)
+        paciente = entrada[3]
+        del self.entradas[paciente["id"]]
+        self.retirar_indices(entrada)
+        entrada[3] = REMOVIDO
+        self.ordenada = None
+        return paciente
+
+    def remover(self, paciente_id):
+        """Remoção por id: a entrada fica marcada e sai do heap quando chegar ao topo"""
+        entrada = self.entradas.pop(paciente_id, None)
+        if entrada is None:
+            return None
+        paciente = entrada[3]
+        self.retirar_indices(entrada)
+        entrada[3] = REMOVIDO
+        self.ordenada = None
+        if len(self.heap) > 2 * len(self.entradas) + 32:
+            self.compactar()
+        else:
+            self.limpar_topo()
+        return paciente
+
+    def compactar(self):
+        self.heap = [e for e in self.heap if e[3] is not REMOVIDO]
+        heapq.heapify(self.heap)
+        for sub_filas in self.por_especialidade.values():
+            for nivel in sub_filas:
+                sub_filas[nivel] = [e for e in sub_filas[nivel] if e[3] is not REMOVIDO]
+                heapq.heapify(sub_filas[nivel])
+
+    def contar_prioridade(self, nivel):
+        return self.contagem_prioridade.get(nivel, 0)
+
+    def especialidades(self):
+        return self.por_especialidade.keys()
+
+    def contar_por_especialidade(self):
+        """Pacientes em espera por especialidade_necessaria (só as que têm alguém)"""
+        return {esp: n for esp, n in self.contagem_especialidade.items() if n > 0}
+
+    def tempo_medio_espera(self, tempo_atual):
+        """Espera média de quem está na fila, a partir da soma dos tempos de chegada"""
+        if not self.entradas:
+            return 0
+        return max(0.0, tempo_atual - self.soma_tempos_chegada / len(self.entradas))
+
+    def primeiro_da_especialidade(self, especialidade, nivel=None):
+        """Entrada mais à frente na fila para a especialidade (opcionalmente só de um nível)"""
+        sub_filas = self.por_especialidade.get(especialidade)
+        if not sub_filas:
+            return None
+        melhor = None
+        for n, heap in sub_filas.items():
+            if nivel is None or n == nivel:
+                limpar_topo_heap(heap)
+                if heap and (melhor is None or heap[0] < melhor):
+                    melhor = heap[0]
+        return melhor
+
+    def primeiro_com_prioridade(self, nivel, excluir_especialidade=None):
+        """Entrada mais à frente com este nível de prioridade fora de uma especialidade"""
+        if self.contar_prioridade(nivel) == 0:
+            return None
+        melhor = None
+        for especialidade in self.por_especialidade:
+            if especialidade != excluir_especialidade:
+                entrada = self.primeiro_da_especialidade(especialidade, nivel)
+                if entrada is not None and (melhor is None or entrada < melhor):
+                    melhor = entrada
+        return melhor
+
+    def em_ordem(self):
+        if self.ordenada is None:
+            self.ordenada = [e[3] for e in sorted(self.entradas.values())]
+        return self.ordenada
+
+    def copy(self):
+        copia = FilaPrioridade(self.prioridades)
+        for paciente in self.em_ordem():
+            copia.inserir(paciente)
+        return copia
+
+    def __contains__(self, paciente_id):
+        return paciente_id in self.entradas
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def __iter__(self):
+        return iter(self.em_ordem())
+
+    def __getitem__(self, indice):
+        return self.em_ordem()[indice]
+
+
 def enqueue(q, item):
     
+    if isinstance(q, FilaPrioridade):
+        q.inserir(item)
+        return q
     return q + [item]
 
 def dequeue(q):
     
+    if isinstance(q, FilaPrioridade):
+        return q.remover_primeiro(), q
     if not q:
         return None, []
     return q[0], q[1:]
@@ -451,6 +1415,8 @@ def queue_peek(q):
     
     if queue_empty(q):
         return None
+    if isinstance(q, FilaPrioridade):
+        return q.espreitar()
     return q[0]
 
 
@@ -483,10 +1449,10 @@ def tamanho_fila(fila):
 
 def carregar_mapeamento_doencas():
     
-    if os.path.exists(CAMINHO_MEDICOS):
+    if repositorio.existe(CAMINHO_MEDICOS):
         try:
-            with open(CAMINHO_MEDICOS, "r", encoding="utf-8") as f:
-                dados = json.load(f)
+            dados = repositorio.carregar(CAMINHO_MEDICOS)
+            if dados is not None:
                 
                 mapeamento = dados.get("mapeamento_doencas", {})
                 
@@ -515,12 +1481,12 @@ def carregar_mapeamento_doencas():
 
 def carregar_pacientes_simula():
     
-    if not os.path.exists(CAMINHO_PACIENTES):
+    if not repositorio.existe(CAMINHO_PACIENTES):
         return []
 
     try:
-        with open(CAMINHO_PACIENTES, "r", encoding="utf-8") as f:
-            dados = json.load(f)
+        dados = repositorio.carregar(CAMINHO_PACIENTES)
+        if dados is not None:
             
             pessoas = dados.get("pacientes", []) if isinstance(dados, dict) else dados
             
@@ -538,6 +1504,8 @@ def carregar_pacientes_simula():
             while i < len(pessoas):
                 p = pessoas[i]
                 if isinstance(p, dict):
+                    # Cópia: os campos da simulação não vão para os dados do repositório
+                    p = dict(p)
                     
                     prioridade_raw = str(p.get("prioridade", "NORMAL")).lower()
                     p["prioridade"] = mapa_prioridades.get(prioridade_raw, "NORMAL")
@@ -566,14 +1534,15 @@ def carregar_pacientes_simula():
     except Exception as e:
         print(f"Erro crítico nos pacientes: {e}")
         return []
+    return []
 
 def carregar_medicos_simula():
     
-    if os.path.exists(CAMINHO_MEDICOS):
+    if repositorio.existe(CAMINHO_MEDICOS):
         try:
-            with open(CAMINHO_MEDICOS, "r", encoding="utf-8") as f:
-                dados = json.load(f)
-                medicos = dados.get("medicos", []) if isinstance(dados, dict) else dados
+            dados = repositorio.carregar(CAMINHO_MEDICOS)
+            if dados is not None:
+                medicos = [dict(m) for m in (dados.get("medicos", []) if isinstance(dados, dict) else dados)]
                 
                 for m in medicos:
                     if "especialidade" not in m:
@@ -590,6 +1559,9 @@ def carregar_medicos_simula():
 def ordenar_fila_por_prioridade(fila, prioridades):
     if not fila:
         return fila
+    if isinstance(fila, FilaPrioridade):
+        # O heap já mantém a ordem
+        return fila
     lista_fila = []
     while not queue_empty(fila):
         paciente, fila = remover_da_fila(fila)
@@ -601,18 +1573,23 @@ def ordenar_fila_por_prioridade(fila, prioridades):
     return fila_ordenada
 
 
-def gera_tempo_consulta(tempo_medio, dist):
+def gera_tempo_consulta(tempo_medio, dist, rng=None):
+    return float(gera_tempos_consulta(tempo_medio, dist, 1, rng)[0])
+
+
+def gera_tempos_consulta(tempo_medio, dist, quantidade, rng=None):
+    """Gera `quantidade` durações de consulta numa só chamada, limitadas a [0.3, 2.0] x tempo_medio"""
+    gerador = rng if rng is not None else np.random
     if dist == "exponential":
-        tempo = np.random.exponential(scale=tempo_medio)
+        tempos = gerador.exponential(scale=tempo_medio, size=quantidade)
     elif dist == "normal":
-        tempo = np.random.normal(tempo_medio, 5)
+        tempos = gerador.normal(tempo_medio, 5, size=quantidade)
     elif dist == "uniform":
-        tempo = np.random.uniform(tempo_medio * 0.5, tempo_medio * 1.5)
+        tempos = gerador.uniform(tempo_medio * 0.5, tempo_medio * 1.5, size=quantidade)
     else:
-        tempo = tempo_medio
+        tempos = np.full(quantidade, float(tempo_medio))
     
-    tempo = max(tempo_medio * 0.3, min(tempo, tempo_medio * 2.0))
-    return tempo
+    return np.clip(tempos, tempo_medio * 0.3, tempo_medio * 2.0)
 
 
 
@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from funcoes import CAMINHO_MEDICOS, CAMINHO_PACIENTES, validar_estrutura_pacientes
+
+
+# ============================================================================
+# GERADOR DE DATASETS SINTÉTICOS (testes de escala)
+# ============================================================================
+# Exemplo:
+#     python gerar_dados.py 1000000 --formato jsonl --medicos 200 --semente 42 --saida dados_1M
+#
+# Gera pacientes com o esquema de validar_estrutura_pacientes e a mistura de doenças
+# de mapeamento_doencas (pesada pelas frequências do pacientes.json de base). Os
+# pacientes são gerados e escritos em blocos de TAMANHO_BLOCO, por isso a memória não
+# depende do total, e o bloco k usa a semente [semente, k]: a mesma semente dá
+# sempre os mesmos ficheiros.
+
+TAMANHO_BLOCO = 10000
+FORMATOS = ["json", "jsonl", "bin"]
+
+# Formato binário: MAGIA, comprimento (uint32) e cabeçalho JSON com as categorias,
+# seguido de um registo de tamanho fixo por paciente (códigos das categorias)
+MAGIA_BINARIO = b"CLINPAC1"
+TIPO_REGISTO_BINARIO = np.dtype([
+    ("id", "<u4"), ("idade", "u1"), ("sexo", "u1"), ("prioridade", "u1"), ("atividade_fisica", "u1"),
+    ("flags", "u1"), ("doenca", "<u2"), ("primeiro_nome", "<u2"), ("apelido", "<u2")
+])
+FLAG_FUMADOR = 1
+FLAG_ALCOOL = 2
+FLAG_CRONICO = 4
+
+ATRIBUTOS_BOOLEANOS = [("fumador", FLAG_FUMADOR), ("consome_alcool", FLAG_ALCOOL), ("cronico", FLAG_CRONICO)]
+
+
+def ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def frequencias(valores):
+    contagens = {}
+    for valor in valores:
+        contagens[valor] = contagens.get(valor, 0) + 1
+    categorias = list(contagens)
+    pesos = np.array([contagens[c] for c in categorias], dtype=float)
+    return categorias, pesos / pesos.sum()
+
+
+def carregar_distribuicoes(caminho_pacientes=CAMINHO_PACIENTES, caminho_medicos=CAMINHO_MEDICOS):
+    """Distribuições empíricas dos ficheiros de base (categorias e probabilidades por campo).
+
+    As doenças são as de mapeamento_doencas, pesadas pela frequência no dataset de base
+    (as que lá não aparecem contam uma vez), mais as do dataset que não estão no mapeamento.
+    """
+    dados_pacientes = ler_json(caminho_pacientes, {"pacientes": []})
+    pacientes = dados_pacientes.get("pacientes", []) if isinstance(dados_pacientes, dict) else dados_pacientes
+    dados_medicos = ler_json(caminho_medicos, {})
+    mapeamento = dados_medicos.get("mapeamento_doencas", {}) if isinstance(dados_medicos, dict) else {}
+    if not pacientes and not mapeamento:
+        raise ValueError("Sem pacientes nem mapeamento_doencas de base para as distribuições")
+
+    contagem_doencas = {}
+    for p in pacientes:
+        contagem_doencas[p["doenca"]] = contagem_doencas.get(p["doenca"], 0) + 1
+    ja_contadas = {d.lower() for d in contagem_doencas}
+    for doenca in mapeamento:
+        if doenca.lower() not in ja_contadas:
+            contagem_doencas[doenca] = 1
+    doencas = list(contagem_doencas)
+    pesos_doencas = np.array([contagem_doencas[d] for d in doencas], dtype=float)
+
+    nomes = [p["nome"].split() for p in pacientes if p.get("nome", "").split()]
+    primeiros = sorted({n[0] for n in nomes}) or ["Paciente"]
+    apelidos = sorted({n[-1] for n in nomes if len(n) > 1}) or ["Sintético"]
+
+    idades = [p["idade"] for p in pacientes if isinstance(p.get("idade"), int)] or list(range(18, 101))
+    distribuicoes = {
+        "doenca": (doencas, pesos_doencas / pesos_doencas.sum()),
+        "idade": frequencias(idades),
+        "sexo": frequencias([p["sexo"] for p in pacientes] or ["feminino", "masculino", "outro"]),
+        "prioridade": frequencias([p["prioridade"] for p in pacientes] or ["normal", "alta", "emergência"]),
+        "atividade_fisica": frequencias(
+            [p["atributos"]["atividade_fisica"] for p in pacientes] or ["baixa", "moderada", "alta"]
+        ),
+        "primeiro_nome": (primeiros, np.full(len(primeiros), 1.0 / len(primeiros))),
+        "apelido": (apelidos, np.full(len(apelidos), 1.0 / len(apelidos))),
+        "mapeamento_doencas": mapeamento
+    }
+    for atributo, _ in ATRIBUTOS_BOOLEANOS:
+        verdadeiros = sum(1 for p in pacientes if p["atributos"].get(atributo))
+        distribuicoes[atributo] = verdadeiros / len(pacientes) if pacientes else 0.5
+    return distribuicoes
+
+
+def gerar_bloco(indice_bloco, inicio, quantidade, semente, distribuicoes):
+    """Registos (TIPO_REGISTO_BINARIO) dos pacientes inicio+1 .. inicio+quantidade"""
+    rng = np.random.default_rng([semente, indice_bloco])
+    registos = np.zeros(quantidade, dtype=TIPO_REGISTO_BINARIO)
+    registos["id"] = np.arange(inicio + 1, inicio + quantidade + 1)
+    for campo in ("doenca", "sexo", "prioridade", "atividade_fisica", "primeiro_nome", "apelido"):
+        categorias, probabilidades = distribuicoes[campo]
+        registos[campo] = rng.choice(len(categorias), size=quantidade, p=probabilidades)
+    idades, probabilidades = distribuicoes["idade"]
+    registos["idade"] = np.asarray(idades)[rng.choice(len(idades), size=quantidade, p=probabilidades)]
+    flags = np.zeros(quantidade, dtype=np.uint8)
+    for atributo, flag in ATRIBUTOS_BOOLEANOS:
+        flags = flags | np.where(rng.random(quantidade) < distribuicoes[atributo], flag, 0).astype(np.uint8)
+    registos["flags"] = flags
+    return registos
+
+
+def gerar_blocos(total, semente, distribuicoes):
+    indice_bloco = 0
+    inicio = 0
+    while inicio < total:
+        quantidade = min(TAMANHO_BLOCO, total - inicio)
+        yield gerar_bloco(indice_bloco, inicio, quantidade, semente, distribuicoes)
+        inicio = inicio + quantidade
+        indice_bloco = indice_bloco + 1
+
+
+def categorias_binario(distribuicoes):
+    return {campo: list(distribuicoes[campo][0])
+            for campo in ("doenca", "sexo", "prioridade", "atividade_fisica", "primeiro_nome", "apelido")}
+
+
+def registos_para_pacientes(registos, categorias):
+    """Converte um bloco de registos nos dicionários de paciente (esquema de pacientes.json)"""
+    colunas = {nome: registos[nome].tolist() for nome in TIPO_REGISTO_BINARIO.names}
+    pacientes = []
+    for i in range(len(registos)):
+        flags = colunas["flags"][i]
+        pacientes.append({
+            "id": f"d{colunas['id'][i]}",
+            "nome": f"{categorias['primeiro_nome'][colunas['primeiro_nome'][i]]} {categorias['apelido'][colunas['apelido'][i]]}",
+            "idade": colunas["idade"][i],
+            "sexo": categorias["sexo"][colunas["sexo"][i]],
+            "doenca": categorias["doenca"][colunas["doenca"][i]],
+            "prioridade": categorias["prioridade"][colunas["prioridade"][i]],
+            "atributos": {
+                "fumador": bool(flags & FLAG_FUMADOR),
+                "consome_alcool": bool(flags & FLAG_ALCOOL),
+                "atividade_fisica": categorias["atividade_fisica"][colunas["atividade_fisica"][i]],
+                "cronico": bool(flags & FLAG_CRONICO)
+            }
+        })
+    return pacientes
+
+
+# ============================================================================
+# ESCRITA / LEITURA EM STREAMING
+# ============================================================================
+def escrever_pacientes_json(caminho, blocos, categorias):
+    """{"pacientes": [...]} com um paciente por linha, escrito bloco a bloco"""
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write('{"pacientes": [\n')
+        primeiro = True
+        for registos in blocos:
+            for paciente in registos_para_pacientes(registos, categorias):
+                if not primeiro:
+                    f.write(",\n")
+                f.write(json.dumps(paciente, ensure_ascii=False))
+                primeiro = False
+        f.write("\n]}\n")
+
+
+def escrever_pacientes_jsonl(caminho, blocos, categorias):
+    with open(caminho, "w", encoding="utf-8") as f:
+        for registos in blocos:
+            f.writelines(json.dumps(p, ensure_ascii=False) + "\n" for p in registos_para_pacientes(registos, categorias))
+
+
+def escrever_pacientes_binario(caminho, blocos, categorias, total):
+    cabecalho = json.dumps({"versao": 1, "total": total, "categorias": categorias}, ensure_ascii=False).encode("utf-8")
+    with open(caminho, "wb") as f:
+        f.write(MAGIA_BINARIO)
+        f.write(struct.pack("<I", len(cabecalho)))
+        f.write(cabecalho)
+        for registos in blocos:
+            f.write(registos.tobytes())
+
+
+def ler_pacientes_binario(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Lê um ficheiro .bin de escrever_pacientes_binario, devolvendo listas de pacientes por bloco"""
+    with open(caminho, "rb") as f:
+        if f.read(len(MAGIA_BINARIO)) != MAGIA_BINARIO:
+            raise ValueError(f"{caminho}: não é um ficheiro de pacientes binário")
+        (tamanho_cabecalho,) = struct.unpack("<I", f.read(4))
+        cabecalho = json.loads(f.read(tamanho_cabecalho).decode("utf-8"))
+        while True:
+            dados = f.read(tamanho_bloco * TIPO_REGISTO_BINARIO.itemsize)
+            if not dados:
+                return
+            registos = np.frombuffer(dados, dtype=TIPO_REGISTO_BINARIO)
+            yield registos_para_pacientes(registos, cabecalho["categorias"])
+
+
+def gerar_medicos(quantidade, semente, distribuicoes):
+    """medicos.json com especialidades proporcionais à procura das doenças (pelo menos uma de cada)"""
+    mapeamento = distribuicoes["mapeamento_doencas"]
+    mapeamento_minusculas = {d.lower(): e for d, e in mapeamento.items()}
+    procura = {}
+    doencas, probabilidades = distribuicoes["doenca"]
+    for doenca, probabilidade in zip(doencas, probabilidades):
+        especialidade = mapeamento_minusculas.get(doenca.lower(), "Clínica Geral")
+        procura[especialidade] = procura.get(especialidade, 0.0) + probabilidade
+    especialidades = sorted(procura)
+
+    rng = np.random.default_rng([semente, 2 ** 31])
+    quotas = np.array([procura[e] for e in especialidades]) * quantidade
+    contagens = np.floor(quotas).astype(int)
+    if quantidade >= len(especialidades):
+        contagens = np.maximum(contagens, 1)
+    while contagens.sum() > quantidade:
+        contagens[np.argmax(contagens)] -= 1
+    restos = np.argsort(contagens - quotas)
+    i = 0
+    while contagens.sum() < quantidade:
+        contagens[restos[i % len(restos)]] += 1
+        i = i + 1
+
+    primeiros = distribuicoes["primeiro_nome"][0]
+    apelidos = distribuicoes["apelido"][0]
+    medicos = []
+    for especialidade, contagem in zip(especialidades, contagens.tolist()):
+        for _ in range(contagem):
+            nome = f"{primeiros[rng.integers(len(primeiros))]} {apelidos[rng.integers(len(apelidos))]}"
+            medicos.append({
+                "id": f"m{len(medicos) + 1}",
+                "nome": f"{'Dra.' if rng.random() < 0.5 else 'Dr.'} {nome}",
+                "ocupado": False,
+                "doente_corrente": None,
+                "especialidade": especialidade,
+                "total_tempo_ocupado": 0.0,
+                "inicio_ultima_consulta": 0.0
+            })
+    return {"medicos": medicos, "mapeamento_doencas": mapeamento}
+
+
+def blocos_validados(blocos, categorias):
+    for registos in blocos:
+        if not validar_estrutura_pacientes({"pacientes": registos_para_pacientes(registos, categorias)}):
+            raise ValueError("bloco gerado não respeita validar_estrutura_pacientes")
+        yield registos
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Gera pacientes.json/medicos.json sintéticos, em streaming e determinísticos."
+    )
+    parser.add_argument("pacientes", type=int, help="número de pacientes (ex.: 10000 a 10000000)")
+    parser.add_argument("-f", "--formato", choices=FORMATOS, default="json", help="formato dos pacientes (padrão: json)")
+    parser.add_argument("-m", "--medicos", type=int, default=None,
+                        help="número de médicos (padrão: um por cada 50 pacientes, entre 15 e 1000)")
+    parser.add_argument("-s", "--semente", type=int, default=0, help="semente (padrão: 0)")
+    parser.add_argument("-o", "--saida", default="dados_sinteticos", help="pasta de saída (padrão: dados_sinteticos)")
+    parser.add_argument("--base-pacientes", default=CAMINHO_PACIENTES, help="pacientes.json de onde vêm as distribuições")
+    parser.add_argument("--base-medicos", default=CAMINHO_MEDICOS, help="medicos.json com o mapeamento_doencas")
+    parser.add_argument("--validar", action="store_true",
+                        help="confirma o esquema de cada bloco com validar_estrutura_pacientes")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.pacientes < 1:
+        print("Erro: o número de pacientes deve ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    try:
+        distribuicoes = carregar_distribuicoes(args.base_pacientes, args.base_medicos)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    categorias = categorias_binario(distribuicoes)
+    num_medicos = args.medicos if args.medicos is not None else min(1000, max(15, args.pacientes // 50))
+
+    os.makedirs(args.saida, exist_ok=True)
+    inicio = time.time()
+    blocos = gerar_blocos(args.pacientes, args.semente, distribuicoes)
+    if args.validar:
+        blocos = blocos_validados(blocos, categorias)
+
+    caminho_pacientes = os.path.join(args.saida, f"pacientes.{args.formato}")
+    try:
+        if args.formato == "json":
+            escrever_pacientes_json(caminho_pacientes, blocos, categorias)
+        elif args.formato == "jsonl":
+            escrever_pacientes_jsonl(caminho_pacientes, blocos, categorias)
+        else:
+            escrever_pacientes_binario(caminho_pacientes, blocos, categorias, args.pacientes)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    with open(os.path.join(args.saida, "medicos.json"), "w", encoding="utf-8") as f:
+        json.dump(gerar_medicos(num_medicos, args.semente, distribuicoes), f, ensure_ascii=False, indent=2)
+
+    print(f"{args.pacientes} pacientes e {num_medicos} médicos em {time.time() - inicio:.1f} s -> {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import FreeSimpleGUI as sg
 from funcoes import *
+import copy
 import os
 import unicodedata
 import re
@@ -71,7 +72,7 @@ def importar_dados():
     if not caminho_medicos:
         return
     
-    dados_medicos = carregar_dados(caminho_medicos)
+    dados_medicos = ler_ficheiro_json(caminho_medicos)
     if not validar_estrutura_medicos(dados_medicos):
         popup_ok('Ficheiro selecionado não corresponde ao modelo de médicos!', 
                 title='Erro', background_color=claro, button_color=(claro, escuro), text_color=escuro)
@@ -87,15 +88,14 @@ def importar_dados():
     if not caminho_pacientes:
         return
 
-    dados_pacientes = carregar_dados(caminho_pacientes)
+    dados_pacientes = ler_ficheiro_json(caminho_pacientes)
     if not validar_estrutura_pacientes(dados_pacientes):
         popup_ok('Ficheiro selecionado não corresponde ao modelo de pacientes!', 
                 title='Erro', background_color=claro, button_color=(claro, escuro), text_color=escuro)
         return
 
     
-    salvar_dados('medicos.json', dados_medicos)
-    salvar_dados('pacientes.json', dados_pacientes)
+    gravar_dados_importados(dados_medicos, dados_pacientes)
     
     
     marcar_dados_como_importados()
@@ -111,7 +111,7 @@ def adicionar_medico():
     if not isinstance(dados, dict):
         dados = {'medicos': []}
     if 'medicos' not in dados:
-        dados['medicos'] = []
+        dados = {'medicos': []}
     
     medicos = dados['medicos']  
     
@@ -163,10 +163,7 @@ def adicionar_medico():
                 }
                 
                
-                dados['medicos'].append(novo_medico)
-                
-                
-                salvar_dados('medicos.json', dados)
+                adicionar_medico_dados(novo_medico)
                 
                 popup_ok('Médico adicionado com sucesso!', 
                         title='Médico Adicionado', background_color=claro, text_color=escuro)
@@ -181,7 +178,7 @@ def adicionar_paciente():
     if not isinstance(dados, dict):
         dados = {'pacientes': []}
     if 'pacientes' not in dados:
-        dados['pacientes'] = []
+        dados = {'pacientes': []}
     
     pacientes = dados['pacientes']  
     
@@ -267,10 +264,7 @@ def adicionar_paciente():
                     }
                 }
                 
-                dados['pacientes'].append(novo_paciente)
-                
-                
-                salvar_dados('pacientes.json', dados)
+                adicionar_paciente_dados(novo_paciente)
                 
                 popup_ok('Paciente adicionado com sucesso!', title='Sucesso', 
                         background_color=claro, text_color=escuro)
@@ -426,7 +420,8 @@ def listar_medicos():
                         k = k + 1
                     
                     if m:
-                        medico_selecionado = m
+                        # Cópia: m é o registo da cache de carregar_dados, que só muda por atualizar_medico_dados
+                        medico_selecionado = copy.deepcopy(m)
                         linhas = [
                             f"ID: {m.get('id','')}",
                             f"Nome: {m.get('nome','')}",
@@ -490,7 +485,7 @@ def listar_medicos():
                         disponivel = not medico_selecionado.get('ocupado', False)
                         atualizar_medico(medico_selecionado, nome_completo_editado, 
                                     values_edit['-ESPECIALIDADE-'], disponivel)
-                        salvar_dados('medicos.json', dados)
+                        atualizar_medico_dados(medico_selecionado)
                         popup_ok('Médico editado com sucesso!', title='Sucesso', 
                                 background_color=claro, text_color=escuro)
                         window_edit.close()
@@ -703,7 +698,8 @@ def listar_pacientes():
                         k = k + 1
                     
                     if p:
-                        paciente_selecionado = p
+                        # Cópia: p é o registo da cache de carregar_dados, que só muda por atualizar_paciente_dados
+                        paciente_selecionado = copy.deepcopy(p)
                         atributos = p.get('atributos', {})
                         atr_list = []
                         if atributos.get('fumador'):
@@ -787,7 +783,7 @@ def listar_pacientes():
                             values_edit['-DOENCA-'], values_edit['-PRIORIDADE-'], values_edit['-FUMADOR-'],
                             values_edit['-ALCOOL-'], values_edit['-ATIVIDADE-'], values_edit['-CRONICO-']
                         )
-                        salvar_dados('pacientes.json', dados)
+                        atualizar_paciente_dados(paciente_selecionado)
                         popup_ok('Paciente editado com sucesso!', title='Sucesso', 
                                 background_color=claro, text_color=escuro)
                         window_edit.close()
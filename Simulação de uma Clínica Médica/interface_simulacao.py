@@ -9,6 +9,8 @@ import matplotlib.backends.backend_tkagg as fig_tk
 from matplotlib.figure import Figure
 import time
 import re
+from concurrent.futures import wait, FIRST_COMPLETED
+from collections.abc import Mapping
 from funcoes import (
     
     carregar_pacientes_simula, 
@@ -16,6 +18,7 @@ from funcoes import (
     carregar_mapeamento_doencas,
     
     
+    FilaPrioridade,
     enqueue,
     dequeue,
     queue_empty,
@@ -30,6 +33,33 @@ from funcoes import (
     gera_tempo_consulta,
     salvar_arquivo
 )
+from motor_simulacao import (
+    NUM_MEDICOS,
+    LAMBDA_CHEGADA,
+    TEMPO_MEDIO_CONSULTA,
+    TEMPO_SIMULACAO,
+    DISTRIBUICAO_TEMPO_CONSULTA,
+    TEMPO_MAX_ESPERA,
+    PROB_DESISTENCIA,
+    PAUSA_FREQUENCIA,
+    DURACAO_PAUSA,
+    NUM_PAUSAS,
+    MAX_MEDICOS_PAUSA_SIMULTANEA,
+    PRIORIDADES,
+    SerieTemporal,
+    Simulacao,
+    METRICAS_RESULTADO,
+    QUANTIS_RELATORIO,
+    combinar_quantis,
+    criar_executor,
+    executar_ate_precisao,
+    executar_ponto_fila_vs_taxa,
+    executar_resultados_finais,
+    resumir_metrica,
+    resumir_quantis,
+    resumir_replicacoes,
+    semente_replicacao
+)
 
 
 
@@ -39,21 +69,6 @@ from funcoes import (
 # ============================================================================
 escuro = '#2196f3'
 claro = '#c3e3fd'
-NUM_MEDICOS = 2
-LAMBDA_CHEGADA = 10
-TEMPO_MEDIO_CONSULTA = 15
-TEMPO_SIMULACAO = 480
-DISTRIBUICAO_TEMPO_CONSULTA = "exponential"
-TEMPO_MAX_ESPERA = 30
-PROB_DESISTENCIA = 0.3
-PAUSA_FREQUENCIA = 60
-DURACAO_PAUSA = 15
-NUM_PAUSAS = 2
-MAX_MEDICOS_PAUSA_SIMULTANEA = 2
-
-PRIORIDADES = {"URGENTE": 1, "ALTA": 2, "NORMAL": 3, "BAIXA": 4}
-
-
 config = {
     "TEMPO_MEDIO_CONSULTA": TEMPO_MEDIO_CONSULTA,
     "DISTRIBUICAO_TEMPO_CONSULTA": DISTRIBUICAO_TEMPO_CONSULTA,
@@ -61,20 +76,6 @@ config = {
 }
 
 
-# ============================================================================
-# ESTADO DA SIMULAÇÃO
-# ============================================================================
-estado_simulacao = {
-    "pessoas_dados": {}, "paciente_selecionado": None, "historico_atendimentos": [],
-    "fila_espera": [], "tempo_atual": 0, "simulacao_ativa": False, "velocidade": 1.0,
-    "medicos": [], "proximo_paciente_tempo": 0, "pacientes_disponiveis": [],
-    "pacientes_desistentes": [], "dados_historicos": [], "resultados_simulacoes": [],"titulo": "Simulação Clínica"
-}
-
-
-
-
-
 # ============================================================================
 # FUNÇÕES DE CONFIGURAÇÃO POR ARQUIVO JSON (NOVA)
 # ============================================================================
@@ -102,50 +103,6 @@ def salvar_configuracao_json(config, nome_arquivo="config_simulacao.json"):
 # ============================================================================
 
 
-def coletar_dados_historicos():
-    stats = obter_estatisticas()
-    
-    atendimentos_especialidade_correta = 0
-    for h in estado_simulacao["historico_atendimentos"]:
-        if h.get("especialidade_correta", False):
-            atendimentos_especialidade_correta = atendimentos_especialidade_correta + 1
-    
-    total_atendimentos = len(estado_simulacao["historico_atendimentos"])
-    taxa_correspondencia = (atendimentos_especialidade_correta / total_atendimentos * 100) if total_atendimentos > 0 else 0
-    
-    dados_momento = {
-        "tempo": estado_simulacao["tempo_atual"],
-        "fila_tamanho": tamanho_fila(estado_simulacao["fila_espera"]),
-        "atendidos": total_atendimentos,
-        "desistentes": len(estado_simulacao["pacientes_desistentes"]),
-        "taxa_ocupacao": stats["taxa_ocupacao"],
-        "tempo_medio_consulta": stats["tempo_medio_consulta"],
-        "medicos_ocupados": sum(1 for m in estado_simulacao["medicos"] if m["ocupado"]),
-        "medicos_em_pausa": sum(1 for m in estado_simulacao["medicos"] if m["em_pausa"]),
-        "aguardando_chegada": len(estado_simulacao["pacientes_disponiveis"]),
-        "taxa_correspondencia_especialidade": taxa_correspondencia
-    }
-    
-    if not queue_empty(estado_simulacao["fila_espera"]):
-        tempos_espera = []
-        tempo_atual = estado_simulacao["tempo_atual"]
-        
-        for p in estado_simulacao["fila_espera"]:
-            if "tempo_chegada" in p:
-                tempo_espera = tempo_atual - p["tempo_chegada"]
-                if tempo_espera >= 0:
-                    tempos_espera.append(tempo_espera)
-        
-        if tempos_espera:
-            dados_momento["tempo_medio_espera"] = np.mean(tempos_espera)
-        else:
-            dados_momento["tempo_medio_espera"] = 0
-    else:
-        dados_momento["tempo_medio_espera"] = 0
-    
-    estado_simulacao["dados_historicos"].append(dados_momento)
-
-
 # ============================================================================
 # FUNÇÕES DE ANÁLISE E RELATÓRIOS
 # ============================================================================
@@ -185,7 +142,7 @@ def mostrar_estatisticas_especialidades():
                     paciente_info = pacientes_carregados[i]
                 i = i + 1
         
-        if paciente_info and isinstance(paciente_info, dict):
+        if paciente_info and isinstance(paciente_info, Mapping):
             pacientes_encontrados = pacientes_encontrados + 1
             especialidade = paciente_info.get("especialidade_necessaria", "Clínica Geral")
             especialidades_count[especialidade] = especialidades_count.get(especialidade, 0) + 1
@@ -793,6 +750,16 @@ def gerar_grafico_fila_vs_taxa():
             [sg.Text("Tempo por simulação:", size=(20,1)), 
              sg.Input("240", key="-TEMPO_SIM_ANALISE-", size=(10,1)),
              sg.Text("minutos")],
+            [sg.Text("Replicações por taxa:", size=(20,1)), 
+             sg.Input("1", key="-REPLICACOES_ANALISE-", size=(10,1)),
+             sg.Text("(mínimo, se houver precisão alvo)")],
+            [sg.Text("Precisão alvo:", size=(20,1)), 
+             sg.Input("", key="-PRECISAO_ANALISE-", size=(10,1)),
+             sg.Text("% do tempo médio de espera (IC 95%); vazio = replicações fixas")],
+            [sg.Text("Máx. replicações:", size=(20,1)), 
+             sg.Input("50", key="-MAX_REPLICACOES_ANALISE-", size=(10,1))],
+            [sg.Text("Processos em paralelo:", size=(20,1)), 
+             sg.Input(str(os.cpu_count() or 1), key="-PROCESSOS_ANALISE-", size=(10,1))],
             [sg.Text("Usar simulação anterior:", size=(20,1)),
              sg.Combo(["Nenhuma"] + [f"λ={s['configuracao']['lambda_chegada']} M={s['configuracao']['num_medicos']} {s['timestamp'][:10]}" 
                                     for s in estado_simulacao.get("resultados_simulacoes", [])], 
@@ -820,8 +787,23 @@ def gerar_grafico_fila_vs_taxa():
             taxas_str = values["-TAXAS-"].strip()
             taxas_lista = [float(t.strip()) for t in taxas_str.split(",") if t.strip()]
             
+            try:
+                num_replicacoes = max(1, int(values["-REPLICACOES_ANALISE-"]))
+                num_processos = max(1, int(values["-PROCESSOS_ANALISE-"]))
+                precisao_str = values["-PRECISAO_ANALISE-"].strip().replace("%", "").replace(",", ".")
+                precisao = float(precisao_str) / 100 if precisao_str else 0.0
+                max_replicacoes = int(values["-MAX_REPLICACOES_ANALISE-"])
+            except ValueError:
+                num_replicacoes = None
+            
             if not taxas_lista:
                 sg.popup_error("Insira pelo menos uma taxa de chegada!", title="Erro")
+            elif num_replicacoes is None:
+                sg.popup_error("Replicações, processos, precisão e máx. replicações têm de ser números!", title="Erro")
+            elif precisao < 0:
+                sg.popup_error("A precisão não pode ser negativa!", title="Erro")
+            elif max_replicacoes < 1:
+                sg.popup_error("O máximo de replicações tem de ser pelo menos 1!", title="Erro")
             else:
                 num_medicos = int(values["-NUM_MEDICOS_ANALISE-"])
                 tempo_sim_analise = float(values["-TEMPO_SIM_ANALISE-"])
@@ -845,56 +827,98 @@ def gerar_grafico_fila_vs_taxa():
                                 "max_pausa_simultanea": sim["configuracao"].get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA)
                             })
                 
-                resultados = []
-                total_testes = len(taxas_lista)
+                max_replicacoes = max(num_replicacoes, max_replicacoes)
+                semente_base = int(np.random.SeedSequence().generate_state(1)[0])
                 
-                for i, taxa in enumerate(taxas_lista):
-                    progresso = int((i / total_testes) * 100)
-                    window["-PROGRESSO_ANALISE-"].update(progresso)
-                    window["-STATUS_ANALISE-"].update(f"Testando taxa {taxa} pacientes/hora... ({i+1}/{total_testes})")
-                    window.refresh()
-                    
+                configs_taxa = []
+                tarefas = []
+                for taxa in taxas_lista:
                     config_atual_teste = config_base.copy()
                     config_atual_teste["lambda_chegada"] = taxa
+                    configs_taxa.append(config_atual_teste)
+                    for replicacao in range(num_replicacoes):
+                        tarefas.append((config_atual_teste, semente_replicacao(semente_base, replicacao)))
+                
+                por_taxa = {}
+                cancelado = False
+                erro = None
+                
+                if precisao > 0:
+                    # Regra de paragem sequencial: cada taxa replica em lotes até o IC da espera ser estreito
+                    window["-STATUS_ANALISE-"].update(f"A replicar até ±{precisao*100:.0f}% na espera média...")
+                    window.refresh()
                     
-                    estado_backup = estado_simulacao.copy()
+                    def progresso_sequencial(concluidas, por_convergir):
+                        total_taxas = len(taxas_lista)
+                        window["-PROGRESSO_ANALISE-"].update(int((total_taxas - por_convergir) / total_taxas * 100))
+                        window["-STATUS_ANALISE-"].update(
+                            f"{concluidas} simulações; {total_taxas - por_convergir} de {total_taxas} taxas com a precisão pedida..."
+                        )
+                        event, _ = window.read(timeout=0)
+                        return event not in (sg.WINDOW_CLOSED, "Cancelar")
                     
-                    if inicializar_simulacao(config_atual_teste):
-                        estado_simulacao["simulacao_ativa"] = True
-                        tempo_total = config_atual_teste["tempo_simulacao"]
-                        
-                        incremento_base = 0.5
-                        velocidade_auto = 200.0
-                        
-                        while estado_simulacao["simulacao_ativa"] and estado_simulacao["tempo_atual"] < tempo_total:
-                            passos_por_frame = 10
-                            passo_atual = 0
-                            while passo_atual < passos_por_frame and estado_simulacao["simulacao_ativa"]:
-                                atualizar_simulacao(incremento_base)
-                                passo_atual = passo_atual + 1
+                    try:
+                        por_cenario = executar_ate_precisao(
+                            configs_taxa, precisao, funcao=executar_ponto_fila_vs_taxa,
+                            min_replicacoes=num_replicacoes, max_replicacoes=max_replicacoes,
+                            semente=semente_base, workers=num_processos, ao_progresso=progresso_sequencial
+                        )
+                    except Exception as e:
+                        por_cenario = []
+                        erro = str(e)
+                    
+                    if por_cenario is None:
+                        cancelado = True
+                    else:
+                        for taxa, cenario in zip(taxas_lista, por_cenario):
+                            por_taxa[taxa] = [r["resultado"] for r in cenario["replicacoes"]]
+                else:
+                    # Cada (taxa, replicação) corre num processo; os resultados chegam pela ordem em que terminam
+                    total_testes = len(tarefas)
+                    concluidos = 0
+                    window["-STATUS_ANALISE-"].update(f"A correr {total_testes} simulações em {num_processos} processos...")
+                    window.refresh()
+                    
+                    executor = criar_executor(num_processos)
+                    try:
+                        pendentes = set(executor.submit(executar_ponto_fila_vs_taxa, t) for t in tarefas)
+                        while pendentes and not cancelado:
+                            terminados, pendentes = wait(pendentes, timeout=0.1, return_when=FIRST_COMPLETED)
+                            for futuro in terminados:
+                                try:
+                                    ponto = futuro.result()
+                                    por_taxa.setdefault(ponto["taxa"], []).append(ponto)
+                                except Exception as e:
+                                    erro = str(e)
+                                concluidos = concluidos + 1
                         
-                        if estado_simulacao["dados_historicos"]:
-                            tamanhos_fila = [d["fila_tamanho"] for d in estado_simulacao["dados_historicos"]]
-                            tamanho_medio_fila = np.mean(tamanhos_fila) if tamanhos_fila else 0
-                            
-                            tempos_espera = [d["tempo_medio_espera"] for d in estado_simulacao["dados_historicos"] if d["tempo_medio_espera"] > 0]
-                            tempo_medio_espera = np.mean(tempos_espera) if tempos_espera else 0
-                            
-                            atendidos = len(estado_simulacao["historico_atendimentos"])
-                            desistentes = len(estado_simulacao["pacientes_desistentes"])
-                            
+                            window["-PROGRESSO_ANALISE-"].update(int(concluidos / total_testes * 100))
+                            window["-STATUS_ANALISE-"].update(f"Concluídas {concluidos} de {total_testes} simulações...")
+                            event, _ = window.read(timeout=0)
+                            if event in (sg.WINDOW_CLOSED, "Cancelar"):
+                                cancelado = True
+                    finally:
+                        # Também se a janela der erro: as simulações por começar não ficam a correr
+                        executor.shutdown(wait=False, cancel_futures=True)
+                
+                resultados = []
+                if not cancelado:
+                    for taxa in taxas_lista:
+                        pontos = por_taxa.get(taxa, [])
+                        if pontos:
                             resultados.append({
                                 "taxa": taxa,
-                                "tamanho_medio_fila": tamanho_medio_fila,
-                                "tempo_medio_espera": tempo_medio_espera,
-                                "atendidos": atendidos,
-                                "desistentes": desistentes,
+                                "tamanho_medio_fila": float(np.mean([p["tamanho_medio_fila"] for p in pontos])),
+                                "tempo_medio_espera": float(np.mean([p["tempo_medio_espera"] for p in pontos])),
+                                "ic95_espera": resumir_metrica([p["tempo_medio_espera"] for p in pontos])["meia_largura"],
+                                "atendidos": float(np.mean([p["atendidos"] for p in pontos])),
+                                "desistentes": float(np.mean([p["desistentes"] for p in pontos])),
                                 "num_medicos": num_medicos,
-                                "tempo_simulacao": tempo_sim_analise
+                                "tempo_simulacao": tempo_sim_analise,
+                                "replicacoes": len(pontos)
                             })
-                        
-                        estado_simulacao.clear()
-                        estado_simulacao.update(estado_backup)
+                    if erro:
+                        sg.popup_error(erro, title="Erro")
                 
                 window["-PROGRESSO_ANALISE-"].update(100)
                 window["-STATUS_ANALISE-"].update("Análise concluída! Gerando gráfico...")
@@ -902,7 +926,7 @@ def gerar_grafico_fila_vs_taxa():
                 
                 if resultados:
                     mostrar_grafico_fila_vs_taxa_resultados(resultados)
-                else:
+                elif not cancelado:
                     sg.popup_error("Nenhum resultado obtido da análise.", title="Erro")
                 
                 continuar = False
@@ -916,6 +940,7 @@ def mostrar_grafico_fila_vs_taxa_resultados(resultados):
     taxas = []
     tamanhos_fila = []
     tempos_espera = []
+    ics_espera = []
     atendidos = []
     desistentes = []
     
@@ -936,6 +961,7 @@ def mostrar_grafico_fila_vs_taxa_resultados(resultados):
                 tempos_espera.append(float(espera))
             else:
                 tempos_espera.append(0.0)
+            ics_espera.append(float(r.get("ic95_espera", 0.0)))
             
             atend = r.get("atendidos", 0)
             if isinstance(atend, (int, float)):
@@ -1050,15 +1076,18 @@ def mostrar_grafico_fila_vs_taxa_resultados(resultados):
     canvas1.draw()
     canvas1.get_tk_widget().pack(side='top', fill='both', expand=True)
 
-    dados_ordenados2 = sorted(zip(taxas, tempos_espera))
+    dados_ordenados2 = sorted(zip(taxas, tempos_espera, ics_espera))
     taxas_ord2 = [d[0] for d in dados_ordenados2]
     esperas_ord = [d[1] for d in dados_ordenados2]
+    ics_ord = [d[2] for d in dados_ordenados2]
     
     fig2 = Figure(figsize=figsize, dpi=dpi_value)
     ax2 = fig2.add_subplot(111)
     
     ax2.plot(taxas_ord2, esperas_ord, 'r-s', linewidth=2, markersize=8,
             markerfacecolor='white', markeredgewidth=2)
+    if any(ics_ord):
+        ax2.errorbar(taxas_ord2, esperas_ord, yerr=ics_ord, fmt='none', ecolor='red', capsize=4, alpha=0.6)
     
     ax2.set_xlabel('Taxa de Chegada (pacientes/hora)', fontsize=10)
     ax2.set_ylabel('Tempo Médio de Espera (minutos)', fontsize=10)
@@ -1594,6 +1623,12 @@ def gerar_relatorio_completo(historico_atendimentos, medicos, pessoas_dados, tit
         
         relatorio_completo.append(f"Taxa de correspondência de especialidades: {taxa_correspondencia:.1f}%")
         relatorio_completo.append(f"Total de médicos: {len(medicos)}")
+        
+        if isinstance(dados_simulacao, dict) and dados_simulacao.get("quantis"):
+            relatorio_completo.append("")
+            relatorio_completo.append("QUANTIS")
+            relatorio_completo.append("-" * 80)
+            relatorio_completo.extend(linhas_quantis(dados_simulacao["quantis"]))
     else:
         relatorio_completo.append(f"RELATÓRIO DA SIMULAÇÃO - {titulo}")
         relatorio_completo.append("=" * 100)
@@ -1624,12 +1659,21 @@ def gerar_relatorio_completo(historico_atendimentos, medicos, pessoas_dados, tit
         else:
             relatorio_completo.append(f"Taxa ocupação média: {resultados.get('taxa_ocupacao_media', 'N/A')}")
         relatorio_completo.append(f"Fila máxima: {resultados.get('fila_maxima', 'N/A')}")
+        if isinstance(resultados.get('fila_media'), (int, float)):
+            relatorio_completo.append(f"Fila média: {resultados['fila_media']:.2f}")
         if isinstance(resultados.get('tempo_medio_espera'), (int, float)):
             relatorio_completo.append(f"Tempo médio espera: {resultados.get('tempo_medio_espera', 'N/A'):.1f} minutos")
         else:
             relatorio_completo.append(f"Tempo médio espera: {resultados.get('tempo_medio_espera', 'N/A')}")
         relatorio_completo.append("")
         
+        quantis = quantis_resultado(dados_simulacao)
+        if quantis:
+            relatorio_completo.append("QUANTIS")
+            relatorio_completo.append("-" * 80)
+            relatorio_completo.extend(linhas_quantis(quantis))
+            relatorio_completo.append("")
+        
         if historico_atendimentos and len(historico_atendimentos) > 0:
             relatorio_completo.append("EVOLUÇÃO DA SIMULAÇÃO")
             relatorio_completo.append("-" * 80)
@@ -1878,508 +1922,43 @@ def mostrar_estatisticas_pacientes(pacientes_atendidos):
 
 
 # ============================================================================
-# FUNÇÕES DE SISTEMA E SIMULAÇÃO
+# SIMULAÇÃO AO VIVO (usada pela interface)
 # ============================================================================
 
-def processar_desistencias():
-    tempo_atual = estado_simulacao["tempo_atual"]
-    fila_nova = []
-    
-    tempo_max_espera = estado_simulacao.get("tempo_max_espera", TEMPO_MAX_ESPERA)
-    prob_desistencia = estado_simulacao.get("prob_desistencia", PROB_DESISTENCIA)
-    
-    fila_temporaria = estado_simulacao["fila_espera"].copy()
-    
-    while not queue_empty(fila_temporaria):
-        paciente, fila_temporaria = remover_da_fila(fila_temporaria)
-        tempo_espera = tempo_atual - paciente.get("tempo_chegada", tempo_atual)
-
-        if tempo_espera > tempo_max_espera:
-            if random.random() < prob_desistencia:
-                paciente["tempo_espera"] = tempo_espera
-                paciente["motivo_desistencia"] = f"Esperou {tempo_espera:.1f} min (> {tempo_max_espera} min)"
-                estado_simulacao["pacientes_desistentes"].append(paciente)
-            else:
-                fila_nova = adicionar_a_fila(fila_nova, paciente)
-        else:
-            fila_nova = adicionar_a_fila(fila_nova, paciente)
-    
-    estado_simulacao["fila_espera"] = fila_nova
-    estado_simulacao["fila_espera"] = ordenar_fila_por_prioridade(
-        estado_simulacao["fila_espera"], PRIORIDADES
-    )
-def atualizar_simulacao(incremento_tempo):
-    if not estado_simulacao["simulacao_ativa"]:
-        return
-    
-    estado_simulacao["tempo_atual"] = estado_simulacao["tempo_atual"] + incremento_tempo
-    tempo_atual = estado_simulacao["tempo_atual"]
-
-    if len(estado_simulacao["dados_historicos"]) == 0 or tempo_atual - estado_simulacao["dados_historicos"][-1]["tempo"] >= 1.0:
-        coletar_dados_historicos()
-
-    if tempo_atual >= estado_simulacao["tempo_simulacao"]:
-        estado_simulacao["simulacao_ativa"] = False
-        salvar_resultado_simulacao()
-        return
-    
-    medicos = estado_simulacao["medicos"]
-    num_medicos_total = len(medicos)
-    max_pausa_simultanea = min(
-        estado_simulacao.get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA),
-        max(1, num_medicos_total // 3)
-    )
-
-    medicos_em_pausa = 0
-    i = 0
-    while i < len(medicos):
-        if medicos[i]["em_pausa"]:
-            medicos_em_pausa = medicos_em_pausa + 1
-        i = i + 1
-
-    pausas_permitidas = max_pausa_simultanea
-    tamanho_fila_atual = tamanho_fila(estado_simulacao["fila_espera"])
-    num_medicos = len(medicos)
-    
-    if tamanho_fila_atual > num_medicos * 6:
-        pausas_permitidas = max(0, max_pausa_simultanea // 2)
-    elif tamanho_fila_atual > num_medicos * 4:
-        pausas_permitidas = max(1, max_pausa_simultanea * 2 // 3)
-    
-    medicos_disponiveis_pausa = []
-    i = 0
-    while i < len(medicos):
-        medico = medicos[i]
-        pode_pausar = (
-            not medico["em_pausa"] and 
-            medico["num_pausas_realizadas"] < medico["num_pausas"] and
-            tempo_atual >= (medico["num_pausas_realizadas"] + 1) * medico["frequencia_pausa"]
-        )
-        
-        if pode_pausar:
-            especialidade = medico["especialidade"]
-            
-            medicos_mesma_especialidade = []
-            j = 0
-            while j < len(medicos):
-                if medicos[j]["especialidade"] == especialidade:
-                    medicos_mesma_especialidade.append(medicos[j])
-                j = j + 1
-            
-            medicos_trabalhando_mesma_espec = 0
-            j = 0
-            while j < len(medicos_mesma_especialidade):
-                if not medicos_mesma_especialidade[j]["em_pausa"] and medicos_mesma_especialidade[j]["id"] != medico["id"]:
-                    medicos_trabalhando_mesma_espec = medicos_trabalhando_mesma_espec + 1
-                j = j + 1
-            
-            if len(medicos_mesma_especialidade) == 1:
-                if tamanho_fila_atual < 3:
-                    medicos_disponiveis_pausa.append(medico)
-            elif medicos_trabalhando_mesma_espec > 0:
-                medicos_disponiveis_pausa.append(medico)
-        
-        i = i + 1
-    
-    if medicos_disponiveis_pausa and medicos_em_pausa < pausas_permitidas:
-        random.shuffle(medicos_disponiveis_pausa)
-        vagas_pausa = pausas_permitidas - medicos_em_pausa
-        medicos_para_pausa = medicos_disponiveis_pausa[:vagas_pausa]
-        
-        i = 0
-        while i < len(medicos_para_pausa):
-            medico = medicos_para_pausa[i]
-            probabilidade_pausa = 0.7 if tamanho_fila_atual < 5 else 0.3
-            if random.random() < probabilidade_pausa:
-                medico["em_pausa"] = True
-                medico["tempo_fim_pausa"] = tempo_atual + medico["duracao_pausa"]
-                medico["ocupado"] = False
-                medico["paciente_atual"] = None
-                medicos_em_pausa = medicos_em_pausa + 1
-            i = i + 1
-    
-    i = 0
-    while i < len(medicos):
-        medico = medicos[i]
-        if medico["em_pausa"] and tempo_atual >= medico["tempo_fim_pausa"]:
-            medico["em_pausa"] = False
-            medico["num_pausas_realizadas"] = medico["num_pausas_realizadas"] + 1
-            medico["pausas_realizadas"].append({
-                "inicio": tempo_atual - medico["duracao_pausa"],
-                "fim": tempo_atual
-            })
-            medicos_em_pausa = max(0, medicos_em_pausa - 1)
-        i = i + 1
-    
-    if tempo_atual >= estado_simulacao["proximo_paciente_tempo"] and estado_simulacao["pacientes_disponiveis"]:
-        paciente = estado_simulacao["pacientes_disponiveis"][0]
-        estado_simulacao["pacientes_disponiveis"] = estado_simulacao["pacientes_disponiveis"][1:]
-        
-        paciente["tempo_chegada"] = tempo_atual
-        
-        estado_simulacao["fila_espera"] = adicionar_a_fila(estado_simulacao["fila_espera"], paciente)
-        
-        estado_simulacao["fila_espera"] = ordenar_fila_por_prioridade(
-            estado_simulacao["fila_espera"], PRIORIDADES
-        )
-        
-        if estado_simulacao["pacientes_disponiveis"]:
-            lambda_chegada = estado_simulacao["lambda_chegada"]
-            lambda_minuto = lambda_chegada / 60.0
-            
-            if lambda_minuto > 0:
-                tempo_medio_entre_chegadas = 1.0 / lambda_minuto
-            else:
-                tempo_medio_entre_chegadas = 60.0
-            
-            proximo_tempo = np.random.exponential(scale=tempo_medio_entre_chegadas)
-            proximo_tempo = max(0.5, proximo_tempo)
-            estado_simulacao["proximo_paciente_tempo"] = tempo_atual + proximo_tempo
-    
-    i = 0
-    while i < len(estado_simulacao["medicos"]):
-        medico = estado_simulacao["medicos"][i]
-        if medico["ocupado"] and tempo_atual >= medico["tempo_fim_consulta"]:
-            finalizar_consulta(medico, tempo_atual)
-        i = i + 1
-    
-    i = 0
-    while i < len(estado_simulacao["medicos"]):
-        medico = estado_simulacao["medicos"][i]
-        
-        if not medico["ocupado"] and not medico["em_pausa"]:
-            if not queue_empty(estado_simulacao["fila_espera"]):
-                finalizar_consulta(medico, tempo_atual)
-        
-        i = i + 1
-    
-    processar_desistencias()
-    
-    coletar_dados_historicos()
-def salvar_resultado_simulacao():
-    resultado = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "configuracao": {
-            "lambda_chegada": estado_simulacao["lambda_chegada"],
-            "tempo_medio_consulta": estado_simulacao["tempo_medio_consulta"],
-            "num_medicos": len(estado_simulacao["medicos"]),
-            "distribuicao": estado_simulacao["distribuicao"],
-            "tempo_simulacao": estado_simulacao["tempo_simulacao"],
-            "frequencia_pausa": estado_simulacao["medicos"][0]["frequencia_pausa"] if estado_simulacao["medicos"] else 0,
-            "duracao_pausa": estado_simulacao["medicos"][0]["duracao_pausa"] if estado_simulacao["medicos"] else 0,
-            "num_pausas": estado_simulacao["medicos"][0]["num_pausas"] if estado_simulacao["medicos"] else 0,
-            "max_pausa_simultanea": estado_simulacao.get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA)
-        },
-        "resultados_finais": {
-            "atendidos": len(estado_simulacao["historico_atendimentos"]),
-            "desistentes": len(estado_simulacao["pacientes_desistentes"]),
-            "taxa_ocupacao_media": np.mean([m["tempo_total_ocupado"] / estado_simulacao["tempo_atual"] * 100 
-                                          for m in estado_simulacao["medicos"]]) if estado_simulacao["tempo_atual"] > 0 else 0,
-            "fila_maxima": max([d["fila_tamanho"] for d in estado_simulacao["dados_historicos"]] + [0]),
-            "tempo_medio_espera": np.mean([d["tempo_medio_espera"] for d in estado_simulacao["dados_historicos"] if d["tempo_medio_espera"] > 0] + [0])
-        },
-        "dados_historicos": estado_simulacao["dados_historicos"].copy()
-    }
-    estado_simulacao["resultados_simulacoes"].append(resultado)
-def iniciar_consulta(medico, paciente, tempo_atual):
-    """Inicia uma consulta - VERSÃO CORRIGIDA"""
-    
-
-    duracao = gera_tempo_consulta(
-        estado_simulacao["tempo_medio_consulta"], 
-        estado_simulacao["distribuicao"]
-    )
-    
-
-    medico["ocupado"] = True
-    medico["paciente_atual"] = paciente["id"]
-    medico["tempo_fim_consulta"] = tempo_atual + duracao
-    medico["num_atendimentos"] = medico["num_atendimentos"] + 1
-    
-
-    especialidade_correta = medico["especialidade"] == paciente.get(
-        "especialidade_necessaria", "Clínica Geral"
-    )
-    
-
-    estado_simulacao["historico_atendimentos"].append({
-        "paciente": paciente["id"],
-        "medico": medico["id"],
-        "inicio": tempo_atual,
-        "duracao": duracao,
-        "especialidade_correta": especialidade_correta
-    })
-
+simulacao_viva = Simulacao()
+estado_simulacao = simulacao_viva.estado
 
 
-def finalizar_consulta(medico, tempo_atual):
-    """Finaliza consulta do médico e procura próximo paciente - VERSÃO CORRIGIDA"""
- 
-    if medico["ocupado"] and medico.get("tempo_fim_consulta", 0) > 0:
-        duracao_consulta = estado_simulacao.get("tempo_medio_consulta", 15)
-        tempo_inicio_consulta = medico["tempo_fim_consulta"] - duracao_consulta
-        duracao_real = tempo_atual - tempo_inicio_consulta
- 
-        if duracao_real > 0:
-            medico["tempo_total_ocupado"] = medico["tempo_total_ocupado"] + duracao_real
-
-    medico["ocupado"] = False
-    medico["paciente_atual"] = None
-    medico["tempo_fim_consulta"] = 0
+def inicializar_simulacao(config):
+    if not simulacao_viva.inicializar(config):
+        sg.popup_error(simulacao_viva.erro)
+        return False
+    return True
 
-    if queue_empty(estado_simulacao["fila_espera"]):
-        return
 
-    tempo_max_espera = estado_simulacao.get("tempo_max_espera", TEMPO_MAX_ESPERA)
-    medico_especialidade = medico["especialidade"]
-    
-    paciente_escolhido = None
-    indice_escolhido = -1
-    
-    idx_busca = 0
-    encontrou_paciente = False
-    
-    while idx_busca < len(estado_simulacao["fila_espera"]) and not encontrou_paciente:
-        paciente = estado_simulacao["fila_espera"][idx_busca]
-        paciente_prioridade = paciente.get("prioridade", "NORMAL")
-        paciente_especialidade = paciente.get("especialidade_necessaria", "Clínica Geral")
-        tempo_chegada = paciente.get("tempo_chegada", tempo_atual)
-        tempo_espera = tempo_atual - tempo_chegada
-        
-        pode_atender = False
+def atualizar_simulacao(incremento_tempo):
+    simulacao_viva.atualizar(incremento_tempo)
 
-        if medico_especialidade == paciente_especialidade:
 
-            tem_maior_prioridade_mesma_especialidade = False
-            j = 0
-            while j < idx_busca and not tem_maior_prioridade_mesma_especialidade:
-                paciente_frente = estado_simulacao["fila_espera"][j]
-                if paciente_frente.get("especialidade_necessaria") == paciente_especialidade:
-                    frente_prioridade = paciente_frente.get("prioridade", "NORMAL")
-                    if PRIORIDADES.get(frente_prioridade, 5) < PRIORIDADES.get(paciente_prioridade, 5):
-                        tem_maior_prioridade_mesma_especialidade = True
-                j = j + 1
-            
-            if not tem_maior_prioridade_mesma_especialidade:
-                pode_atender = True
-        else:
+def executar_simulacao_completa():
+    simulacao_viva.executar_completa()
 
-            if paciente_prioridade == "URGENTE" and tempo_espera > 5:
-                pode_atender = True
-            
-            elif paciente_prioridade == "ALTA" and tempo_espera > (tempo_max_espera / 2):
-                tem_urgente_na_frente = False
-                j = 0
-                while j < idx_busca and not tem_urgente_na_frente:
-                    paciente_frente = estado_simulacao["fila_espera"][j]
-                    if paciente_frente.get("prioridade") == "URGENTE":
-                        tem_urgente_na_frente = True
-                    j = j + 1
-                
-                if not tem_urgente_na_frente:
-                    pode_atender = True
-            
-            elif paciente_prioridade == "NORMAL" and tempo_espera > tempo_max_espera and medico_especialidade == "Clínica Geral":
-                tem_prioridade_na_frente = False
-                j = 0
-                while j < idx_busca and not tem_prioridade_na_frente:
-                    paciente_frente = estado_simulacao["fila_espera"][j]
-                    if paciente_frente.get("prioridade") in ["URGENTE", "ALTA"]:
-                        tem_prioridade_na_frente = True
-                    j = j + 1
-                
-                tem_especialista_da_especialidade = False
-                k = 0
-                while k < len(estado_simulacao["medicos"]) and not tem_especialista_da_especialidade:
-                    outro_medico = estado_simulacao["medicos"][k]
-                    if outro_medico["especialidade"] == paciente_especialidade:
-                        if not outro_medico["ocupado"] and not outro_medico.get("em_pausa", False):
-                            tem_especialista_da_especialidade = True
-                    k = k + 1
-                
-                if not tem_prioridade_na_frente and not tem_especialista_da_especialidade:
-                    pode_atender = True
-        
-        if pode_atender:
-            paciente_escolhido = paciente
-            indice_escolhido = idx_busca
-            encontrou_paciente = True
-        
-        idx_busca = idx_busca + 1
 
-    if paciente_escolhido is not None:
-        nova_fila = []
-        i = 0
-        while i < len(estado_simulacao["fila_espera"]):
-            if i != indice_escolhido:
-                nova_fila.append(estado_simulacao["fila_espera"][i])
-            i = i + 1
-        estado_simulacao["fila_espera"] = nova_fila
-        
-        estado_simulacao["fila_espera"] = ordenar_fila_por_prioridade(
-            estado_simulacao["fila_espera"], PRIORIDADES
-        )
-        
-        iniciar_consulta(medico, paciente_escolhido, tempo_atual)
 def obter_estatisticas():
-    """Obtém estatísticas atuais da simulação - VERSÃO CORRIGIDA"""
-    tempo_atual = estado_simulacao["tempo_atual"]
-    
-    stats = {
-        "tempo_atual": tempo_atual,
-        "tempo_simulacao": estado_simulacao["tempo_simulacao"],
-        "doentes_atendidos": len(estado_simulacao["historico_atendimentos"]),
-        "fila_espera": estado_simulacao["fila_espera"],
-        "fila_len": tamanho_fila(estado_simulacao["fila_espera"]),
-        "medicos": estado_simulacao["medicos"],
-        "desistentes": len(estado_simulacao["pacientes_desistentes"]),
-        "aguardando": len(estado_simulacao["pacientes_disponiveis"])
-    }
-    
+    return simulacao_viva.obter_estatisticas()
 
-    if tempo_atual > 0:
-        taxas_ocupacao = []
-        i = 0
-        while i < len(estado_simulacao["medicos"]):
-            medico = estado_simulacao["medicos"][i]
-            tempo_ocupado = medico["tempo_total_ocupado"]
-            
-            
-            if medico["ocupado"] and medico.get("tempo_fim_consulta", 0) > 0:
-                tempo_medio = estado_simulacao.get("tempo_medio_consulta", 15)
-                tempo_inicio_atual = medico["tempo_fim_consulta"] - tempo_medio
-                tempo_ocupado_atual = tempo_atual - tempo_inicio_atual
-                if tempo_ocupado_atual > 0:
-                    tempo_ocupado = tempo_ocupado + tempo_ocupado_atual
-            
-           
-            taxa = (tempo_ocupado / tempo_atual) * 100
-            taxa = min(100.0, max(0.0, taxa))
-            taxas_ocupacao.append(taxa)
-            i = i + 1
-        
-        stats["taxa_ocupacao"] = np.mean(taxas_ocupacao) if taxas_ocupacao else 0
-    else:
-        stats["taxa_ocupacao"] = 0
 
-    duracoes = []
-    i = 0
-    while i < len(estado_simulacao["historico_atendimentos"]):
-        duracoes.append(estado_simulacao["historico_atendimentos"][i]["duracao"])
-        i = i + 1
-    stats["tempo_medio_consulta"] = np.mean(duracoes) if duracoes else 0
+def finalizar_consulta(medico, tempo_atual):
+    simulacao_viva.finalizar_consulta(medico, tempo_atual)
 
-    atendimentos_especialidade_correta = 0
-    i = 0
-    while i < len(estado_simulacao["historico_atendimentos"]):
-        h = estado_simulacao["historico_atendimentos"][i]
-        if h.get("especialidade_correta", False):
-            atendimentos_especialidade_correta = atendimentos_especialidade_correta + 1
-        i = i + 1
-    
-    total_atendimentos = len(estado_simulacao["historico_atendimentos"])
-    if total_atendimentos > 0:
-        stats["taxa_correspondencia_especialidade"] = (atendimentos_especialidade_correta / total_atendimentos) * 100
-    else:
-        stats["taxa_correspondencia_especialidade"] = 0
 
-    fila_por_especialidade = {}
-    i = 0
-    while i < len(estado_simulacao["fila_espera"]):
-        paciente = estado_simulacao["fila_espera"][i]
-        especialidade = paciente.get("especialidade_necessaria", "Clínica Geral")
-        fila_por_especialidade[especialidade] = fila_por_especialidade.get(especialidade, 0) + 1
-        i = i + 1
-    
-    stats["fila_por_especialidade"] = fila_por_especialidade
-    
-    return stats
-def inicializar_simulacao(config):
-    pessoas = carregar_pacientes_simula()
-    if not pessoas:
-        sg.popup_error("Não foi possível carregar pacientes!")
-        return False
-    
-    medicos_dataset = carregar_medicos_simula()
-    num_medicos = config.get("num_medicos", NUM_MEDICOS)
-    medicos_dataset = medicos_dataset[:num_medicos]
-    
-    lambda_chegada = config.get("lambda_chegada", LAMBDA_CHEGADA)
-    tempo_total = config.get("tempo_simulacao", TEMPO_SIMULACAO)
-    tempo_total_horas = tempo_total / 60.0
-    
-    max_pacientes_dataset = len(pessoas)
+def coletar_dados_historicos():
+    simulacao_viva.coletar_dados_historicos()
 
-    num_esperado_chegadas = lambda_chegada * tempo_total_horas
 
-    num_pacientes_final = min(int(num_esperado_chegadas), max_pacientes_dataset)
+def salvar_resultado_simulacao():
+    simulacao_viva.salvar_resultado()
 
-    if num_esperado_chegadas >= max_pacientes_dataset:
-        num_pacientes_final = max_pacientes_dataset
-    if num_pacientes_final < max_pacientes_dataset:
-        indices = list(range(max_pacientes_dataset))
-        random.shuffle(indices)
-        indices_selecionados = indices[:num_pacientes_final]
-        pessoas_selecionadas = [pessoas[i] for i in indices_selecionados]
-    else:
-        pessoas_selecionadas = pessoas.copy()
-    pessoas_simulacao = []
-    for p in pessoas_selecionadas:
-        p_copy = p.copy()
-        p_copy["consulta_marcada"] = random.random() < 0.3
-        pessoas_simulacao.append(p_copy)
-    
-    estado_simulacao["pessoas_dados"] = {p["id"]: p for p in pessoas_simulacao}
-    
-    estado_simulacao["medicos"] = []
-    for medico_data in medicos_dataset:
-        estado_simulacao["medicos"].append({
-            "id": medico_data.get("id", "m_default"),
-            "nome": medico_data.get("nome", "Médico"),
-            "especialidade": medico_data.get("especialidade", "Geral"),
-            "ocupado": False,
-            "paciente_atual": None,
-            "tempo_fim_consulta": 0,
-            "tempo_total_ocupado": 0,
-            "num_atendimentos": 0,
-            "em_pausa": False,
-            "tempo_fim_pausa": 0,
-            "num_pausas_realizadas": 0,
-            "frequencia_pausa": config.get("frequencia_pausa", PAUSA_FREQUENCIA),
-            "duracao_pausa": config.get("duracao_pausa", DURACAO_PAUSA),
-            "num_pausas": config.get("num_pausas", NUM_PAUSAS),
-            "pausas_realizadas": []
-        })
-    
-    estado_simulacao.update({
-        "fila_espera": [],
-        "historico_atendimentos": [],
-        "tempo_atual": 0,
-        "simulacao_ativa": True,
-        "velocidade": config.get("velocidade", 5.0),
-        "pacientes_disponiveis": pessoas_simulacao,
-        "pacientes_desistentes": [],
-        "lambda_chegada": lambda_chegada,
-        "tempo_medio_consulta": config.get("tempo_medio_consulta", TEMPO_MEDIO_CONSULTA),
-        "tempo_simulacao": config.get("tempo_simulacao", TEMPO_SIMULACAO),
-        "distribuicao": config.get("distribuicao", "exponential"),
-        "dados_historicos": [],
-        "max_pausa_simultanea": config.get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA),
-        "tempo_max_espera": config.get("tempo_max_espera", TEMPO_MAX_ESPERA),
-        "prob_desistencia": config.get("prob_desistencia", PROB_DESISTENCIA)
-    })
-
-    lambda_minuto = lambda_chegada / 60.0
-    if lambda_minuto > 0:
-        tempo_medio_entre_chegadas = 1.0 / lambda_minuto
-    else:
-        tempo_medio_entre_chegadas = 60.0
-    
-    primeiro_tempo = np.random.exponential(scale=tempo_medio_entre_chegadas)
-    primeiro_tempo = max(0.1, primeiro_tempo)
-    estado_simulacao["proximo_paciente_tempo"] = primeiro_tempo
-    
-    return True
 
 # ============================================================================
 # FUNÇÕES DE GRÁFICOS
@@ -2393,106 +1972,21 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
         sg.popup_error("Nenhum dado disponível", title="Erro")
         return
     
-    if not isinstance(dados_historicos, list):
-        sg.popup_error("Dados devem ser uma lista", title="Erro")
-        return
-    
-    
-    dados_validos = 0
-    i = 0
-    while i < len(dados_historicos):
-        item = dados_historicos[i]
-        if isinstance(item, dict):
-            dados_validos = dados_validos + 1
-        i = i + 1
+    if isinstance(dados_historicos, list):
+        dados_historicos = SerieTemporal.de_registos(dados_historicos)
     
+    dados_validos = len(dados_historicos)
     if dados_validos == 0:
         sg.popup_error("Nenhum dado válido encontrado", title="Erro")
         return
     
-    
-    tempos = []
-    fila_tamanhos = []
-    taxas_ocupacao = []
-    atendidos_lista = []
-    desistentes_lista = []
-    tempos_espera = []
-    medicos_pausa_lista = []
-    
-    i = 0
-    while i < len(dados_historicos):
-        registro = dados_historicos[i]
-        if isinstance(registro, dict):
-            
-            tempo_val = registro.get("tempo")
-            if tempo_val is not None:
-                if isinstance(tempo_val, (int, float)):
-                    tempos.append(float(tempo_val))
-                else:
-                    tempos.append(0.0)
-            else:
-                tempos.append(0.0)
-            
-            
-            fila_val = registro.get("fila_tamanho")
-            if fila_val is not None:
-                if isinstance(fila_val, (int, float)):
-                    fila_tamanhos.append(float(fila_val))
-                else:
-                    fila_tamanhos.append(0.0)
-            else:
-                fila_tamanhos.append(0.0)
-            
-            
-            ocupacao_val = registro.get("taxa_ocupacao")
-            if ocupacao_val is not None:
-                if isinstance(ocupacao_val, (int, float)):
-                    taxas_ocupacao.append(float(ocupacao_val))
-                else:
-                    taxas_ocupacao.append(0.0)
-            else:
-                taxas_ocupacao.append(0.0)
-            
-            
-            atendidos_val = registro.get("atendidos")
-            if atendidos_val is not None:
-                if isinstance(atendidos_val, (int, float)):
-                    atendidos_lista.append(int(atendidos_val))
-                else:
-                    atendidos_lista.append(0)
-            else:
-                atendidos_lista.append(0)
-            
-            
-            desistentes_val = registro.get("desistentes")
-            if desistentes_val is not None:
-                if isinstance(desistentes_val, (int, float)):
-                    desistentes_lista.append(int(desistentes_val))
-                else:
-                    desistentes_lista.append(0)
-            else:
-                desistentes_lista.append(0)
-            
-            
-            espera_val = registro.get("tempo_medio_espera")
-            if espera_val is not None:
-                if isinstance(espera_val, (int, float)):
-                    tempos_espera.append(float(espera_val))
-                else:
-                    tempos_espera.append(0.0)
-            else:
-                tempos_espera.append(0.0)
-            
-            
-            pausa_val = registro.get("medicos_em_pausa")
-            if pausa_val is not None:
-                if isinstance(pausa_val, (int, float)):
-                    medicos_pausa_lista.append(float(pausa_val))
-                else:
-                    medicos_pausa_lista.append(0.0)
-            else:
-                medicos_pausa_lista.append(0.0)
-        i = i + 1
+    tempos = dados_historicos.coluna("tempo")
+    fila_tamanhos = dados_historicos.coluna("fila_tamanho")
+    taxas_ocupacao = dados_historicos.coluna("taxa_ocupacao")
+    atendidos_lista = dados_historicos.coluna("atendidos")
+    desistentes_lista = dados_historicos.coluna("desistentes")
+    tempos_espera = dados_historicos.coluna("tempo_medio_espera")
+    medicos_pausa_lista = dados_historicos.coluna("medicos_em_pausa")
     
     if len(tempos) < 2:
         sg.popup_error("Dados insuficientes. Precisa de pelo menos 2 pontos", title="Erro")
@@ -2534,32 +2028,16 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
         conteudo.append("=" * 80)
         
         
-        if tempos:
-            conteudo.append(f"Tempo total: {tempos[-1]:.1f} minutos")
-        
-        if fila_tamanhos:
-            max_fila = max(fila_tamanhos)
-            media_fila = np.mean(fila_tamanhos)
-            conteudo.append(f"Fila máxima: {max_fila:.0f} pacientes")
-            conteudo.append(f"Fila média: {media_fila:.1f} pacientes")
-        
-        if taxas_ocupacao:
-            media_ocupacao = np.mean(taxas_ocupacao)
-            conteudo.append(f"Ocupação média: {media_ocupacao:.1f}%")
+        conteudo.append(f"Tempo total: {tempos[-1]:.1f} minutos")
+        conteudo.append(f"Fila máxima: {fila_tamanhos.max():.0f} pacientes")
+        conteudo.append(f"Fila média: {fila_tamanhos.mean():.1f} pacientes")
+        conteudo.append(f"Ocupação média: {taxas_ocupacao.mean():.1f}%")
+        conteudo.append(f"Total atendidos: {atendidos_lista[-1]}")
+        conteudo.append(f"Total desistentes: {desistentes_lista[-1]}")
         
-        if atendidos_lista:
-            total_atendidos = atendidos_lista[-1] if atendidos_lista else 0
-            conteudo.append(f"Total atendidos: {total_atendidos}")
-        
-        if desistentes_lista:
-            total_desistentes = desistentes_lista[-1] if desistentes_lista else 0
-            conteudo.append(f"Total desistentes: {total_desistentes}")
-        
-        if tempos_espera:
-            tempos_positivos = [t for t in tempos_espera if t > 0]
-            if tempos_positivos:
-                media_espera = np.mean(tempos_positivos)
-                conteudo.append(f"Espera média: {media_espera:.1f} minutos")
+        tempos_positivos = tempos_espera[tempos_espera > 0]
+        if len(tempos_positivos):
+            conteudo.append(f"Espera média: {tempos_positivos.mean():.1f} minutos")
         
         conteudo.append("")
         conteudo.append("INFORMAÇÕES ADICIONAIS")
@@ -2631,19 +2109,9 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
     ax1 = fig1.add_subplot(111)
     
     
-    tempos_fila = tempos
-    fila_tamanhos_plot = fila_tamanhos
-    if len(tempos) > 1000:
-        passo = len(tempos) // 1000
-        tempos_novos = []
-        fila_novos = []
-        i = 0
-        while i < len(tempos):
-            tempos_novos.append(tempos[i])
-            fila_novos.append(fila_tamanhos[i])
-            i = i + passo
-        tempos_fila = tempos_novos
-        fila_tamanhos_plot = fila_novos
+    passo = max(1, len(tempos) // 1000)
+    tempos_fila = tempos[::passo]
+    fila_tamanhos_plot = fila_tamanhos[::passo]
     
     ax1.plot(tempos_fila, fila_tamanhos_plot, 'b-', linewidth=2)
     ax1.set_xlabel('Tempo (minutos)', fontsize=11)
@@ -2651,9 +2119,8 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
     ax1.set_title('Tamanho da Fila', fontsize=13, fontweight='bold')
     ax1.grid(True, alpha=0.3)
     
-    if fila_tamanhos_plot:
-        max_fila = max(fila_tamanhos_plot)
-        ax1.set_ylim(0, max(1, max_fila * 1.1))
+    max_fila = fila_tamanhos_plot.max()
+    ax1.set_ylim(0, max(1, max_fila * 1.1))
     
     fig1.tight_layout()
     canvas1 = fig_tk.FigureCanvasTkAgg(fig1, window["-CANVAS_FILA-"].TKCanvas)
@@ -2664,12 +2131,7 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
     fig2 = Figure(figsize=(8, 5), dpi=100)
     ax2 = fig2.add_subplot(111)
     
-    taxas_ocupacao_plot = taxas_ocupacao
-    tempos_ocup = tempos
-    if len(tempos) > len(taxas_ocupacao):
-        tempos_ocup = tempos[:len(taxas_ocupacao)]
-    
-    ax2.plot(tempos_ocup, taxas_ocupacao_plot, 'r-', linewidth=2)
+    ax2.plot(tempos, taxas_ocupacao, 'r-', linewidth=2)
     ax2.set_xlabel('Tempo (minutos)', fontsize=11)
     ax2.set_ylabel('Taxa de Ocupação (%)', fontsize=11)
     ax2.set_title('Taxa de Ocupação', fontsize=13, fontweight='bold')
@@ -2685,18 +2147,8 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
     fig3 = Figure(figsize=(8, 5), dpi=100)
     ax3 = fig3.add_subplot(111)
     
-    atendidos_plot = atendidos_lista
-    desistentes_plot = desistentes_lista
-    tempos_atend = tempos
-    
-    tamanho_min = min(len(tempos), len(atendidos_plot), len(desistentes_plot))
-    if tamanho_min > 0:
-        tempos_atend = tempos[:tamanho_min]
-        atendidos_plot = atendidos_plot[:tamanho_min]
-        desistentes_plot = desistentes_plot[:tamanho_min]
-    
-    ax3.plot(tempos_atend, atendidos_plot, 'g-', linewidth=2, label='Atendidos')
-    ax3.plot(tempos_atend, desistentes_plot, 'r--', linewidth=2, label='Desistentes')
+    ax3.plot(tempos, atendidos_lista, 'g-', linewidth=2, label='Atendidos')
+    ax3.plot(tempos, desistentes_lista, 'r--', linewidth=2, label='Desistentes')
     ax3.set_xlabel('Tempo (minutos)', fontsize=11)
     ax3.set_ylabel('Número de Pacientes', fontsize=11)
     ax3.set_title('Atendidos vs Desistentes', fontsize=13, fontweight='bold')
@@ -2713,16 +2165,11 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
     ax4 = fig4.add_subplot(111)
     
     
-    tempos_espera_positivos = []
-    tempos_filtrados = []
-    i = 0
-    while i < len(tempos_espera):
-        if i < len(tempos) and tempos_espera[i] > 0:
-            tempos_espera_positivos.append(tempos_espera[i])
-            tempos_filtrados.append(tempos[i])
-        i = i + 1
+    com_espera = tempos_espera > 0
+    tempos_espera_positivos = tempos_espera[com_espera]
+    tempos_filtrados = tempos[com_espera]
     
-    if tempos_espera_positivos:
+    if len(tempos_espera_positivos):
         ax4.plot(tempos_filtrados, tempos_espera_positivos, 'm-', linewidth=2)
     
     ax4.set_xlabel('Tempo (minutos)', fontsize=11)
@@ -2730,8 +2177,8 @@ def mostrar_graficos_simulacao(dados_historicos, titulo_simulacao):
     ax4.set_title('Tempo Médio de Espera', fontsize=13, fontweight='bold')
     ax4.grid(True, alpha=0.3)
     
-    if tempos_espera_positivos:
-        max_espera = max(tempos_espera_positivos)
+    if len(tempos_espera_positivos):
+        max_espera = tempos_espera_positivos.max()
         ax4.set_ylim(0, max(1, max_espera * 1.2))
     else:
         ax4.set_ylim(0, 30)
@@ -2847,6 +2294,111 @@ def gerar_graficos():
                 continuar = False
     
     window.close()
+NOMES_METRICAS = {
+    "atendidos": "Pacientes atendidos",
+    "desistentes": "Pacientes desistentes",
+    "taxa_ocupacao_media": "Taxa ocupação média (%)",
+    "tempo_medio_espera": "Tempo médio espera (min)",
+    "fila_media": "Fila média",
+    "fila_maxima": "Fila máxima"
+}
+
+
+def valor_resultado(sim, metrica):
+    """Média das replicações, se a simulação foi replicada; senão o valor da corrida única"""
+    estatisticas = sim.get("estatisticas_replicacoes")
+    if estatisticas:
+        return estatisticas[metrica]["media"]
+    return sim["resultados_finais"].get(metrica, 0)
+
+
+def meia_largura_resultado(sim, metrica):
+    estatisticas = sim.get("estatisticas_replicacoes")
+    if estatisticas:
+        return estatisticas[metrica]["meia_largura"]
+    return 0.0
+
+
+def quantis_resultado(sim):
+    """Esboços de quantis combinados das replicações, ou os da corrida única (None em resultados antigos)"""
+    return sim.get("quantis_replicacoes") or sim.get("quantis")
+
+
+def quantil_espera(sim, q):
+    quantis = quantis_resultado(sim)
+    if not quantis:
+        return 0.0
+    return quantis["espera"]["geral"].quantil(q)
+
+
+def linhas_quantis(quantis):
+    """Linhas de relatório com p50/p90/p95/p99 da espera e da fila na chegada (a que cada paciente encontra)"""
+    if not quantis:
+        return []
+    nomes = " / ".join(f"p{int(round(q * 100))}" for q in QUANTIS_RELATORIO)
+    titulos = {"espera": "Tempo de espera (min)", "fila": "Fila na chegada (pacientes à frente de quem chega)"}
+    linhas = []
+    for medida, grupo in resumir_quantis(quantis).items():
+        linhas.append(f"{titulos.get(medida, medida)} - {nomes}:")
+        grupos = [("Geral", grupo["geral"])]
+        grupos.extend((f"Prioridade {chave}", resumo) for chave, resumo in sorted(grupo["prioridade"].items()))
+        grupos.extend((str(chave), resumo) for chave, resumo in sorted(grupo["especialidade"].items()))
+        for nome, resumo in grupos:
+            valores = " / ".join(f"{resumo[f'p{int(round(q * 100))}']:.1f}" for q in QUANTIS_RELATORIO)
+            linhas.append(f"  {nome[:28]:<28} {valores}  (n={resumo['n']})")
+    return linhas
+
+
+def replicar_simulacoes(window, indices, num_replicacoes, num_processos):
+    """Corre num_replicacoes de cada simulação guardada, em processos, e guarda o resumo com IC 95%.
+
+    Todas as simulações usam as mesmas sementes por replicação (números aleatórios comuns).
+    Devolve False se o utilizador fechar a janela ou houver erro.
+    """
+    resultados = estado_simulacao["resultados_simulacoes"]
+    semente_base = int(np.random.SeedSequence().generate_state(1)[0])
+    
+    tarefas = {}
+    por_simulacao = {idx: [] for idx in indices}
+    erro = None
+    cancelado = False
+    executor = criar_executor(num_processos)
+    try:
+        for idx in indices:
+            for replicacao in range(num_replicacoes):
+                tarefa = (resultados[idx]["configuracao"], semente_replicacao(semente_base, replicacao))
+                tarefas[executor.submit(executar_resultados_finais, tarefa)] = idx
+        
+        pendentes = set(tarefas)
+        total = len(pendentes)
+        while pendentes and not cancelado and erro is None:
+            terminados, pendentes = wait(pendentes, timeout=0.1, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                try:
+                    por_simulacao[tarefas[futuro]].append(futuro.result())
+                except Exception as e:
+                    erro = str(e)
+            
+            window["-STATUS_COMP-"].update(f"Replicações: {total - len(pendentes)} de {total}...")
+            event, _ = window.read(timeout=0)
+            if event in (sg.WINDOW_CLOSED, "Fechar"):
+                cancelado = True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    if erro:
+        sg.popup_error(erro, title="Erro")
+    if erro or cancelado:
+        return False
+    
+    for idx in indices:
+        resultados[idx]["num_replicacoes"] = num_replicacoes
+        resultados[idx]["semente_replicacoes"] = semente_base
+        resultados[idx]["estatisticas_replicacoes"] = resumir_replicacoes(por_simulacao[idx])
+        resultados[idx]["quantis_replicacoes"] = combinar_quantis([f.get("quantis") for f in por_simulacao[idx]])
+    return True
+
+
 def comparar_simulacoes():
     """Comparar simulações com gráficos completos por abas - VERSÃO CORRIGIDA"""
     resultados = estado_simulacao.get("resultados_simulacoes", [])
@@ -2871,6 +2423,8 @@ def comparar_simulacoes():
             data_formatada = timestamp[:16]
         
         texto = f"[{i+1}] λ={config.get('lambda_chegada', 0):.1f} M={config.get('num_medicos', 0)} {data_formatada}"
+        if sim.get("estatisticas_replicacoes"):
+            texto += f" ({sim['num_replicacoes']} replicações)"
         simulacoes_lista.append(texto)
         i = i + 1
     
@@ -2878,6 +2432,10 @@ def comparar_simulacoes():
         [sg.Text("Comparar Simulações", font=("Helvetica", 16), justification="center", expand_x=True)],
         [sg.Text("Selecione 2 ou mais simulações para comparar:")],
         [sg.Listbox(simulacoes_lista, size=(90, 8), key="-LISTA-", select_mode=sg.LISTBOX_SELECT_MODE_MULTIPLE)],
+        [sg.Text("Replicações:"), sg.Input("10", key="-REPLICACOES_COMP-", size=(6,1)),
+         sg.Text("Processos:"), sg.Input(str(os.cpu_count() or 1), key="-PROCESSOS_COMP-", size=(6,1)),
+         sg.Button("Replicar Selecionadas", size=(20,1), button_color=('white', escuro)),
+         sg.Text("", key="-STATUS_COMP-", size=(40,1))],
         [sg.Button("Comparar Gráficos", size=(18,1), button_color=('white', escuro)),
          sg.Button("Comparar Relatório", size=(18,1), button_color=('white', escuro)),
          sg.Button("Fechar", size=(12,1), button_color=('white', escuro))]
@@ -2894,6 +2452,26 @@ def comparar_simulacoes():
         if event_selecao in (sg.WINDOW_CLOSED, "Fechar"):
             continuar_selecao = False
         
+        elif event_selecao == "Replicar Selecionadas":
+            indices_replicar = [simulacoes_lista.index(s) for s in values_selecao["-LISTA-"]]
+            try:
+                num_replicacoes = int(values_selecao["-REPLICACOES_COMP-"])
+                num_processos = max(1, int(values_selecao["-PROCESSOS_COMP-"]))
+            except ValueError:
+                num_replicacoes = 0
+                num_processos = 1
+            
+            if not indices_replicar:
+                sg.popup_error("Selecione pelo menos 1 simulação!", title="Erro")
+            elif num_replicacoes < 2:
+                sg.popup_error("São precisas pelo menos 2 replicações!", title="Erro")
+            elif replicar_simulacoes(window_selecao, indices_replicar, num_replicacoes, num_processos):
+                for idx in indices_replicar:
+                    sim = resultados[idx]
+                    simulacoes_lista[idx] = simulacoes_lista[idx].split(" (")[0] + f" ({sim['num_replicacoes']} replicações)"
+                window_selecao["-LISTA-"].update(simulacoes_lista)
+                window_selecao["-STATUS_COMP-"].update("Replicações concluídas.")
+        
         elif event_selecao == "Comparar Gráficos":
             if not values_selecao["-LISTA-"] or len(values_selecao["-LISTA-"]) < 2:
                 sg.popup_error("Selecione pelo menos 2 simulações!", title="Erro")
@@ -2971,64 +2549,15 @@ def comparar_simulacoes():
     while i < len(simulacoes):
         sim = simulacoes[i]
         dados = sim.get("dados_historicos", [])
+        if isinstance(dados, list):
+            dados = SerieTemporal.de_registos(dados)
         
-        tempos = []
-        fila_tamanhos = []
-        taxas_ocupacao = []
-        atendidos_lista = []
-        desistentes_lista = []
-        tempos_espera = []
-        
-        dados_idx = 0
-        while dados_idx < len(dados):
-            registro = dados[dados_idx]
-            if isinstance(registro, dict):
-
-                tempo_val = registro.get("tempo")
-                if tempo_val is not None and isinstance(tempo_val, (int, float)):
-                    tempos.append(float(tempo_val))
-                else:
-                    tempos.append(0.0)
-
-                fila_val = registro.get("fila_tamanho")
-                if fila_val is not None and isinstance(fila_val, (int, float)):
-                    fila_tamanhos.append(float(fila_val))
-                else:
-                    fila_tamanhos.append(0.0)
-                
-
-                ocupacao_val = registro.get("taxa_ocupacao")
-                
-                if ocupacao_val is not None and isinstance(ocupacao_val, (int, float)):
-
-                    ocupacao_val = float(ocupacao_val)
-                    ocupacao_val = min(100.0, max(0.0, ocupacao_val))
-                    taxas_ocupacao.append(ocupacao_val)
-                else:
-
-                    taxas_ocupacao.append(0.0)
-
-                atendidos_val = registro.get("atendidos")
-                if atendidos_val is not None and isinstance(atendidos_val, (int, float)):
-                    atendidos_lista.append(int(atendidos_val))
-                else:
-                    atendidos_lista.append(0)
-                
-
-                desistentes_val = registro.get("desistentes")
-                if desistentes_val is not None and isinstance(desistentes_val, (int, float)):
-                    desistentes_lista.append(int(desistentes_val))
-                else:
-                    desistentes_lista.append(0)
-               
-
-                espera_val = registro.get("tempo_medio_espera")
-                if espera_val is not None and isinstance(espera_val, (int, float)):
-                    tempos_espera.append(float(espera_val))
-                else:
-                    tempos_espera.append(0.0)
-            
-            dados_idx = dados_idx + 1
+        tempos = dados.coluna("tempo")
+        fila_tamanhos = dados.coluna("fila_tamanho")
+        taxas_ocupacao = np.clip(dados.coluna("taxa_ocupacao"), 0.0, 100.0)
+        atendidos_lista = dados.coluna("atendidos")
+        desistentes_lista = dados.coluna("desistentes")
+        tempos_espera = dados.coluna("tempo_medio_espera")
         
         dados_por_simulacao.append({
             "tempos": tempos,
@@ -3094,20 +2623,9 @@ def comparar_simulacoes():
     i = 0
     while i < len(dados_por_simulacao):
         dados = dados_por_simulacao[i]
-        tempos = dados["tempos"]
-        fila_tamanhos = dados["fila_tamanhos"]
-        
-        if len(tempos) > 200:
-            tempos_reduzidos = []
-            fila_reduzida = []
-            passo = len(tempos) // 200
-            j = 0
-            while j < len(tempos):
-                tempos_reduzidos.append(tempos[j])
-                fila_reduzida.append(fila_tamanhos[j])
-                j = j + passo
-            tempos = tempos_reduzidos
-            fila_tamanhos = fila_reduzida
+        passo = max(1, len(dados["tempos"]) // 200)
+        tempos = dados["tempos"][::passo]
+        fila_tamanhos = dados["fila_tamanhos"][::passo]
         
         ax1.plot(tempos, fila_tamanhos, color=dados["cor"], linewidth=2, label=dados["legenda"])
         i = i + 1
@@ -3130,40 +2648,12 @@ def comparar_simulacoes():
     i = 0
     while i < len(dados_por_simulacao):
         dados = dados_por_simulacao[i]
-        tempos = dados["tempos"]
-        taxas_ocupacao = dados["taxas_ocupacao"]
+        passo = max(1, len(dados["tempos"]) // 200)
+        tempos = dados["tempos"][::passo]
+        taxas_ocupacao = dados["taxas_ocupacao"][::passo]
         
-
-        tamanho_min = min(len(tempos), len(taxas_ocupacao))
-        if tamanho_min > 0:
-            tempos_ajustados = tempos[:tamanho_min]
-            ocupacao_ajustada = taxas_ocupacao[:tamanho_min]
-            
-
-            ocupacao_validada = []
-            j = 0
-            while j < len(ocupacao_ajustada):
-                val = ocupacao_ajustada[j]
-                val = min(100.0, max(0.0, float(val)))
-                ocupacao_validada.append(val)
-                j = j + 1
-            
-
-            if len(tempos_ajustados) > 200:
-                tempos_reduzidos = []
-                ocupacao_reduzida = []
-                passo = len(tempos_ajustados) // 200
-                j = 0
-                while j < len(tempos_ajustados):
-                    tempos_reduzidos.append(tempos_ajustados[j])
-                    ocupacao_reduzida.append(ocupacao_validada[j])
-                    j = j + passo
-                tempos_ajustados = tempos_reduzidos
-                ocupacao_validada = ocupacao_reduzida
-            
-
-            if tempos_ajustados and ocupacao_validada:
-                ax2.plot(tempos_ajustados, ocupacao_validada, color=dados["cor"], linewidth=2, label=dados["legenda"])
+        if len(tempos):
+            ax2.plot(tempos, taxas_ocupacao, color=dados["cor"], linewidth=2, label=dados["legenda"])
         
         i = i + 1
     
@@ -3186,27 +2676,12 @@ def comparar_simulacoes():
     i = 0
     while i < len(dados_por_simulacao):
         dados = dados_por_simulacao[i]
-        tempos = dados["tempos"]
-        atendidos = dados["atendidos_lista"]
-        
-        tamanho_min = min(len(tempos), len(atendidos))
-        if tamanho_min > 0:
-            tempos_ajustados = tempos[:tamanho_min]
-            atendidos_ajustados = atendidos[:tamanho_min]
-        
-            if len(tempos_ajustados) > 200:
-                tempos_reduzidos = []
-                atendidos_reduzidos = []
-                passo = len(tempos_ajustados) // 200
-                j = 0
-                while j < len(tempos_ajustados):
-                    tempos_reduzidos.append(tempos_ajustados[j])
-                    atendidos_reduzidos.append(atendidos_ajustados[j])
-                    j = j + passo
-                tempos_ajustados = tempos_reduzidos
-                atendidos_ajustados = atendidos_reduzidos
-            
-            ax3.plot(tempos_ajustados, atendidos_ajustados, color=dados["cor"], linewidth=2, label=dados["legenda"])
+        passo = max(1, len(dados["tempos"]) // 200)
+        tempos = dados["tempos"][::passo]
+        atendidos = dados["atendidos_lista"][::passo]
+        
+        if len(tempos):
+            ax3.plot(tempos, atendidos, color=dados["cor"], linewidth=2, label=dados["legenda"])
         
         i = i + 1
     
@@ -3228,32 +2703,13 @@ def comparar_simulacoes():
     i = 0
     while i < len(dados_por_simulacao):
         dados = dados_por_simulacao[i]
-        tempos = dados["tempos"]
-        tempos_espera = dados["tempos_espera"]
-
-        tempos_filtrados = []
-        espera_filtrada = []
-        j = 0
-        while j < len(tempos_espera):
-            if j < len(tempos) and tempos_espera[j] > 0:
-                tempos_filtrados.append(tempos[j])
-                espera_filtrada.append(tempos_espera[j])
-            j = j + 1
+        com_espera = dados["tempos_espera"] > 0
+        tempos_filtrados = dados["tempos"][com_espera]
+        espera_filtrada = dados["tempos_espera"][com_espera]
         
-        if tempos_filtrados:
-            if len(tempos_filtrados) > 200:
-                tempos_reduzidos = []
-                espera_reduzida = []
-                passo = len(tempos_filtrados) // 200
-                k = 0
-                while k < len(tempos_filtrados):
-                    tempos_reduzidos.append(tempos_filtrados[k])
-                    espera_reduzida.append(espera_filtrada[k])
-                    k = k + passo
-                tempos_filtrados = tempos_reduzidos
-                espera_filtrada = espera_reduzida
-            
-            ax4.plot(tempos_filtrados, espera_filtrada, color=dados["cor"], linewidth=2, label=dados["legenda"])
+        if len(tempos_filtrados):
+            passo = max(1, len(tempos_filtrados) // 200)
+            ax4.plot(tempos_filtrados[::passo], espera_filtrada[::passo], color=dados["cor"], linewidth=2, label=dados["legenda"])
         
         i = i + 1
     
@@ -3277,17 +2733,24 @@ def comparar_simulacoes():
     desistentes_finais = []
     ocupacao_media = []
     tempo_espera_medio = []
+    erros_atendidos = []
+    erros_desistentes = []
+    erros_ocupacao = []
+    erros_espera = []
     
     i = 0
     while i < len(simulacoes):
         sim = simulacoes[i]
-        resultados = sim.get("resultados_finais", {})
         
         nomes_simulacoes.append(f"Sim {i+1}")
-        atendidos_finais.append(resultados.get("atendidos", 0))
-        desistentes_finais.append(resultados.get("desistentes", 0))
-
-        ocupacao_val = resultados.get("taxa_ocupacao_media", 0)
+        atendidos_finais.append(valor_resultado(sim, "atendidos"))
+        desistentes_finais.append(valor_resultado(sim, "desistentes"))
+        erros_atendidos.append(meia_largura_resultado(sim, "atendidos"))
+        erros_desistentes.append(meia_largura_resultado(sim, "desistentes"))
+        erros_ocupacao.append(meia_largura_resultado(sim, "taxa_ocupacao_media"))
+        erros_espera.append(meia_largura_resultado(sim, "tempo_medio_espera"))
+
+        ocupacao_val = valor_resultado(sim, "taxa_ocupacao_media")
         if isinstance(ocupacao_val, (int, float)):
             ocupacao_val = float(ocupacao_val)
             ocupacao_val = min(100.0, max(0.0, ocupacao_val))
@@ -3295,7 +2758,7 @@ def comparar_simulacoes():
         else:
             ocupacao_media.append(0.0)
         
-        tempo_espera = resultados.get("tempo_medio_espera", 0)
+        tempo_espera = valor_resultado(sim, "tempo_medio_espera")
         if isinstance(tempo_espera, (int, float)):
             tempo_espera_medio.append(float(tempo_espera))
         else:
@@ -3306,22 +2769,26 @@ def comparar_simulacoes():
     x = np.arange(len(nomes_simulacoes))
     largura = 0.2
     
-    ax5.bar(x - largura*1.5, atendidos_finais, largura, label='Atendidos', color='green', alpha=0.7)
-    ax5.bar(x - largura*0.5, desistentes_finais, largura, label='Desistentes', color='red', alpha=0.7)
-    ax5.bar(x + largura*0.5, ocupacao_media, largura, label='Ocupação Média (%)', color=escuro, alpha=0.7)
-    ax5.bar(x + largura*1.5, tempo_espera_medio, largura, label='Espera Média (min)', color='orange', alpha=0.7)
+    # Nas simulações replicadas as barras são médias e as barras de erro o IC a 95%
+    ax5.bar(x - largura*1.5, atendidos_finais, largura, yerr=erros_atendidos, capsize=3, label='Atendidos', color='green', alpha=0.7)
+    ax5.bar(x - largura*0.5, desistentes_finais, largura, yerr=erros_desistentes, capsize=3, label='Desistentes', color='red', alpha=0.7)
+    ax5.bar(x + largura*0.5, ocupacao_media, largura, yerr=erros_ocupacao, capsize=3, label='Ocupação Média (%)', color=escuro, alpha=0.7)
+    ax5.bar(x + largura*1.5, tempo_espera_medio, largura, yerr=erros_espera, capsize=3, label='Espera Média (min)', color='orange', alpha=0.7)
     
     ax5.set_xlabel('Simulação')
     ax5.set_ylabel('Valores')
-    ax5.set_title('Resumo Comparativo Final')
+    if any(sim.get("estatisticas_replicacoes") for sim in simulacoes):
+        ax5.set_title('Resumo Comparativo Final (médias das replicações, IC 95%)')
+    else:
+        ax5.set_title('Resumo Comparativo Final')
     ax5.set_xticks(x)
     ax5.set_xticklabels(nomes_simulacoes)
     ax5.legend()
     ax5.grid(True, alpha=0.3, axis='y')
 
     for idx, (atend, desist, ocup, espera) in enumerate(zip(atendidos_finais, desistentes_finais, ocupacao_media, tempo_espera_medio)):
-        ax5.text(idx - largura*1.5, atend + 1, str(atend), ha='center', fontsize=9)
-        ax5.text(idx - largura*0.5, desist + 0.5, str(desist), ha='center', fontsize=9)
+        ax5.text(idx - largura*1.5, atend + 1, f"{atend:.0f}", ha='center', fontsize=9)
+        ax5.text(idx - largura*0.5, desist + 0.5, f"{desist:.0f}", ha='center', fontsize=9)
         ax5.text(idx + largura*0.5, ocup + 1, f"{ocup:.0f}%", ha='center', fontsize=9)
         ax5.text(idx + largura*1.5, espera + 0.5, f"{espera:.0f}", ha='center', fontsize=9)
     
@@ -3339,19 +2806,22 @@ def comparar_simulacoes():
             continuar_principal = False
         
         elif event_principal == "Exportar Dados":
-            dados_texto = "Simulação;Atendidos;Desistentes;Ocupação Média;Espera Média;Fila Máxima\n"
+            dados_texto = "Simulação;Replicações;Atendidos;Desistentes;Ocupação Média;Espera Média;IC95 Espera;P90 Espera;P95 Espera;Fila Máxima\n"
             i = 0
             while i < len(simulacoes):
                 sim = simulacoes[i]
                 config = sim["configuracao"]
-                resultados = sim["resultados_finais"]
                 
                 dados_texto += f"Sim{i+1}_λ={config.get('lambda_chegada', 0):.1f};"
-                dados_texto += f"{resultados.get('atendidos', 0)};"
-                dados_texto += f"{resultados.get('desistentes', 0)};"
-                dados_texto += f"{resultados.get('taxa_ocupacao_media', 0):.1f}%;"
-                dados_texto += f"{resultados.get('tempo_medio_espera', 0):.1f};"
-                dados_texto += f"{resultados.get('fila_maxima', 0)}\n"
+                dados_texto += f"{sim.get('num_replicacoes', 1)};"
+                dados_texto += f"{valor_resultado(sim, 'atendidos'):.1f};"
+                dados_texto += f"{valor_resultado(sim, 'desistentes'):.1f};"
+                dados_texto += f"{valor_resultado(sim, 'taxa_ocupacao_media'):.1f}%;"
+                dados_texto += f"{valor_resultado(sim, 'tempo_medio_espera'):.1f};"
+                dados_texto += f"±{meia_largura_resultado(sim, 'tempo_medio_espera'):.2f};"
+                dados_texto += f"{quantil_espera(sim, 0.9):.1f};"
+                dados_texto += f"{quantil_espera(sim, 0.95):.1f};"
+                dados_texto += f"{valor_resultado(sim, 'fila_maxima'):.1f}\n"
                 
                 i = i + 1
             
@@ -3399,37 +2869,16 @@ def gerar_graficos_comparativos(indices):
         sim = simulacoes[i]
         config = sim["configuracao"]
         dados = sim["dados_historicos"]
+        if isinstance(dados, list):
+            dados = SerieTemporal.de_registos(dados)
         
+        tempos = dados.coluna("tempo")
+        fila_tamanhos = dados.coluna("fila_tamanho")
         
-        tempos = []
-        fila_tamanhos = []
-        
-        dados_idx = 0
-        while dados_idx < len(dados):
-            registro = dados[dados_idx]
-            if isinstance(registro, dict):
-                tempo_val = registro.get("tempo")
-                fila_val = registro.get("fila_tamanho")
-                
-                if tempo_val is not None and fila_val is not None:
-                    if isinstance(tempo_val, (int, float)) and isinstance(fila_val, (int, float)):
-                        tempos.append(float(tempo_val))
-                        fila_tamanhos.append(float(fila_val))
-            
-            dados_idx = dados_idx + 1
-        
-        if tempos and fila_tamanhos:
-           
+        if len(tempos):
             if len(tempos) > 500:
-                tempos_red = []
-                fila_red = []
-                j = 0
-                while j < len(tempos):
-                    tempos_red.append(tempos[j])
-                    fila_red.append(fila_tamanhos[j])
-                    j = j + 2  
-                tempos = tempos_red
-                fila_tamanhos = fila_red
+                tempos = tempos[::2]
+                fila_tamanhos = fila_tamanhos[::2]
             
             label = f"λ={config.get('lambda_chegada', 0):.1f}"
             cor = cores[i % len(cores)]
@@ -3476,12 +2925,27 @@ def mostrar_relatorio_comparativo(indices_simulacoes):
         relatorio.append(f"Tempo simulação: {config['tempo_simulacao']} min")
         relatorio.append(f"Pausas: {config.get('num_pausas', 0)} pausas de {config.get('duracao_pausa', 0)} min")
         relatorio.append(f"Máx. médicos em pausa simultânea: {config.get('max_pausa_simultanea', 2)}")
+        relatorio.append(f"Semente: {config.get('semente', '-')}")
         relatorio.append("\nRESULTADOS:")
         relatorio.append(f"- Pacientes atendidos: {resultados['atendidos']}")
         relatorio.append(f"- Pacientes desistentes: {resultados['desistentes']}")
         relatorio.append(f"- Taxa ocupação média: {resultados['taxa_ocupacao_media']:.1f}%")
         relatorio.append(f"- Fila máxima: {resultados['fila_maxima']} pacientes")
+        if "fila_media" in resultados:
+            relatorio.append(f"- Fila média: {resultados['fila_media']:.2f} pacientes")
         relatorio.append(f"- Tempo médio espera: {resultados['tempo_medio_espera']:.1f} min")
+        
+        estatisticas = simulacao.get("estatisticas_replicacoes")
+        if estatisticas:
+            relatorio.append(f"\nREPLICAÇÕES ({simulacao['num_replicacoes']}, média ± IC 95%):")
+            for metrica in METRICAS_RESULTADO:
+                resumo = estatisticas[metrica]
+                relatorio.append(f"- {NOMES_METRICAS[metrica]}: {resumo['media']:.2f} ± {resumo['meia_largura']:.2f} "
+                                 f"(dp {resumo['desvio_padrao']:.2f}; IC [{resumo['ic95'][0]:.2f}, {resumo['ic95'][1]:.2f}])")
+        quantis = quantis_resultado(simulacao)
+        if quantis:
+            relatorio.append("\nQUANTIS" + (" (todas as replicações)" if simulacao.get("quantis_replicacoes") else "") + ":")
+            relatorio.extend(linhas_quantis(quantis))
         relatorio.append("-" * 50)
     
     relatorio.append("\n\nANÁLISE COMPARATIVA:")
@@ -3491,25 +2955,33 @@ def mostrar_relatorio_comparativo(indices_simulacoes):
     for idx in indices_simulacoes:
         simulacoes_selecionadas.append(estado_simulacao["resultados_simulacoes"][idx])
     
-    melhor_atendimento = max(simulacoes_selecionadas, key=lambda x: x["resultados_finais"]["atendidos"])
+    melhor_atendimento = max(simulacoes_selecionadas, key=lambda x: valor_resultado(x, "atendidos"))
     idx_melhor = simulacoes_selecionadas.index(melhor_atendimento)
     
-    relatorio.append(f"• Melhor taxa de atendimento: Simulação {idx_melhor + 1} ({melhor_atendimento['resultados_finais']['atendidos']} pacientes)")
+    relatorio.append(f"• Melhor taxa de atendimento: Simulação {idx_melhor + 1} ({valor_resultado(melhor_atendimento, 'atendidos'):.0f} pacientes)")
     
-    menor_espera = min(simulacoes_selecionadas, key=lambda x: x["resultados_finais"]["tempo_medio_espera"])
+    menor_espera = min(simulacoes_selecionadas, key=lambda x: valor_resultado(x, "tempo_medio_espera"))
     idx_menor = simulacoes_selecionadas.index(menor_espera)
     
-    relatorio.append(f"• Menor tempo de espera: Simulação {idx_menor + 1} ({menor_espera['resultados_finais']['tempo_medio_espera']:.1f} min)")
+    relatorio.append(f"• Menor tempo de espera: Simulação {idx_menor + 1} ({valor_resultado(menor_espera, 'tempo_medio_espera'):.1f} min)")
     
-    melhor_ocupacao = max(simulacoes_selecionadas, key=lambda x: x["resultados_finais"]["taxa_ocupacao_media"])
+    melhor_ocupacao = max(simulacoes_selecionadas, key=lambda x: valor_resultado(x, "taxa_ocupacao_media"))
     idx_ocupacao = simulacoes_selecionadas.index(melhor_ocupacao)
     
-    relatorio.append(f"• Melhor taxa de ocupação: Simulação {idx_ocupacao + 1} ({melhor_ocupacao['resultados_finais']['taxa_ocupacao_media']:.1f}%)")
+    relatorio.append(f"• Melhor taxa de ocupação: Simulação {idx_ocupacao + 1} ({valor_resultado(melhor_ocupacao, 'taxa_ocupacao_media'):.1f}%)")
     
-    menor_desistencia = min(simulacoes_selecionadas, key=lambda x: x["resultados_finais"]["desistentes"])
+    menor_desistencia = min(simulacoes_selecionadas, key=lambda x: valor_resultado(x, "desistentes"))
     idx_desistencia = simulacoes_selecionadas.index(menor_desistencia)
     
-    relatorio.append(f"• Menor desistência: Simulação {idx_desistencia + 1} ({menor_desistencia['resultados_finais']['desistentes']} pacientes)")
+    relatorio.append(f"• Menor desistência: Simulação {idx_desistencia + 1} ({valor_resultado(menor_desistencia, 'desistentes'):.0f} pacientes)")
+    
+    if all(sim.get("estatisticas_replicacoes") for sim in simulacoes_selecionadas):
+        ic_menor = menor_espera["estatisticas_replicacoes"]["tempo_medio_espera"]["ic95"]
+        for i, sim in enumerate(simulacoes_selecionadas):
+            if sim is not menor_espera:
+                ic = sim["estatisticas_replicacoes"]["tempo_medio_espera"]["ic95"]
+                if ic[0] <= ic_menor[1]:
+                    relatorio.append(f"  (tempo de espera da Simulação {i + 1} não se distingue: os IC 95% sobrepõem-se)")
     
     texto_relatorio = "\n".join(relatorio)
     
@@ -3920,7 +3392,9 @@ def janela_configuracao():
             [sg.Text("Distribuição tempo consulta:", size=(30,1)),
              sg.Radio("Exponencial", "DIST", default=True, key="-DIST_EXP"),
              sg.Radio("Normal", "DIST", key="-DIST_NORM"),
-             sg.Radio("Uniforme", "DIST", key="-DIST_UNI-")]
+             sg.Radio("Uniforme", "DIST", key="-DIST_UNI-")],
+            [sg.Text("Semente (vazio = aleatória):", size=(30,1)),
+             sg.Input(default_text="", key="-SEMENTE-", size=(12,1))]
         ], expand_x=True)],
         [sg.Frame("Configuração por Arquivo", [
             [sg.Text("Carregar configuração de arquivo JSON:", size=(30,1)),
@@ -3971,6 +3445,8 @@ def janela_configuracao():
                     window["-TEMPO_MAX_ESPERA-"].update(str(config_carregada["tempo_max_espera"]))
                 if "prob_desistencia" in config_carregada:
                     window["-PROB_DESISTENCIA-"].update(str(config_carregada["prob_desistencia"]))
+                if config_carregada.get("semente") is not None:
+                    window["-SEMENTE-"].update(str(config_carregada["semente"]))
                 if "distribuicao" in config_carregada:
                     dist = config_carregada["distribuicao"]
                     if dist == "exponential":
@@ -4207,6 +3683,7 @@ def janela_configuracao():
                     "max_pausa_simultanea": max_pausa,
                     "tempo_max_espera": tempo_max_espera_val,
                     "prob_desistencia": prob_desistencia_val,
+                    "semente": int(values["-SEMENTE-"]) if values["-SEMENTE-"].strip().isdigit() else None,
                     "distribuicao": "exponential" if values["-DIST_EXP"] else "normal" if values["-DIST_NORM"] else "uniform"
                 }
                 salvar_configuracao_json(config_atual)
@@ -4446,6 +3923,7 @@ def janela_configuracao():
                     "max_pausa_simultanea": max_pausa,
                     "tempo_max_espera": tempo_max_espera_val,
                     "prob_desistencia": prob_desistencia_val,
+                    "semente": int(values["-SEMENTE-"]) if values["-SEMENTE-"].strip().isdigit() else None,
                     "distribuicao": distribuicao_final
                 }
                 continuar = False
@@ -6217,19 +5695,7 @@ def abrir_simulacao():
                     if pos_str.isdigit():
                         idx = int(pos_str) - 1
                         if 0 <= idx < tamanho_fila(estado_simulacao["fila_espera"]):
-                            fila_temp = []
-                            removido = None
-                            i = 0
-                            while not queue_empty(estado_simulacao["fila_espera"]):
-                                paciente, estado_simulacao["fila_espera"] = remover_da_fila(estado_simulacao["fila_espera"])
-                                if i == idx:
-                                    removido = paciente
-                                else:
-                                    fila_temp = adicionar_a_fila(fila_temp, paciente)
-                                i = i + 1
-                            while not queue_empty(fila_temp):
-                                paciente, fila_temp = remover_da_fila(fila_temp)
-                                estado_simulacao["fila_espera"] = adicionar_a_fila(estado_simulacao["fila_espera"], paciente)
+                            removido = estado_simulacao["fila_espera"].remover(estado_simulacao["fila_espera"][idx]["id"])
                             if removido:
                                 sg.popup(f"Paciente {removido.get('nome')} removido da fila.", title="Removido")
                                 if estado_simulacao.get("paciente_selecionado") == removido["id"]:
@@ -0,0 +1,1554 @@
+import bisect
+import heapq
+import math
+import os
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import numpy as np
+
+import funcoes
+from funcoes import (
+    CAMINHO_PACIENTES,
+    carregar_pacientes_simula,
+    carregar_medicos_simula,
+    FilaPrioridade,
+    adicionar_a_fila,
+    queue_empty,
+    tamanho_fila,
+    gera_tempos_consulta
+)
+
+
+# ============================================================================
+# MOTOR DA SIMULAÇÃO (sem interface gráfica: só numpy e biblioteca padrão)
+# ============================================================================
+# Usado pela interface (interface_simulacao.py) e por scripts em lote:
+#
+#     from motor_simulacao import executar_simulacao
+#     resultado = executar_simulacao(json.load(open("config_simulacao.json")))
+#
+# As chaves da configuração são as de config_simulacao.json.
+
+
+# ============================================================================
+# PARÂMETROS
+# ============================================================================
+NUM_MEDICOS = 2
+LAMBDA_CHEGADA = 10
+TEMPO_MEDIO_CONSULTA = 15
+TEMPO_SIMULACAO = 480
+DISTRIBUICAO_TEMPO_CONSULTA = "exponential"
+TEMPO_MAX_ESPERA = 30
+PROB_DESISTENCIA = 0.3
+PAUSA_FREQUENCIA = 60
+DURACAO_PAUSA = 15
+NUM_PAUSAS = 2
+MAX_MEDICOS_PAUSA_SIMULTANEA = 2
+
+PRIORIDADES = {"URGENTE": 1, "ALTA": 2, "NORMAL": 3, "BAIXA": 4}
+
+# Tipos de evento, pela ordem em que são tratados quando coincidem no tempo
+EVENTO_FIM_PAUSA = 0
+EVENTO_CHEGADA = 1
+EVENTO_FIM_CONSULTA = 2
+EVENTO_VERIFICAR_PAUSAS = 3
+EVENTO_LIMIAR_ESPERA = 4
+EVENTO_DESISTENCIA = 5
+
+INTERVALO_AMOSTRAGEM = 1.0
+PASSO_VERIFICACAO_PAUSA = 1.0
+
+# Um gerador independente por finalidade, todos derivados da mesma SeedSequence:
+# com a mesma semente, dois cenários recebem as mesmas chegadas, durações, etc.
+FLUXOS_ALEATORIOS = ["chegadas", "servico", "pausas", "desistencia", "pacientes"]
+
+# Durações de consulta e sorteios de desistência são gerados em blocos deste tamanho
+TAMANHO_BLOCO_ALEATORIO = 1024
+
+# Replicações por lote na regra de paragem sequencial, depois das min_replicacoes iniciais.
+# Fixo (não depende do número de workers) para que a mesma semente pare no mesmo n em qualquer máquina.
+LOTE_REPLICACOES = 4
+
+# Métricas de resultados_finais resumidas entre replicações
+METRICAS_RESULTADO = ["atendidos", "desistentes", "taxa_ocupacao_media", "tempo_medio_espera", "fila_media", "fila_maxima"]
+
+# Quantis da t de Student para IC a 95% (bilateral), por graus de liberdade; acima de 30 ver quantil_t_95
+QUANTIS_T_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042
+]
+
+
+# Colunas de dados_historicos (uma amostra por INTERVALO_AMOSTRAGEM)
+COLUNAS_SERIE = [
+    "tempo", "fila_tamanho", "atendidos", "desistentes", "taxa_ocupacao", "tempo_medio_consulta",
+    "medicos_ocupados", "medicos_em_pausa", "aguardando_chegada", "taxa_correspondencia_especialidade",
+    "tempo_medio_espera"
+]
+COLUNAS_SERIE_INTEIRAS = {
+    "fila_tamanho", "atendidos", "desistentes", "medicos_ocupados", "medicos_em_pausa", "aguardando_chegada"
+}
+
+# Quantis mostrados nos relatórios e erro relativo máximo dos esboços de quantis
+QUANTIS_RELATORIO = [0.5, 0.9, 0.95, 0.99]
+PRECISAO_QUANTIS = 0.01
+
+
+class ErroSimulacao(Exception):
+    pass
+
+
+class SerieTemporal:
+    """Série temporal guardada por colunas: um array numpy pré-alocado por métrica.
+
+    Os gráficos leem as colunas com coluna(nome). Para o código que ainda trabalha
+    com registos, len(), iteração e serie[i] devolvem uma linha como dicionário.
+    """
+
+    def __init__(self, capacidade=0, colunas=None):
+        self.nomes = list(colunas) if colunas is not None else list(COLUNAS_SERIE)
+        self.colunas = {nome: np.zeros(capacidade, dtype=self.tipo(nome)) for nome in self.nomes}
+        self.tamanho = 0
+
+    @staticmethod
+    def tipo(nome):
+        return np.int64 if nome in COLUNAS_SERIE_INTEIRAS else np.float64
+
+    @classmethod
+    def de_registos(cls, registos):
+        """Converte a antiga lista de dicionários (resultados guardados antes das colunas)"""
+        serie = cls(len(registos))
+        for registo in registos:
+            if isinstance(registo, dict):
+                serie.registar(registo)
+        return serie
+
+    def registar(self, valores):
+        if self.tamanho == len(self.colunas[self.nomes[0]]):
+            nova_capacidade = max(16, 2 * self.tamanho)
+            for nome in self.nomes:
+                coluna = np.zeros(nova_capacidade, dtype=self.tipo(nome))
+                coluna[:self.tamanho] = self.colunas[nome][:self.tamanho]
+                self.colunas[nome] = coluna
+        for nome in self.nomes:
+            self.colunas[nome][self.tamanho] = valores.get(nome, 0)
+        self.tamanho = self.tamanho + 1
+
+    def coluna(self, nome):
+        return self.colunas[nome][:self.tamanho]
+
+    def linha(self, indice):
+        if indice < 0:
+            indice = indice + self.tamanho
+        if not 0 <= indice < self.tamanho:
+            raise IndexError("índice fora da série")
+        return {nome: self.colunas[nome][indice].item() for nome in self.nomes}
+
+    def para_lista(self):
+        return [self.linha(i) for i in range(self.tamanho)]
+
+    def copy(self):
+        """Cópia com os arrays cortados ao número de amostras"""
+        copia = SerieTemporal(0, self.nomes)
+        copia.colunas = {nome: self.coluna(nome).copy() for nome in self.nomes}
+        copia.tamanho = self.tamanho
+        return copia
+
+    def __len__(self):
+        return self.tamanho
+
+    def __iter__(self):
+        return (self.linha(i) for i in range(self.tamanho))
+
+    def __getitem__(self, indice):
+        return self.linha(indice)
+
+
+class EsbocoQuantis:
+    """Esboço de quantis em streaming com erro relativo limitado (estilo DDSketch).
+
+    Cada valor positivo conta no balde ceil(log(valor) / log(gama)), com
+    gama = (1 + precisao) / (1 - precisao); valores <= 0 contam num balde à parte.
+    Inserir é O(1), a memória só cresce com o logaritmo da gama de valores e dois
+    esboços com a mesma precisão juntam-se somando as contagens dos baldes, por isso
+    podem ser combinados entre replicações e processos.
+    """
+
+    def __init__(self, precisao=PRECISAO_QUANTIS):
+        self.precisao = precisao
+        self.gama = (1 + precisao) / (1 - precisao)
+        self.log_gama = math.log(self.gama)
+        self.baldes = {}
+        self.zeros = 0.0
+        self.contagem = 0.0
+        self.soma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        # (índices ordenados, contagem acumulada até cada um) para quantil; refeito depois de alterações
+        self.ordenados = None
+
+    def adicionar(self, valor, peso=1):
+        self.ordenados = None
+        if valor > 0:
+            indice = math.ceil(math.log(valor) / self.log_gama)
+            self.baldes[indice] = self.baldes.get(indice, 0) + peso
+        else:
+            self.zeros = self.zeros + peso
+        self.contagem = self.contagem + peso
+        self.soma = self.soma + valor * peso
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def juntar(self, outro):
+        """Soma outro esboço a este (tem de ter a mesma precisão)"""
+        if outro.precisao != self.precisao:
+            raise ValueError("só se juntam esboços com a mesma precisão")
+        self.ordenados = None
+        for indice, contagem in outro.baldes.items():
+            self.baldes[indice] = self.baldes.get(indice, 0) + contagem
+        self.zeros = self.zeros + outro.zeros
+        self.contagem = self.contagem + outro.contagem
+        self.soma = self.soma + outro.soma
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        return self
+
+    def quantil(self, q):
+        if self.contagem <= 0:
+            return 0.0
+        posicao = q * self.contagem
+        if self.zeros > 0 and self.zeros >= posicao:
+            return 0.0
+        if self.ordenados is None:
+            # Ordena-se uma vez por relatório, não por quantil pedido
+            indices = sorted(self.baldes)
+            acumulados = []
+            acumulado = self.zeros
+            for indice in indices:
+                acumulado = acumulado + self.baldes[indice]
+                acumulados.append(acumulado)
+            self.ordenados = (indices, acumulados)
+        indices, acumulados = self.ordenados
+        i = bisect.bisect_left(acumulados, posicao)
+        if i < len(indices):
+            valor = 2 * self.gama ** indices[i] / (self.gama + 1)
+            return min(max(valor, self.minimo), self.maximo)
+        return self.maximo
+
+    def media(self):
+        return self.soma / self.contagem if self.contagem > 0 else 0.0
+
+    def para_dict(self):
+        """Representação serializável em JSON (ver de_dict)"""
+        return {
+            "precisao": self.precisao, "zeros": self.zeros, "contagem": self.contagem, "soma": self.soma,
+            "minimo": self.minimo if self.contagem > 0 else 0.0,
+            "maximo": self.maximo if self.contagem > 0 else 0.0,
+            "baldes": {str(indice): contagem for indice, contagem in self.baldes.items()}
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        esboco = cls(dados.get("precisao", PRECISAO_QUANTIS))
+        esboco.baldes = {int(indice): contagem for indice, contagem in dados.get("baldes", {}).items()}
+        esboco.zeros = dados.get("zeros", 0.0)
+        esboco.contagem = dados.get("contagem", 0.0)
+        esboco.soma = dados.get("soma", 0.0)
+        if esboco.contagem > 0:
+            esboco.minimo = dados.get("minimo", 0.0)
+            esboco.maximo = dados.get("maximo", 0.0)
+        return esboco
+
+
+def criar_quantis():
+    """Esboços de quantis da espera por paciente e da fila vista à chegada,
+    no geral, por prioridade e por especialidade"""
+    return {
+        medida: {"geral": EsbocoQuantis(), "prioridade": {}, "especialidade": {}}
+        for medida in ("espera", "fila")
+    }
+
+
+def adicionar_esboco(esbocos, chave, valor):
+    esboco = esbocos.get(chave)
+    if esboco is None:
+        esboco = esbocos[chave] = EsbocoQuantis()
+    esboco.adicionar(valor)
+
+
+def combinar_quantis(lista_quantis):
+    """Junta os esboços de várias execuções (replicações, processos) num conjunto novo"""
+    combinados = criar_quantis()
+    for quantis in lista_quantis:
+        if not quantis:
+            continue
+        for medida, grupo in quantis.items():
+            destino = combinados.setdefault(medida, {"geral": EsbocoQuantis(), "prioridade": {}, "especialidade": {}})
+            destino["geral"].juntar(grupo["geral"])
+            for divisao in ("prioridade", "especialidade"):
+                for chave, esboco in grupo[divisao].items():
+                    destino[divisao].setdefault(chave, EsbocoQuantis()).juntar(esboco)
+    return combinados
+
+
+def resumir_esboco(esboco):
+    resumo = {"n": int(esboco.contagem), "media": esboco.media()}
+    for q in QUANTIS_RELATORIO:
+        resumo[f"p{int(round(q * 100))}"] = esboco.quantil(q)
+    return resumo
+
+
+def resumir_quantis(quantis):
+    """Mesma estrutura de criar_quantis, com {n, media, p50, p90, p95, p99} no lugar dos esboços"""
+    return {
+        medida: {
+            "geral": resumir_esboco(grupo["geral"]),
+            "prioridade": {chave: resumir_esboco(e) for chave, e in grupo["prioridade"].items()},
+            "especialidade": {chave: resumir_esboco(e) for chave, e in grupo["especialidade"].items()}
+        }
+        for medida, grupo in quantis.items()
+    }
+
+
+def quantis_para_dict(quantis):
+    return {
+        medida: {
+            "geral": grupo["geral"].para_dict(),
+            "prioridade": {chave: e.para_dict() for chave, e in grupo["prioridade"].items()},
+            "especialidade": {chave: e.para_dict() for chave, e in grupo["especialidade"].items()}
+        }
+        for medida, grupo in quantis.items()
+    }
+
+
+def criar_fluxos_aleatorios(semente=None):
+    """Um numpy.random.Generator por nome de FLUXOS_ALEATORIOS, a partir de SeedSequence(semente)"""
+    sementes = np.random.SeedSequence(semente).spawn(len(FLUXOS_ALEATORIOS))
+    return {nome: np.random.default_rng(s) for nome, s in zip(FLUXOS_ALEATORIOS, sementes)}
+
+
+# ============================================================================
+# REGISTOS DE PACIENTES, MÉDICOS E ATENDIMENTOS
+# ============================================================================
+class Registo(Mapping):
+    """Base dos registos da simulação, com os campos em __slots__ em vez de um dicionário.
+
+    O motor usa atributos (medico.ocupado); o código dos relatórios continua a ler
+    registo["campo"], get(), keys() e items() como num dicionário. Um campo ainda não
+    definido comporta-se como chave ausente e chaves fora de CAMPOS (por omissão os
+    __slots__) vão para `extras`.
+    """
+
+    __slots__ = ("extras",)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "CAMPOS" not in cls.__dict__:
+            cls.CAMPOS = cls.__slots__
+        cls.campos = frozenset(cls.CAMPOS)
+
+    def __init__(self, dados=None, **campos):
+        self.extras = None
+        for origem in (dados, campos):
+            if not origem:
+                continue
+            for chave, valor in origem.items():
+                if chave in self.campos:
+                    setattr(self, chave, valor)
+                else:
+                    self[chave] = valor
+
+    def __getitem__(self, chave):
+        if chave in self.campos:
+            try:
+                return getattr(self, chave)
+            except AttributeError:
+                raise KeyError(chave) from None
+        if self.extras is not None and chave in self.extras:
+            return self.extras[chave]
+        raise KeyError(chave)
+
+    def __setitem__(self, chave, valor):
+        if chave in self.campos:
+            setattr(self, chave, valor)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[chave] = valor
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def __iter__(self):
+        for chave in self.CAMPOS:
+            if hasattr(self, chave):
+                yield chave
+        if self.extras:
+            yield from self.extras
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        """Cópia como dicionário normal (o código dos relatórios acrescenta-lhe chaves)"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.copy()!r})"
+
+
+class TabelaPacientes:
+    """Dataset de pacientes guardado por colunas (tuplos), só de leitura.
+
+    Os textos repetidos (doença, prioridade, especialidade...) são o mesmo objeto em
+    todas as linhas. Cada execução guarda por paciente apenas a linha e os campos que
+    mudam (ver Paciente), sem copiar o dataset.
+    """
+
+    COLUNAS = ("id", "nome", "idade", "sexo", "doenca", "prioridade", "especialidade_necessaria", "atributos")
+
+    def __init__(self, pessoas):
+        partilhados = {}
+        colunas = {nome: [] for nome in self.COLUNAS}
+        for pessoa in pessoas:
+            for nome in self.COLUNAS:
+                valor = pessoa.get(nome)
+                if isinstance(valor, str):
+                    valor = partilhados.setdefault(valor, valor)
+                colunas[nome].append(valor)
+        self.colunas = {nome: tuple(valores) for nome, valores in colunas.items()}
+        self.linhas = {id_paciente: linha for linha, id_paciente in enumerate(self.colunas["id"])}
+
+    def __len__(self):
+        return len(self.colunas["id"])
+
+
+def coluna_da_tabela(nome):
+    coluna = property(lambda self: self.tabela.colunas[nome][self.linha])
+    coluna.__doc__ = f"{nome} (só de leitura, vem da TabelaPacientes)"
+    return coluna
+
+
+class Paciente(Registo):
+    """Paciente de uma execução: a linha na TabelaPacientes partilhada e os campos da execução"""
+
+    __slots__ = (
+        "tabela", "linha", "consulta_marcada", "tempo_chegada", "duracao_consulta", "tempo_espera", "motivo_desistencia"
+    )
+    CAMPOS = TabelaPacientes.COLUNAS + __slots__[2:]
+
+    id = coluna_da_tabela("id")
+    nome = coluna_da_tabela("nome")
+    idade = coluna_da_tabela("idade")
+    sexo = coluna_da_tabela("sexo")
+    doenca = coluna_da_tabela("doenca")
+    prioridade = coluna_da_tabela("prioridade")
+    especialidade_necessaria = coluna_da_tabela("especialidade_necessaria")
+    atributos = coluna_da_tabela("atributos")
+
+    def __init__(self, tabela, linha, **campos):
+        self.tabela = tabela
+        self.linha = linha
+        self.consulta_marcada = False
+        self.tempo_chegada = 0
+        super().__init__(None, **campos)
+
+
+class TabelaAlias:
+    """Amostragem de uma distribuição discreta em O(1) pelo método de alias (Vose).
+
+    sortear(u) recebe um único uniforme em [0, 1): a parte inteira de u * n escolhe a
+    coluna e a parte fracionária decide entre a coluna e o seu alias.
+    """
+
+    def __init__(self, pesos):
+        n = len(pesos)
+        total = float(sum(pesos))
+        escalados = [peso * n / total for peso in pesos]
+        self.probabilidades = [1.0] * n
+        self.alias = list(range(n))
+        pequenos = [i for i, p in enumerate(escalados) if p < 1.0]
+        grandes = [i for i, p in enumerate(escalados) if p >= 1.0]
+        while pequenos and grandes:
+            pequeno = pequenos.pop()
+            grande = grandes.pop()
+            self.probabilidades[pequeno] = escalados[pequeno]
+            self.alias[pequeno] = grande
+            escalados[grande] = escalados[grande] + escalados[pequeno] - 1.0
+            if escalados[grande] < 1.0:
+                pequenos.append(grande)
+            else:
+                grandes.append(grande)
+
+    def sortear(self, u):
+        n = len(self.probabilidades)
+        posicao = u * n
+        coluna = min(int(posicao), n - 1)
+        if posicao - coluna < self.probabilidades[coluna]:
+            return coluna
+        return self.alias[coluna]
+
+
+class PacienteSintetico(Registo):
+    """Paciente gerado pela FontePacientesSintetica (não existe em pacientes.json)"""
+
+    __slots__ = (
+        "id", "nome", "doenca", "prioridade", "especialidade_necessaria",
+        "consulta_marcada", "tempo_chegada", "duracao_consulta", "tempo_espera", "motivo_desistencia"
+    )
+
+
+class FontePacientesSintetica:
+    """Fonte ilimitada de pacientes, sorteados com reposição da distribuição empírica.
+
+    Sorteia-se a combinação (doenca, prioridade, especialidade_necessaria) com a
+    frequência que tem na TabelaPacientes, por isso mantêm-se as correlações entre os
+    três campos. Cada paciente custa O(1) e nada é gerado antes da sua chegada.
+    """
+
+    def __init__(self, tabela):
+        colunas = tabela.colunas
+        contagens = {}
+        for combinacao in zip(colunas["doenca"], colunas["prioridade"], colunas["especialidade_necessaria"]):
+            contagens[combinacao] = contagens.get(combinacao, 0) + 1
+        self.combinacoes = list(contagens)
+        self.alias = TabelaAlias(list(contagens.values()))
+        self.gerados = 0
+
+    def gerar(self, u_combinacao, u_marcada):
+        doenca, prioridade, especialidade = self.combinacoes[self.alias.sortear(u_combinacao)]
+        self.gerados = self.gerados + 1
+        return PacienteSintetico(
+            id=f"s{self.gerados}",
+            nome=f"Paciente sintético {self.gerados}",
+            doenca=doenca,
+            prioridade=prioridade,
+            especialidade_necessaria=especialidade,
+            consulta_marcada=u_marcada < 0.3,
+            tempo_chegada=0
+        )
+
+
+# Tabela lida de CAMINHO_PACIENTES e a assinatura do repositório nessa altura (mtime e tamanho do ficheiro e do
+# diário, ou a versão do conjunto no SQLite)
+_cache_tabela_pacientes = {"assinatura": None, "tabela": None}
+
+
+def carregar_tabela_pacientes():
+    """TabelaPacientes de pacientes.json, que só volta a ser lida quando os dados dos pacientes mudam"""
+    try:
+        # funcoes.repositorio: usar_armazenamento pode trocá-lo depois deste import
+        assinatura = funcoes.repositorio.assinatura(CAMINHO_PACIENTES)
+    except OSError:
+        assinatura = None
+    if _cache_tabela_pacientes["tabela"] is None or _cache_tabela_pacientes["assinatura"] != assinatura:
+        _cache_tabela_pacientes["tabela"] = TabelaPacientes(carregar_pacientes_simula())
+        _cache_tabela_pacientes["assinatura"] = assinatura
+    return _cache_tabela_pacientes["tabela"]
+
+
+def criar_executor(workers):
+    """ProcessPoolExecutor com a tabela de pacientes já carregada.
+
+    Com fork (Linux) os processos herdam a tabela do processo principal e não voltam a
+    ler pacientes.json; noutros sistemas cada processo lê-a uma vez e reutiliza-a.
+    """
+    carregar_tabela_pacientes()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+class Medico(Registo):
+    __slots__ = (
+        "id", "nome", "especialidade", "ocupado", "paciente_atual", "tempo_inicio_consulta",
+        "tempo_fim_consulta", "tempo_total_ocupado", "num_atendimentos", "em_pausa", "tempo_fim_pausa",
+        "num_pausas_realizadas", "frequencia_pausa", "duracao_pausa", "num_pausas", "pausas_realizadas", "ordem"
+    )
+
+
+class HistoricoAtendimentos:
+    """Histórico de atendimentos guardado em listas paralelas (uma por campo), indexadas pela ordem.
+
+    Como em SerieTemporal, len(), iteração e historico[i] devolvem o atendimento como
+    dicionário {paciente, medico, inicio, duracao, especialidade_correta}.
+    """
+
+    CAMPOS = ("paciente", "medico", "inicio", "duracao", "especialidade_correta")
+
+    def __init__(self):
+        self.pacientes = []
+        self.medicos = []
+        self.inicios = array("d")
+        self.duracoes = array("d")
+        self.corretas = array("b")
+
+    def registar(self, paciente, medico, inicio, duracao, especialidade_correta):
+        self.pacientes.append(paciente)
+        self.medicos.append(medico)
+        self.inicios.append(inicio)
+        self.duracoes.append(duracao)
+        self.corretas.append(especialidade_correta)
+
+    def linha(self, indice):
+        return {
+            "paciente": self.pacientes[indice],
+            "medico": self.medicos[indice],
+            "inicio": self.inicios[indice],
+            "duracao": self.duracoes[indice],
+            "especialidade_correta": bool(self.corretas[indice])
+        }
+
+    def __len__(self):
+        return len(self.pacientes)
+
+    def __iter__(self):
+        return (self.linha(i) for i in range(len(self.pacientes)))
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.linha(i) for i in range(*indice.indices(len(self.pacientes)))]
+        return self.linha(indice)
+
+
+# ============================================================================
+# ESTADO DA SIMULAÇÃO
+# ============================================================================
+def criar_estado_simulacao():
+    return {
+        "pessoas_dados": {}, "paciente_selecionado": None, "historico_atendimentos": HistoricoAtendimentos(),
+        "fila_espera": FilaPrioridade(PRIORIDADES), "tempo_atual": 0, "simulacao_ativa": False, "velocidade": 1.0,
+        "medicos": [], "proximo_paciente_tempo": 0, "pacientes_disponiveis": deque(),
+        "pacientes_desistentes": [], "dados_historicos": SerieTemporal(), "resultados_simulacoes": [],"titulo": "Simulação Clínica",
+        "eventos": [], "prazos_desistencia": [], "seq_eventos": 0, "proxima_amostra": 0.0, "verificacao_pausas_agendada": None,
+        "medicos_livres": {}, "ordens_livres": {}, "semente": None, "fonte_sintetica": None, "chegadas_agendadas": 0,
+        "tempo_medio_entre_chegadas": 60.0,
+        "soma_duracoes": 0.0, "atendimentos_especialidade_correta": 0, "medicos_ocupados": 0, "medicos_em_pausa": 0,
+        "amostragem": True, "tempo_integrado": 0.0, "area_fila": 0.0, "area_ocupados": 0.0,
+        "soma_esperas": 0.0, "fila_maxima": 0, "quantis": criar_quantis(), "eventos_processados": 0
+    }
+
+
+# ============================================================================
+# SIMULAÇÃO
+# ============================================================================
+
+class Simulacao:
+    """Uma simulação da clínica com estado, gerador aleatório e histórico próprios.
+
+    Várias instâncias podem coexistir no mesmo processo (ou em processos
+    diferentes); a interface usa uma delas como a simulação "ao vivo".
+    """
+
+    def __init__(self, semente=None):
+        self.semente = semente
+        self.fluxos = criar_fluxos_aleatorios(semente)
+        self.blocos = {}
+        self.erro = None
+        self.estado = criar_estado_simulacao()
+
+    def sortear(self, nome):
+        """Próximo valor do bloco pré-gerado `nome` ("servico", "chegadas", "desistencia" ou "pacientes").
+
+        Quando o bloco se esgota gera-se outro de TAMANHO_BLOCO_ALEATORIO valores
+        numa só chamada ao gerador do fluxo com o mesmo nome.
+        """
+        bloco = self.blocos.get(nome)
+        if bloco is None or bloco[1] >= len(bloco[0]):
+            if nome == "servico":
+                valores = gera_tempos_consulta(
+                    self.estado["tempo_medio_consulta"],
+                    self.estado["distribuicao"],
+                    TAMANHO_BLOCO_ALEATORIO,
+                    self.fluxos["servico"]
+                )
+            elif nome == "chegadas":
+                valores = self.fluxos["chegadas"].exponential(
+                    scale=self.estado["tempo_medio_entre_chegadas"], size=TAMANHO_BLOCO_ALEATORIO
+                )
+            else:
+                valores = self.fluxos[nome].random(TAMANHO_BLOCO_ALEATORIO)
+            bloco = [valores.tolist(), 0]
+            self.blocos[nome] = bloco
+        valor = bloco[0][bloco[1]]
+        bloco[1] = bloco[1] + 1
+        return valor
+
+    def coletar_dados_historicos(self):
+        stats = self.obter_estatisticas()
+
+        dados_momento = {
+            "tempo": self.estado["tempo_atual"],
+            "fila_tamanho": stats["fila_len"],
+            "atendidos": stats["doentes_atendidos"],
+            "desistentes": stats["desistentes"],
+            "taxa_ocupacao": stats["taxa_ocupacao"],
+            "tempo_medio_consulta": stats["tempo_medio_consulta"],
+            "medicos_ocupados": self.estado["medicos_ocupados"],
+            "medicos_em_pausa": self.estado["medicos_em_pausa"],
+            "aguardando_chegada": stats["aguardando"],
+            "taxa_correspondencia_especialidade": stats["taxa_correspondencia_especialidade"],
+            "tempo_medio_espera": self.estado["fila_espera"].tempo_medio_espera(self.estado["tempo_atual"])
+        }
+
+        self.estado["dados_historicos"].registar(dados_momento)
+
+    def agendar_evento(self, tempo, tipo, dados=None):
+        self.estado["seq_eventos"] = self.estado["seq_eventos"] + 1
+        heapq.heappush(self.estado["eventos"], (tempo, tipo, self.estado["seq_eventos"], dados))
+
+    def agendar_verificacao_pausas(self, tempo):
+        if self.estado["verificacao_pausas_agendada"] is not None and self.estado["verificacao_pausas_agendada"] <= tempo:
+            return
+        self.estado["verificacao_pausas_agendada"] = tempo
+        self.agendar_evento(tempo, EVENTO_VERIFICAR_PAUSAS)
+
+    def processar_desistencias(self):
+        """Sorteia a desistência, uma única vez, dos pacientes cujo prazo já passou.
+
+        Os prazos (tempo_chegada + tempo_max_espera) estão num heap próprio; quem
+        já saiu da fila é simplesmente descartado quando o seu prazo aparece.
+        """
+        tempo_atual = self.estado["tempo_atual"]
+
+        tempo_max_espera = self.estado.get("tempo_max_espera", TEMPO_MAX_ESPERA)
+        prob_desistencia = self.estado.get("prob_desistencia", PROB_DESISTENCIA)
+
+        fila = self.estado["fila_espera"]
+        prazos = self.estado["prazos_desistencia"]
+
+        while prazos and prazos[0][0] <= tempo_atual:
+            _, _, paciente_id, sorteio = heapq.heappop(prazos)
+            if paciente_id in fila and sorteio < prob_desistencia:
+                paciente = fila.remover(paciente_id)
+                tempo_espera = tempo_atual - paciente.tempo_chegada
+                paciente.tempo_espera = tempo_espera
+                paciente.motivo_desistencia = f"Esperou {tempo_espera:.1f} min (> {tempo_max_espera} min)"
+                self.estado["pacientes_desistentes"].append(paciente)
+
+    def iniciar_pausas(self, tempo_atual):
+        medicos = self.estado["medicos"]
+        num_medicos_total = len(medicos)
+        max_pausa_simultanea = min(
+            self.estado.get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA),
+            max(1, num_medicos_total // 3)
+        )
+
+        # Contagens por especialidade feitas uma vez (antes era um varrimento por médico elegível)
+        medicos_em_pausa = 0
+        total_especialidade = {}
+        trabalhando_especialidade = {}
+        for medico in medicos:
+            especialidade = medico.especialidade
+            total_especialidade[especialidade] = total_especialidade.get(especialidade, 0) + 1
+            if medico.em_pausa:
+                medicos_em_pausa = medicos_em_pausa + 1
+            else:
+                trabalhando_especialidade[especialidade] = trabalhando_especialidade.get(especialidade, 0) + 1
+
+        pausas_permitidas = max_pausa_simultanea
+        tamanho_fila_atual = tamanho_fila(self.estado["fila_espera"])
+        num_medicos = len(medicos)
+
+        if tamanho_fila_atual > num_medicos * 6:
+            pausas_permitidas = max(0, max_pausa_simultanea // 2)
+        elif tamanho_fila_atual > num_medicos * 4:
+            pausas_permitidas = max(1, max_pausa_simultanea * 2 // 3)
+
+        medicos_elegiveis = 0
+        medicos_disponiveis_pausa = []
+        i = 0
+        while i < len(medicos):
+            medico = medicos[i]
+            pode_pausar = (
+                not medico.em_pausa and 
+                medico.num_pausas_realizadas < medico.num_pausas and
+                tempo_atual >= (medico.num_pausas_realizadas + 1) * medico.frequencia_pausa
+            )
+
+            if pode_pausar:
+                medicos_elegiveis = medicos_elegiveis + 1
+                especialidade = medico.especialidade
+                # O próprio médico não está em pausa: conta entre os que trabalham
+                medicos_trabalhando_mesma_espec = trabalhando_especialidade[especialidade] - 1
+
+                if total_especialidade[especialidade] == 1:
+                    if tamanho_fila_atual < 3:
+                        medicos_disponiveis_pausa.append(medico)
+                elif medicos_trabalhando_mesma_espec > 0:
+                    medicos_disponiveis_pausa.append(medico)
+
+            i = i + 1
+
+        if medicos_disponiveis_pausa and medicos_em_pausa < pausas_permitidas:
+            self.fluxos["pausas"].shuffle(medicos_disponiveis_pausa)
+            vagas_pausa = pausas_permitidas - medicos_em_pausa
+            medicos_para_pausa = medicos_disponiveis_pausa[:vagas_pausa]
+
+            i = 0
+            while i < len(medicos_para_pausa):
+                medico = medicos_para_pausa[i]
+                probabilidade_pausa = 0.7 if tamanho_fila_atual < 5 else 0.3
+                if self.fluxos["pausas"].random() < probabilidade_pausa:
+                    self.alterar_estado_medico(medico, False, True)
+                    medico.tempo_fim_pausa = tempo_atual + medico.duracao_pausa
+                    medico.paciente_atual = None
+                    medicos_em_pausa = medicos_em_pausa + 1
+                    medicos_elegiveis = medicos_elegiveis - 1
+                    self.agendar_evento(medico.tempo_fim_pausa, EVENTO_FIM_PAUSA, medico)
+                i = i + 1
+
+        # Quem ficou elegível mas não pausou volta a tentar no passo seguinte
+        if medicos_elegiveis > 0:
+            self.agendar_verificacao_pausas(tempo_atual + PASSO_VERIFICACAO_PAUSA)
+
+    def terminar_pausa(self, medico, tempo_atual):
+        self.alterar_estado_medico(medico, medico.ocupado, False)
+        medico.num_pausas_realizadas = medico.num_pausas_realizadas + 1
+        medico.pausas_realizadas.append({
+            "inicio": tempo_atual - medico.duracao_pausa,
+            "fim": tempo_atual
+        })
+        if medico.num_pausas_realizadas < medico.num_pausas:
+            proxima_pausa = (medico.num_pausas_realizadas + 1) * medico.frequencia_pausa
+            self.agendar_verificacao_pausas(max(tempo_atual, proxima_pausa))
+
+    def proximo_paciente(self):
+        """Próximo paciente a chegar: da fonte sintética, se houver, senão da seleção do dataset"""
+        fonte = self.estado["fonte_sintetica"]
+        if fonte is not None:
+            return fonte.gerar(self.sortear("pacientes"), self.sortear("pacientes"))
+        if self.estado["pacientes_disponiveis"]:
+            return self.estado["pacientes_disponiveis"].popleft()
+        return None
+
+    def agendar_proxima_chegada(self, tempo_atual):
+        """Agenda a chegada seguinte: o primeiro intervalo é pelo menos 0.1 min e os outros 0.5 min"""
+        if self.estado["fonte_sintetica"] is None and not self.estado["pacientes_disponiveis"]:
+            return
+        minimo = 0.5 if self.estado["chegadas_agendadas"] else 0.1
+        self.estado["chegadas_agendadas"] = self.estado["chegadas_agendadas"] + 1
+        self.estado["proximo_paciente_tempo"] = tempo_atual + max(minimo, self.sortear("chegadas"))
+        self.agendar_evento(self.estado["proximo_paciente_tempo"], EVENTO_CHEGADA)
+
+    def processar_chegada(self, tempo_atual):
+        paciente = self.proximo_paciente()
+        if paciente is None:
+            return
+        if self.estado["fonte_sintetica"] is not None:
+            self.estado["pessoas_dados"][paciente.id] = paciente
+
+        paciente.tempo_chegada = tempo_atual
+        # Duração e sorteio de desistência ficam presos ao paciente (não à ordem de atendimento),
+        # para que cenários com a mesma semente partilhem os mesmos números por paciente
+        paciente.duracao_consulta = self.sortear("servico")
+        sorteio_desistencia = self.sortear("desistencia")
+
+        fila = self.estado["fila_espera"]
+        prioridade = paciente.prioridade
+        especialidade = paciente.especialidade_necessaria
+        grupo_fila = self.estado["quantis"]["fila"]
+        # Fila vista à chegada (chegadas de Poisson veem a média no tempo), na classe do próprio paciente
+        grupo_fila["geral"].adicionar(len(fila))
+        adicionar_esboco(grupo_fila["prioridade"], prioridade,
+                         fila.contagem_prioridade.get(fila.prioridades.get(prioridade, 3), 0))
+        adicionar_esboco(grupo_fila["especialidade"], especialidade, fila.contagem_especialidade.get(especialidade, 0))
+        self.estado["fila_espera"] = adicionar_a_fila(fila, paciente)
+        self.estado["fila_maxima"] = max(self.estado["fila_maxima"], len(self.estado["fila_espera"]))
+
+        # Instantes em que o paciente passa a poder ser atendido por outra especialidade / pode desistir
+        tempo_max_espera = self.estado.get("tempo_max_espera", TEMPO_MAX_ESPERA)
+        if paciente.prioridade == "URGENTE":
+            self.agendar_evento(tempo_atual + 5, EVENTO_LIMIAR_ESPERA)
+        elif paciente.prioridade == "ALTA":
+            self.agendar_evento(tempo_atual + tempo_max_espera / 2, EVENTO_LIMIAR_ESPERA)
+        self.estado["seq_eventos"] = self.estado["seq_eventos"] + 1
+        heapq.heappush(self.estado["prazos_desistencia"],
+                       (tempo_atual + tempo_max_espera, self.estado["seq_eventos"], paciente.id, sorteio_desistencia))
+
+        self.agendar_proxima_chegada(tempo_atual)
+
+    def atribuir_medicos_livres(self, tempo_atual):
+        """Oferece a fila aos médicos livres (nem ocupados nem em pausa), pela ordem da lista de médicos.
+
+        O paciente que um médico livre pode levar só depende da sua especialidade (e da
+        fila, do relógio e dos livres): se um não consegue ninguém, os seguintes da mesma
+        especialidade também não, até outro médico levar alguém. Por isso cada especialidade
+        entra com o seu primeiro livre (ordens_livres, mantido em alterar_estado_medico) e
+        só volta a entrar depois de uma atribuição, a partir do médico que a fez. O custo
+        por evento depende do número de especialidades e de atribuições, não de médicos.
+        """
+        fila = self.estado["fila_espera"]
+        if queue_empty(fila):
+            return
+        medicos = self.estado["medicos"]
+        livres = self.estado["ordens_livres"]
+        proximos = [(ordens[0], especialidade) for especialidade, ordens in livres.items() if ordens]
+        heapq.heapify(proximos)
+        sem_paciente = []
+
+        while proximos and not queue_empty(fila):
+            ordem, especialidade = heapq.heappop(proximos)
+            medico = medicos[ordem]
+            self.finalizar_consulta(medico, tempo_atual)
+            if not medico.ocupado:
+                sem_paciente.append(especialidade)
+                continue
+            # A fila mudou: esta especialidade e as que ficaram sem paciente seguem com o próximo livre
+            sem_paciente.append(especialidade)
+            for especialidade in sem_paciente:
+                ordens = livres[especialidade]
+                i = bisect.bisect_right(ordens, ordem)
+                if i < len(ordens):
+                    heapq.heappush(proximos, (ordens[i], especialidade))
+            sem_paciente = []
+
+    def tratar_evento(self, tipo, dados, tempo_atual):
+        if tipo == EVENTO_FIM_PAUSA:
+            self.terminar_pausa(dados, tempo_atual)
+        elif tipo == EVENTO_CHEGADA:
+            self.processar_chegada(tempo_atual)
+        elif tipo == EVENTO_FIM_CONSULTA:
+            # Consultas interrompidas por uma pausa deixam eventos obsoletos no heap
+            if dados.ocupado and dados.tempo_fim_consulta == tempo_atual:
+                self.finalizar_consulta(dados, tempo_atual)
+        elif tipo == EVENTO_VERIFICAR_PAUSAS:
+            if self.estado["verificacao_pausas_agendada"] == tempo_atual:
+                self.estado["verificacao_pausas_agendada"] = None
+                self.iniciar_pausas(tempo_atual)
+
+        self.atribuir_medicos_livres(tempo_atual)
+
+        if tipo == EVENTO_DESISTENCIA:
+            self.processar_desistencias()
+
+    def integrar_ate(self, tempo):
+        """Acumula os integrais no tempo do tamanho da fila e do número de médicos ocupados.
+
+        Chamado antes de cada evento: entre eventos nada muda, por isso as áreas são exatas.
+        """
+        intervalo = tempo - self.estado["tempo_integrado"]
+        if intervalo > 0:
+            self.estado["area_fila"] = self.estado["area_fila"] + len(self.estado["fila_espera"]) * intervalo
+            self.estado["area_ocupados"] = self.estado["area_ocupados"] + self.estado["medicos_ocupados"] * intervalo
+            self.estado["tempo_integrado"] = tempo
+
+    def registar_amostras_ate(self, tempo):
+        if not self.estado["amostragem"]:
+            return
+        while self.estado["proxima_amostra"] <= tempo:
+            self.estado["tempo_atual"] = self.estado["proxima_amostra"]
+            self.coletar_dados_historicos()
+            self.estado["proxima_amostra"] = self.estado["proxima_amostra"] + INTERVALO_AMOSTRAGEM
+
+    def atualizar(self, incremento_tempo):
+        """Avança o relógio incremento_tempo minutos, saltando de evento em evento"""
+        if not self.estado["simulacao_ativa"]:
+            return
+
+        tempo_alvo = min(self.estado["tempo_atual"] + incremento_tempo, self.estado["tempo_simulacao"])
+        eventos = self.estado["eventos"]
+        prazos = self.estado["prazos_desistencia"]
+
+        while True:
+            # As desistências não passam pelo heap de eventos: o prazo mais próximo é tratado
+            # como um EVENTO_DESISTENCIA, depois dos outros eventos do mesmo instante
+            if prazos and prazos[0][0] <= tempo_alvo and (not eventos or prazos[0][0] < eventos[0][0]):
+                tempo_evento, tipo, dados = prazos[0][0], EVENTO_DESISTENCIA, None
+            elif eventos and eventos[0][0] <= tempo_alvo:
+                tempo_evento, tipo, _, dados = heapq.heappop(eventos)
+            else:
+                break
+            self.registar_amostras_ate(tempo_evento)
+            self.integrar_ate(tempo_evento)
+            self.estado["tempo_atual"] = tempo_evento
+            self.estado["eventos_processados"] = self.estado["eventos_processados"] + 1
+            self.tratar_evento(tipo, dados, tempo_evento)
+
+        self.registar_amostras_ate(tempo_alvo)
+        self.integrar_ate(tempo_alvo)
+        self.estado["tempo_atual"] = tempo_alvo
+
+        if tempo_alvo >= self.estado["tempo_simulacao"]:
+            self.estado["simulacao_ativa"] = False
+            self.salvar_resultado()
+
+    def executar_completa(self):
+        """Corre a simulação inicializada até ao fim, sem passos intermédios"""
+        self.atualizar(self.estado["tempo_simulacao"])
+
+    def salvar_resultado(self):
+        """Guarda o resultado da execução.
+
+        As métricas finais são exatas (integrais no tempo e esperas reais), não dependem
+        da série amostrada: fila_media = L, tempo_medio_espera = W e a ocupação = ρ.
+        """
+        duracao = self.estado["tempo_integrado"]
+        num_medicos = len(self.estado["medicos"])
+        iniciados = len(self.estado["historico_atendimentos"])
+        resultado = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "configuracao": {
+                "lambda_chegada": self.estado["lambda_chegada"],
+                "tempo_medio_consulta": self.estado["tempo_medio_consulta"],
+                "num_medicos": len(self.estado["medicos"]),
+                "distribuicao": self.estado["distribuicao"],
+                "tempo_simulacao": self.estado["tempo_simulacao"],
+                "frequencia_pausa": self.estado["medicos"][0].frequencia_pausa if self.estado["medicos"] else 0,
+                "duracao_pausa": self.estado["medicos"][0].duracao_pausa if self.estado["medicos"] else 0,
+                "num_pausas": self.estado["medicos"][0].num_pausas if self.estado["medicos"] else 0,
+                "max_pausa_simultanea": self.estado.get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA),
+                "tempo_max_espera": self.estado.get("tempo_max_espera", TEMPO_MAX_ESPERA),
+                "prob_desistencia": self.estado.get("prob_desistencia", PROB_DESISTENCIA),
+                "semente": self.estado.get("semente")
+            },
+            "resultados_finais": {
+                "atendidos": len(self.estado["historico_atendimentos"]),
+                "desistentes": len(self.estado["pacientes_desistentes"]),
+                "taxa_ocupacao_media": self.estado["area_ocupados"] / (duracao * num_medicos) * 100
+                                       if duracao > 0 and num_medicos > 0 else 0,
+                "fila_maxima": self.estado["fila_maxima"],
+                "fila_media": self.estado["area_fila"] / duracao if duracao > 0 else 0,
+                "tempo_medio_espera": self.estado["soma_esperas"] / iniciados if iniciados > 0 else 0
+            },
+            "dados_historicos": self.estado["dados_historicos"].copy(),
+            "quantis": combinar_quantis([self.estado["quantis"]])
+        }
+        self.estado["resultados_simulacoes"].append(resultado)
+
+    def iniciar_consulta(self, medico, paciente, tempo_atual):
+        """Inicia uma consulta - VERSÃO CORRIGIDA"""
+
+        duracao = paciente.duracao_consulta
+
+        self.alterar_estado_medico(medico, True, False)
+        medico.paciente_atual = paciente.id
+        medico.tempo_inicio_consulta = tempo_atual
+        medico.tempo_fim_consulta = tempo_atual + duracao
+        medico.num_atendimentos = medico.num_atendimentos + 1
+
+        especialidade_correta = medico.especialidade == paciente.especialidade_necessaria
+
+        self.estado["soma_duracoes"] = self.estado["soma_duracoes"] + duracao
+        espera = tempo_atual - paciente.tempo_chegada
+        self.estado["soma_esperas"] = self.estado["soma_esperas"] + espera
+        grupo_espera = self.estado["quantis"]["espera"]
+        grupo_espera["geral"].adicionar(espera)
+        adicionar_esboco(grupo_espera["prioridade"], paciente.prioridade, espera)
+        adicionar_esboco(grupo_espera["especialidade"], paciente.especialidade_necessaria, espera)
+        if especialidade_correta:
+            self.estado["atendimentos_especialidade_correta"] = self.estado["atendimentos_especialidade_correta"] + 1
+        self.estado["historico_atendimentos"].registar(paciente.id, medico.id, tempo_atual, duracao, especialidade_correta)
+
+        self.agendar_evento(medico.tempo_fim_consulta, EVENTO_FIM_CONSULTA, medico)
+
+    def alterar_estado_medico(self, medico, ocupado, em_pausa):
+        """Muda ocupado/em_pausa mantendo, por especialidade, a contagem e as ordens (ordenadas) dos médicos livres.
+
+        Quando uma consulta acaba (ou é interrompida por uma pausa) soma-se ao médico o
+        tempo real desde tempo_inicio_consulta.
+        """
+        if medico.ocupado and not ocupado:
+            tempo_consulta = self.estado["tempo_atual"] - medico.tempo_inicio_consulta
+            medico.tempo_total_ocupado = medico.tempo_total_ocupado + max(0.0, tempo_consulta)
+        livre_antes = not medico.ocupado and not medico.em_pausa
+        self.estado["medicos_ocupados"] = self.estado["medicos_ocupados"] + int(ocupado) - int(medico.ocupado)
+        self.estado["medicos_em_pausa"] = self.estado["medicos_em_pausa"] + int(em_pausa) - int(medico.em_pausa)
+        medico.ocupado = ocupado
+        medico.em_pausa = em_pausa
+        livre_depois = not ocupado and not em_pausa
+        if livre_antes != livre_depois:
+            livres = self.estado["medicos_livres"]
+            especialidade = medico.especialidade
+            livres[especialidade] = livres.get(especialidade, 0) + (1 if livre_depois else -1)
+            ordens = self.estado["ordens_livres"].setdefault(especialidade, [])
+            if livre_depois:
+                bisect.insort(ordens, medico.ordem)
+            else:
+                del ordens[bisect.bisect_left(ordens, medico.ordem)]
+
+    def escolher_proximo_paciente(self, medico, tempo_atual):
+        """Primeira entrada da fila que o médico pode atender.
+
+        Equivale a percorrer a fila do início ao fim com as regras de atendimento
+        entre especialidades, mas usa os sub-heaps por especialidade e prioridade:
+        cada regra dá no máximo um candidato e fica o que estiver mais à frente.
+        """
+        fila = self.estado["fila_espera"]
+        tempo_max_espera = self.estado.get("tempo_max_espera", TEMPO_MAX_ESPERA)
+        medico_especialidade = medico.especialidade
+        urgente = PRIORIDADES["URGENTE"]
+        alta = PRIORIDADES["ALTA"]
+        normal = PRIORIDADES["NORMAL"]
+
+        # Mesma especialidade: o primeiro da sua sub-fila
+        candidatos = [fila.primeiro_da_especialidade(medico_especialidade)]
+
+        # URGENTE de outra especialidade à espera há 5 min ou mais
+        entrada = fila.primeiro_com_prioridade(urgente, medico_especialidade)
+        if entrada is not None and tempo_atual - entrada[1] >= 5:
+            candidatos.append(entrada)
+
+        # ALTA de outra especialidade, sem nenhum URGENTE à frente
+        if fila.contar_prioridade(urgente) == 0:
+            entrada = fila.primeiro_com_prioridade(alta, medico_especialidade)
+            if entrada is not None and tempo_atual - entrada[1] >= tempo_max_espera / 2:
+                candidatos.append(entrada)
+
+        # NORMAL para Clínica Geral quando não há especialista livre nem URGENTE/ALTA à frente
+        if (medico_especialidade == "Clínica Geral" and
+                fila.contar_prioridade(urgente) == 0 and fila.contar_prioridade(alta) == 0):
+            livres = self.estado["medicos_livres"]
+            for especialidade in fila.especialidades():
+                if especialidade != medico_especialidade and livres.get(especialidade, 0) == 0:
+                    entrada = fila.primeiro_da_especialidade(especialidade, normal)
+                    if entrada is not None and tempo_atual - entrada[1] >= tempo_max_espera:
+                        candidatos.append(entrada)
+
+        escolhida = None
+        for entrada in candidatos:
+            if entrada is not None and (escolhida is None or entrada < escolhida):
+                escolhida = entrada
+        return escolhida
+
+    def finalizar_consulta(self, medico, tempo_atual):
+        """Finaliza consulta do médico e procura próximo paciente - VERSÃO CORRIGIDA"""
+
+        self.alterar_estado_medico(medico, False, medico.em_pausa)
+        medico.paciente_atual = None
+        medico.tempo_fim_consulta = 0
+
+        if queue_empty(self.estado["fila_espera"]):
+            return
+
+        entrada = self.escolher_proximo_paciente(medico, tempo_atual)
+        paciente_escolhido = entrada[3] if entrada is not None else None
+
+        if paciente_escolhido is not None:
+            self.estado["fila_espera"].remover(paciente_escolhido.id)
+
+            self.iniciar_consulta(medico, paciente_escolhido, tempo_atual)
+
+    def obter_estatisticas(self):
+        """Obtém estatísticas atuais da simulação - VERSÃO CORRIGIDA"""
+        tempo_atual = self.estado["tempo_atual"]
+
+        stats = {
+            "tempo_atual": tempo_atual,
+            "tempo_simulacao": self.estado["tempo_simulacao"],
+            "doentes_atendidos": len(self.estado["historico_atendimentos"]),
+            "fila_espera": self.estado["fila_espera"],
+            "fila_len": tamanho_fila(self.estado["fila_espera"]),
+            "medicos": self.estado["medicos"],
+            "desistentes": len(self.estado["pacientes_desistentes"]),
+            "aguardando": len(self.estado["pacientes_disponiveis"])
+        }
+
+        if tempo_atual > 0:
+            taxas_ocupacao = []
+            i = 0
+            while i < len(self.estado["medicos"]):
+                medico = self.estado["medicos"][i]
+                tempo_ocupado = medico.tempo_total_ocupado
+
+                if medico.ocupado:
+                    tempo_ocupado = tempo_ocupado + max(0.0, tempo_atual - medico.tempo_inicio_consulta)
+
+                taxa = (tempo_ocupado / tempo_atual) * 100
+                taxa = min(100.0, max(0.0, taxa))
+                taxas_ocupacao.append(taxa)
+                i = i + 1
+
+            stats["taxa_ocupacao"] = sum(taxas_ocupacao) / len(taxas_ocupacao) if taxas_ocupacao else 0
+        else:
+            stats["taxa_ocupacao"] = 0
+
+        # Somas e contagens mantidas em iniciar_consulta e na fila: não se percorre o histórico
+        total_atendimentos = len(self.estado["historico_atendimentos"])
+        if total_atendimentos > 0:
+            stats["tempo_medio_consulta"] = self.estado["soma_duracoes"] / total_atendimentos
+            stats["taxa_correspondencia_especialidade"] = (self.estado["atendimentos_especialidade_correta"] / total_atendimentos) * 100
+        else:
+            stats["tempo_medio_consulta"] = 0
+            stats["taxa_correspondencia_especialidade"] = 0
+
+        stats["fila_por_especialidade"] = self.estado["fila_espera"].contar_por_especialidade()
+
+        return stats
+
+    def inicializar(self, config, tabela=None, medicos=None):
+        """Prepara uma execução com a configuração dada.
+
+        tabela (TabelaPacientes) e medicos (lista de dicionários como em medicos.json)
+        substituem os ficheiros da clínica; servem para os testes de escala.
+        """
+        self.erro = validar_configuracao(config)
+        if self.erro:
+            return False
+
+        if tabela is None:
+            tabela = carregar_tabela_pacientes()
+        if not len(tabela):
+            self.erro = "Não foi possível carregar pacientes!"
+            return False
+
+        semente = self.semente if self.semente is not None else config.get("semente")
+        if semente is None:
+            semente = int(np.random.SeedSequence().generate_state(1)[0])
+        self.estado["semente"] = semente
+        self.fluxos = criar_fluxos_aleatorios(semente)
+        self.erro = None
+
+        medicos_dataset = medicos if medicos is not None else carregar_medicos_simula()
+        num_medicos = config.get("num_medicos", NUM_MEDICOS)
+        medicos_dataset = medicos_dataset[:num_medicos]
+
+        lambda_chegada = config.get("lambda_chegada", LAMBDA_CHEGADA)
+        tempo_total = config.get("tempo_simulacao", TEMPO_SIMULACAO)
+        tempo_total_horas = tempo_total / 60.0
+
+        max_pacientes_dataset = len(tabela)
+
+        num_esperado_chegadas = lambda_chegada * tempo_total_horas
+
+        # Sem "pacientes_sinteticos" na configuração, a fonte sintética só é usada quando o
+        # dataset não chega para as chegadas esperadas
+        pacientes_sinteticos = config.get("pacientes_sinteticos")
+        if pacientes_sinteticos is None:
+            pacientes_sinteticos = num_esperado_chegadas > max_pacientes_dataset
+
+        if pacientes_sinteticos:
+            fonte_sintetica = FontePacientesSintetica(tabela)
+            pessoas_simulacao = []
+        else:
+            fonte_sintetica = None
+            num_pacientes_final = min(int(num_esperado_chegadas), max_pacientes_dataset)
+            if num_pacientes_final < max_pacientes_dataset:
+                linhas_selecionadas = self.fluxos["pacientes"].permutation(max_pacientes_dataset)[:num_pacientes_final].tolist()
+            else:
+                linhas_selecionadas = range(max_pacientes_dataset)
+            marcadas = (self.fluxos["pacientes"].random(len(linhas_selecionadas)) < 0.3).tolist()
+            pessoas_simulacao = [
+                Paciente(tabela, linha, consulta_marcada=marcada) for linha, marcada in zip(linhas_selecionadas, marcadas)
+            ]
+
+        self.estado["pessoas_dados"] = {p.id: p for p in pessoas_simulacao}
+
+        self.estado["medicos"] = []
+        for ordem, medico_data in enumerate(medicos_dataset):
+            self.estado["medicos"].append(Medico(
+                id=medico_data.get("id", "m_default"),
+                nome=medico_data.get("nome", "Médico"),
+                especialidade=medico_data.get("especialidade", "Geral"),
+                ocupado=False,
+                paciente_atual=None,
+                tempo_inicio_consulta=0,
+                tempo_fim_consulta=0,
+                tempo_total_ocupado=0,
+                num_atendimentos=0,
+                em_pausa=False,
+                tempo_fim_pausa=0,
+                num_pausas_realizadas=0,
+                frequencia_pausa=config.get("frequencia_pausa", PAUSA_FREQUENCIA),
+                duracao_pausa=config.get("duracao_pausa", DURACAO_PAUSA),
+                num_pausas=config.get("num_pausas", NUM_PAUSAS),
+                pausas_realizadas=[],
+                ordem=ordem
+            ))
+
+        medicos_livres = {}
+        ordens_livres = {}
+        for medico in self.estado["medicos"]:
+            medicos_livres[medico.especialidade] = medicos_livres.get(medico.especialidade, 0) + 1
+            ordens_livres.setdefault(medico.especialidade, []).append(medico.ordem)
+
+        self.estado.update({
+            "medicos_livres": medicos_livres,
+            "ordens_livres": ordens_livres,
+            "fila_espera": FilaPrioridade(PRIORIDADES),
+            "historico_atendimentos": HistoricoAtendimentos(),
+            "tempo_atual": 0,
+            "simulacao_ativa": True,
+            "velocidade": config.get("velocidade", 5.0),
+            "pacientes_disponiveis": deque(pessoas_simulacao),
+            "fonte_sintetica": fonte_sintetica,
+            "chegadas_agendadas": 0,
+            "pacientes_desistentes": [],
+            "lambda_chegada": lambda_chegada,
+            "tempo_medio_consulta": config.get("tempo_medio_consulta", TEMPO_MEDIO_CONSULTA),
+            "tempo_simulacao": config.get("tempo_simulacao", TEMPO_SIMULACAO),
+            "distribuicao": config.get("distribuicao", "exponential"),
+            "dados_historicos": SerieTemporal(int(config.get("tempo_simulacao", TEMPO_SIMULACAO) // INTERVALO_AMOSTRAGEM) + 1),
+            "max_pausa_simultanea": config.get("max_pausa_simultanea", MAX_MEDICOS_PAUSA_SIMULTANEA),
+            "tempo_max_espera": config.get("tempo_max_espera", TEMPO_MAX_ESPERA),
+            "prob_desistencia": config.get("prob_desistencia", PROB_DESISTENCIA),
+            "eventos": [],
+            "prazos_desistencia": [],
+            "seq_eventos": 0,
+            "proxima_amostra": 0.0,
+            "verificacao_pausas_agendada": None,
+            "soma_duracoes": 0.0,
+            "atendimentos_especialidade_correta": 0,
+            "medicos_ocupados": 0,
+            "medicos_em_pausa": 0,
+            "amostragem": config.get("amostragem", True),
+            "tempo_integrado": 0.0,
+            "area_fila": 0.0,
+            "area_ocupados": 0.0,
+            "soma_esperas": 0.0,
+            "fila_maxima": 0,
+            "quantis": criar_quantis(),
+            "eventos_processados": 0
+        })
+
+        lambda_minuto = lambda_chegada / 60.0
+        if lambda_minuto > 0:
+            self.estado["tempo_medio_entre_chegadas"] = 1.0 / lambda_minuto
+        else:
+            self.estado["tempo_medio_entre_chegadas"] = 60.0
+
+        # Os intervalos entre chegadas saem em blocos à medida que os pacientes chegam
+        self.blocos = {}
+        self.agendar_proxima_chegada(0.0)
+
+        if self.estado["medicos"] and self.estado["medicos"][0].num_pausas > 0:
+            self.agendar_verificacao_pausas(self.estado["medicos"][0].frequencia_pausa)
+
+        return True
+
+
+def validar_configuracao(config):
+    """Devolve a mensagem de erro da configuração, ou None se for válida"""
+    if config.get("num_medicos", NUM_MEDICOS) <= 0:
+        return "Número de médicos deve ser maior que 0!"
+    if config.get("tempo_simulacao", TEMPO_SIMULACAO) <= 0:
+        return "Tempo de simulação deve ser maior que 0!"
+    if config.get("lambda_chegada", LAMBDA_CHEGADA) <= 0:
+        return "Taxa de chegada deve ser maior que 0!"
+    if config.get("tempo_medio_consulta", TEMPO_MEDIO_CONSULTA) <= 0:
+        return "Tempo médio de consulta deve ser maior que 0!"
+    return None
+
+
+def executar_simulacao(config, semente=None):
+    """Corre uma simulação completa e devolve o resultado (como em salvar_resultado).
+
+    Lança ErroSimulacao se a configuração ou os dados não permitirem correr.
+    """
+    simulacao = Simulacao(semente)
+    if not simulacao.inicializar(config):
+        raise ErroSimulacao(simulacao.erro)
+    simulacao.executar_completa()
+    return simulacao.estado["resultados_simulacoes"][-1]
+
+
+run = executar_simulacao
+
+
+def semente_replicacao(semente, replicacao):
+    """Semente da replicação n: é a mesma em todos os cenários com a mesma semente base"""
+    return int(np.random.SeedSequence([semente, replicacao]).generate_state(1)[0])
+
+
+def executar_tarefa(tarefa):
+    """Ponto de entrada para pools de processos: tarefa = (config, semente)"""
+    config, semente = tarefa
+    return executar_simulacao(config, semente)
+
+
+def executar_ponto_fila_vs_taxa(tarefa):
+    """Uma simulação (taxa, replicação) da análise Fila vs Taxa, resumida para voltar do pool.
+
+    Usa as métricas exatas (L e W), por isso corre sem amostragem da série temporal.
+    """
+    config, semente = tarefa
+    finais = executar_simulacao(dict(config, amostragem=False), semente)["resultados_finais"]
+
+    return {
+        "taxa": config["lambda_chegada"],
+        "tamanho_medio_fila": finais["fila_media"],
+        "tempo_medio_espera": finais["tempo_medio_espera"],
+        "atendidos": finais["atendidos"],
+        "desistentes": finais["desistentes"]
+    }
+
+
+# ============================================================================
+# REPLICAÇÕES INDEPENDENTES
+# ============================================================================
+def quantil_t_95(graus_liberdade):
+    if graus_liberdade < 1:
+        return 0.0
+    if graus_liberdade <= len(QUANTIS_T_95):
+        return QUANTIS_T_95[graus_liberdade - 1]
+    # Expansão de Cornish-Fisher em 1/ν a partir do quantil da normal (erro < 1e-5 para ν > 30);
+    # a normal (1.96) daria ICs 2-4% estreitos demais entre 31 e ~120 replicações
+    z = 1.959964
+    v = graus_liberdade
+    return (z + (z ** 3 + z) / (4 * v) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3))
+
+
+def resumir_metrica(valores):
+    """Média, desvio padrão amostral e IC a 95% (t de Student) de uma lista de valores"""
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    media = float(np.mean(valores)) if n else 0.0
+    desvio = float(np.std(valores, ddof=1)) if n > 1 else 0.0
+    meia_largura = quantil_t_95(n - 1) * desvio / np.sqrt(n) if n > 1 else 0.0
+    return {
+        "n": n,
+        "media": media,
+        "desvio_padrao": desvio,
+        "meia_largura": float(meia_largura),
+        "ic95": [media - float(meia_largura), media + float(meia_largura)]
+    }
+
+
+def resumir_replicacoes(lista_resultados_finais):
+    """Resumo por métrica (ver resumir_metrica) dos resultados_finais de várias replicações"""
+    return {
+        metrica: resumir_metrica([r.get(metrica, 0) for r in lista_resultados_finais])
+        for metrica in METRICAS_RESULTADO
+    }
+
+
+def executar_resultados_finais(tarefa):
+    """Como executar_tarefa, mas só devolve resultados_finais (e corre sem amostragem da série).
+
+    Os esboços de quantis seguem em resultados_finais["quantis"] para serem combinados.
+    """
+    config, semente = tarefa
+    resultado = executar_simulacao(dict(config, amostragem=False), semente)
+    return dict(resultado["resultados_finais"], quantis=resultado["quantis"])
+
+
+def executar_replicacoes(config, num_replicacoes, semente=None, workers=1):
+    """Corre num_replicacoes independentes da mesma configuração e resume-as.
+
+    A replicação n usa semente_replicacao(semente, n), por isso cenários corridos
+    com a mesma semente base partilham as sementes (números aleatórios comuns).
+    """
+    if semente is None:
+        semente = int(np.random.SeedSequence().generate_state(1)[0])
+    tarefas = [(config, semente_replicacao(semente, r)) for r in range(num_replicacoes)]
+
+    if workers <= 1 or len(tarefas) <= 1:
+        finais = [executar_resultados_finais(t) for t in tarefas]
+    else:
+        with criar_executor(workers) as executor:
+            finais = list(executor.map(executar_resultados_finais, tarefas))
+
+    return {
+        "semente": semente,
+        "replicacoes": finais,
+        "estatisticas": resumir_replicacoes(finais),
+        "quantis": combinar_quantis([f.get("quantis") for f in finais])
+    }
+
+
+def valor_metrica(resultado, metrica):
+    """Lê a métrica de um resultado resumido ou completo (dentro de resultados_finais)"""
+    if metrica in resultado:
+        return resultado[metrica]
+    return resultado["resultados_finais"][metrica]
+
+
+def precisao_atingida(resumo, precisao_relativa):
+    """True se a meia-largura do IC 95% não passa de precisao_relativa × |média|"""
+    if resumo["n"] < 2:
+        return False
+    return resumo["meia_largura"] <= precisao_relativa * abs(resumo["media"])
+
+
+def executar_ate_precisao(cenarios, precisao_relativa, metrica="tempo_medio_espera",
+                          funcao=executar_resultados_finais, min_replicacoes=5, max_replicacoes=100,
+                          lote=LOTE_REPLICACOES, semente=None, workers=1, ao_progresso=None):
+    """Regra de paragem sequencial: replica cada cenário em lotes até o IC 95% da métrica
+    ficar dentro de ±precisao_relativa da média, ou até max_replicacoes.
+
+    funcao recebe (config, semente) e devolve um dicionário com a métrica (como
+    executar_resultados_finais, executar_ponto_fila_vs_taxa ou executar_tarefa). Os cenários que ainda
+    não convergiram correm em paralelo (cada lote é repartido pelos workers, mas o tamanho
+    do lote não depende deles); a replicação n usa semente_replicacao(semente, n) em todos
+    os cenários. ao_progresso(concluidas, por_convergir) é chamado à medida que
+    as simulações terminam e pode devolver False para cancelar (devolve-se então None).
+
+    Devolve, por cenário, {"replicacoes": [{"replicacao", "semente", "resultado"}, ...],
+    "resumo": resumir_metrica(...), "atingiu_precisao": bool}.
+    """
+    if semente is None:
+        semente = int(np.random.SeedSequence().generate_state(1)[0])
+    min_replicacoes = max(2, min(min_replicacoes, max_replicacoes))
+
+    estados = []
+    for config in cenarios:
+        estados.append({"config": config, "seguinte": 0, "pendentes": 0, "feito": False,
+                        "replicacoes": [], "resumo": resumir_metrica([]), "atingiu_precisao": False})
+
+    executor = criar_executor(workers) if workers > 1 else None
+    futuros = {}
+    imediatos = []
+    concluidas = 0
+    cancelado = False
+
+    def lancar_lotes():
+        for estado in estados:
+            if estado["feito"] or estado["pendentes"] > 0:
+                continue
+            tamanho = min_replicacoes if estado["seguinte"] == 0 else lote
+            tamanho = min(tamanho, max_replicacoes - estado["seguinte"])
+            for replicacao in range(estado["seguinte"], estado["seguinte"] + tamanho):
+                tarefa = (estado["config"], semente_replicacao(semente, replicacao))
+                if executor is None:
+                    imediatos.append((estado, replicacao, tarefa[1], funcao(tarefa)))
+                else:
+                    futuros[executor.submit(funcao, tarefa)] = (estado, replicacao, tarefa[1])
+            estado["seguinte"] = estado["seguinte"] + tamanho
+            estado["pendentes"] = tamanho
+
+    def registar(estado, replicacao, semente_rep, resultado):
+        estado["replicacoes"].append({"replicacao": replicacao, "semente": semente_rep, "resultado": resultado})
+        estado["pendentes"] = estado["pendentes"] - 1
+        if estado["pendentes"] == 0:
+            estado["replicacoes"].sort(key=lambda r: r["replicacao"])
+            estado["resumo"] = resumir_metrica([valor_metrica(r["resultado"], metrica) for r in estado["replicacoes"]])
+            estado["atingiu_precisao"] = precisao_atingida(estado["resumo"], precisao_relativa)
+            estado["feito"] = estado["atingiu_precisao"] or estado["seguinte"] >= max_replicacoes
+
+    try:
+        lancar_lotes()
+        while (futuros or imediatos) and not cancelado:
+            if executor is None:
+                for estado, replicacao, semente_rep, resultado in imediatos:
+                    registar(estado, replicacao, semente_rep, resultado)
+                concluidas = concluidas + len(imediatos)
+                imediatos.clear()
+            else:
+                terminados, _ = wait(list(futuros), timeout=0.1, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    estado, replicacao, semente_rep = futuros.pop(futuro)
+                    registar(estado, replicacao, semente_rep, futuro.result())
+                    concluidas = concluidas + 1
+
+            lancar_lotes()
+            if ao_progresso is not None:
+                por_convergir = sum(1 for estado in estados if not estado["feito"])
+                if ao_progresso(concluidas, por_convergir) is False:
+                    cancelado = True
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    if cancelado:
+        return None
+    return [{"replicacoes": e["replicacoes"], "resumo": e["resumo"], "atingiu_precisao": e["atingiu_precisao"]}
+            for e in estados]
@@ -0,0 +1,266 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from motor_simulacao import (
+    ErroSimulacao,
+    EsbocoQuantis,
+    METRICAS_RESULTADO,
+    QUANTIS_RELATORIO,
+    SerieTemporal,
+    combinar_quantis,
+    criar_executor,
+    executar_ate_precisao,
+    executar_tarefa,
+    resumir_quantis,
+    resumir_replicacoes,
+    semente_replicacao,
+    validar_configuracao
+)
+
+
+# ============================================================================
+# EXECUÇÃO EM LOTE DE CENÁRIOS (sem interface gráfica)
+# ============================================================================
+# Exemplo:
+#     python simular_lote.py config_simulacao.json outro_cenario.json \
+#         --replicacoes 10 --semente 42 --workers 8 --saida resultados_lote
+#
+# Com --precisao 5 cada cenário é replicado em lotes até o IC 95% do tempo médio
+# de espera ficar a ±5% da média (ou até --max-replicacoes).
+
+COLUNAS_CONFIGURACAO = [
+    "lambda_chegada", "tempo_medio_consulta", "num_medicos", "distribuicao", "tempo_simulacao",
+    "frequencia_pausa", "duracao_pausa", "num_pausas", "max_pausa_simultanea"
+]
+
+# Nome de cada medida de quantis em quantis.csv: a fila é a que cada paciente encontra ao
+# chegar (amostrada nas chegadas), não a média no tempo de estatisticas.csv
+MEDIDAS_QUANTIS = {"fila": "fila_na_chegada"}
+
+
+def carregar_cenario(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ErroSimulacao(f"{caminho}: o cenário deve ser um objeto JSON")
+    erro = validar_configuracao(config)
+    if erro:
+        raise ErroSimulacao(f"{caminho}: {erro}")
+    return config
+
+
+def nome_cenario(caminho, usados):
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    base = nome
+    n = 2
+    while nome in usados:
+        nome = f"{base}_{n}"
+        n = n + 1
+    usados.add(nome)
+    return nome
+
+
+def executar_tarefas(tarefas, workers):
+    if workers <= 1 or len(tarefas) <= 1:
+        return [executar_tarefa(t) for t in tarefas]
+    with criar_executor(workers) as executor:
+        return list(executor.map(executar_tarefa, tarefas))
+
+
+def escrever_resumo_csv(execucoes, caminho):
+    colunas_resultados = []
+    for e in execucoes:
+        for chave in e["resultado"]["resultados_finais"]:
+            if chave not in colunas_resultados:
+                colunas_resultados.append(chave)
+
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["cenario", "replicacao", "semente"] + COLUNAS_CONFIGURACAO + colunas_resultados)
+        for e in execucoes:
+            configuracao = e["resultado"]["configuracao"]
+            finais = e["resultado"]["resultados_finais"]
+            escritor.writerow(
+                [e["cenario"], e["replicacao"], e["semente"]]
+                + [configuracao.get(c, "") for c in COLUNAS_CONFIGURACAO]
+                + [finais.get(c, "") for c in colunas_resultados]
+            )
+
+
+def escrever_estatisticas_csv(estatisticas, caminho):
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["cenario", "metrica", "n", "media", "desvio_padrao", "meia_largura_ic95", "ic95_inferior", "ic95_superior"])
+        for nome, por_metrica in estatisticas.items():
+            for metrica in METRICAS_RESULTADO:
+                resumo = por_metrica[metrica]
+                escritor.writerow([nome, metrica, resumo["n"], resumo["media"], resumo["desvio_padrao"],
+                                   resumo["meia_largura"], resumo["ic95"][0], resumo["ic95"][1]])
+
+
+def escrever_quantis_csv(quantis_por_cenario, caminho):
+    """Uma linha por (cenário, medida, divisão, grupo) com os quantis combinados das replicações"""
+    nomes_quantis = [f"p{int(round(q * 100))}" for q in QUANTIS_RELATORIO]
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["cenario", "medida", "divisao", "grupo", "n", "media"] + nomes_quantis)
+        for nome, quantis in quantis_por_cenario.items():
+            for medida, grupo in quantis.items():
+                linhas = [("geral", "", grupo["geral"])]
+                for divisao in ("prioridade", "especialidade"):
+                    linhas.extend((divisao, chave, resumo) for chave, resumo in grupo[divisao].items())
+                for divisao, chave, resumo in linhas:
+                    escritor.writerow([nome, MEDIDAS_QUANTIS.get(medida, medida), divisao, chave, resumo["n"], resumo["media"]]
+                                      + [resumo[q] for q in nomes_quantis])
+
+
+def escrever_serie_csv(dados_historicos, caminho):
+    if not len(dados_historicos):
+        return
+    colunas = [dados_historicos.coluna(nome) for nome in dados_historicos.nomes]
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(dados_historicos.nomes)
+        escritor.writerows(zip(*(c.tolist() for c in colunas)))
+
+
+def converter_json(valor):
+    if isinstance(valor, SerieTemporal):
+        return {nome: valor.coluna(nome).tolist() for nome in valor.nomes}
+    if isinstance(valor, EsbocoQuantis):
+        return valor.para_dict()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Corre cenários da clínica (formato config_simulacao.json) sem interface gráfica."
+    )
+    parser.add_argument("cenarios", nargs="+", help="ficheiros JSON de configuração")
+    parser.add_argument("-r", "--replicacoes", type=int, default=1,
+                        help="replicações por cenário (padrão: 1); com --precisao é o mínimo")
+    parser.add_argument("-p", "--precisao", type=float, default=None,
+                        help="replicar em lotes até o IC 95%% da métrica ficar a ±PRECISAO%% da média")
+    parser.add_argument("--metrica", default="tempo_medio_espera", choices=METRICAS_RESULTADO,
+                        help="métrica da regra de paragem (padrão: tempo_medio_espera)")
+    parser.add_argument("--max-replicacoes", type=int, default=100,
+                        help="limite de replicações por cenário com --precisao (padrão: 100)")
+    parser.add_argument("-s", "--semente", type=int, default=None,
+                        help="semente base; a replicação n usa a mesma semente em todos os cenários")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processos em paralelo (padrão: 1)")
+    parser.add_argument("-o", "--saida", default="resultados_lote", help="pasta de saída (padrão: resultados_lote)")
+    parser.add_argument("--sem-series", action="store_true", help="não escrever as séries temporais")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.replicacoes < 1:
+        print("Erro: --replicacoes deve ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    semente = args.semente
+    if semente is None:
+        semente = int(np.random.SeedSequence().generate_state(1)[0])
+
+    try:
+        cenarios = []
+        usados = set()
+        for caminho in args.cenarios:
+            cenarios.append((nome_cenario(caminho, usados), carregar_cenario(caminho)))
+    except (OSError, ValueError, ErroSimulacao) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    if args.sem_series:
+        # As métricas finais são exatas, a amostragem só serve para as séries
+        cenarios = [(nome, dict(config, amostragem=False)) for nome, config in cenarios]
+
+    inicio = time.time()
+    execucoes = []
+    try:
+        if args.precisao:
+            por_cenario = executar_ate_precisao(
+                [config for _, config in cenarios], args.precisao / 100, metrica=args.metrica,
+                funcao=executar_tarefa, min_replicacoes=args.replicacoes,
+                max_replicacoes=max(args.replicacoes, args.max_replicacoes),
+                semente=semente, workers=args.workers
+            )
+            for (nome, _), cenario in zip(cenarios, por_cenario):
+                if not cenario["atingiu_precisao"]:
+                    print(f"Aviso: {nome} parou em {len(cenario['replicacoes'])} replicações sem atingir "
+                          f"±{args.precisao}% em {args.metrica}", file=sys.stderr)
+                for r in cenario["replicacoes"]:
+                    execucoes.append({"cenario": nome, "replicacao": r["replicacao"], "semente": r["semente"],
+                                      "resultado": r["resultado"]})
+        else:
+            tarefas = []
+            identificacao = []
+            for nome, config in cenarios:
+                for replicacao in range(args.replicacoes):
+                    semente_rep = semente_replicacao(semente, replicacao)
+                    tarefas.append((config, semente_rep))
+                    identificacao.append((nome, replicacao, semente_rep))
+
+            resultados = executar_tarefas(tarefas, args.workers)
+            for (nome, replicacao, semente_rep), resultado in zip(identificacao, resultados):
+                execucoes.append({"cenario": nome, "replicacao": replicacao, "semente": semente_rep,
+                                  "resultado": resultado})
+    except ErroSimulacao as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    duracao = time.time() - inicio
+
+    estatisticas = {}
+    quantis = {}
+    for nome, _ in cenarios:
+        estatisticas[nome] = resumir_replicacoes(
+            [e["resultado"]["resultados_finais"] for e in execucoes if e["cenario"] == nome]
+        )
+        quantis[nome] = resumir_quantis(combinar_quantis(
+            [e["resultado"].get("quantis") for e in execucoes if e["cenario"] == nome]
+        ))
+
+    os.makedirs(args.saida, exist_ok=True)
+    escrever_resumo_csv(execucoes, os.path.join(args.saida, "resumo.csv"))
+    escrever_estatisticas_csv(estatisticas, os.path.join(args.saida, "estatisticas.csv"))
+    escrever_quantis_csv(quantis, os.path.join(args.saida, "quantis.csv"))
+
+    if not args.sem_series:
+        pasta_series = os.path.join(args.saida, "series")
+        os.makedirs(pasta_series, exist_ok=True)
+        for e in execucoes:
+            nome_ficheiro = f"{e['cenario']}_rep{e['replicacao']}.csv"
+            escrever_serie_csv(e["resultado"]["dados_historicos"], os.path.join(pasta_series, nome_ficheiro))
+    else:
+        for e in execucoes:
+            e["resultado"] = {k: v for k, v in e["resultado"].items() if k != "dados_historicos"}
+
+    with open(os.path.join(args.saida, "resultados.json"), "w", encoding="utf-8") as f:
+        json.dump({"semente": semente, "replicacoes": args.replicacoes, "precisao": args.precisao,
+                   "estatisticas": estatisticas,
+                   "quantis": quantis,
+                   "execucoes": execucoes},
+                  f, ensure_ascii=False, indent=2, default=converter_json)
+
+    for nome, por_metrica in estatisticas.items():
+        espera = por_metrica["tempo_medio_espera"]
+        p95 = quantis[nome]["espera"]["geral"]["p95"]
+        print(f"{nome}: espera média {espera['media']:.2f} ± {espera['meia_largura']:.2f} min "
+              f"(IC 95%, n={espera['n']}), p95 {p95:.1f} min")
+    print(f"{len(execucoes)} simulações em {duracao:.1f} s -> {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())